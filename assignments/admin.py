@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Assignment, TaskQueue
+from .models import ArchivedDay, Assignment, TaskQueue, CounterEvent, DailySummary
 
 
 @admin.register(Assignment)
@@ -43,3 +43,62 @@ class TaskQueueAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(CounterEvent)
+class CounterEventAdmin(admin.ModelAdmin):
+    """Read-only admin interface for the counter event ledger."""
+    
+    list_display = ['created_at', 'worker', 'counter', 'delta', 'reason', 'assignment_id']
+    list_filter = ['counter', 'reason']
+    search_fields = ['worker__name']
+    list_per_page = 100
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    """Read-only admin interface for the daily rollups (rebuilt with backfill_summaries)."""
+    
+    list_display = ['date', 'guard_duty', 'patrol_a', 'patrol_b', 'kitchen', 'night_shifts', 'multi_department_slots']
+    date_hierarchy = 'date'
+    list_per_page = 100
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedDay)
+class ArchivedDayAdmin(admin.ModelAdmin):
+    """Read-only admin interface for archived days (written by archive_assignments)."""
+    
+    list_display = ['date', 'assignment_count', 'archived_at']
+    date_hierarchy = 'date'
+    list_per_page = 100
+    
+    @admin.display(description='assignments')
+    def assignment_count(self, obj):
+        return len(obj.assignments)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,142 @@
+from contextvars import ContextVar
+from datetime import date, timedelta
+from itertools import groupby
+from operator import itemgetter
+from django.conf import settings
+from django.db import transaction
+from workers.models import Worker
+from . import fragments, rollups
+from .counters import managed_changes
+from .models import ArchivedDay, Assignment
+
+
+# Set while archive_before deletes the rows it archived (see archiving())
+_archiving = ContextVar('assignments_archiving', default=False)
+
+
+def archiving():
+    """Whether assignments deleted now are being archived: their days' summaries and fragments are already handled."""
+    return _archiving.get()
+
+
+def default_cutoff():
+    """First date kept in Assignment: settings.ASSIGNMENT_ARCHIVE_AFTER_DAYS before today."""
+    return date.today() - timedelta(days=settings.ASSIGNMENT_ARCHIVE_AFTER_DAYS)
+
+
+def _past(dates):
+    # Only days before today can be archived, so only those need looking up
+    today = date.today()
+    return {day for day in dates if day and day < today}
+
+
+def archive_before(cutoff, batch_size=500):
+    """Move the assignments of every date before cutoff into ArchivedDay rows, one per day.
+
+    Runs in one transaction: the days' summaries are rewritten from the very
+    rows being archived (so reports and counters keep them), then the rows
+    are deleted with the day summary, fragment and counter receivers standing
+    aside (archiving(), counters.managed_changes). Counter events keep the
+    assignment ids, which archived rows keep too. Returns (days, assignments).
+    """
+    if cutoff > date.today():
+        raise ValueError('Only past days can be archived')
+    rows = (
+        Assignment.objects.filter(date__lt=cutoff)
+        .order_by('date', 'time_slot', 'task_type', 'id')
+        .values_list('date', 'task_type', 'time_slot', 'worker_id', 'worker__department', 'id', 'is_commander')
+    )
+    days, assignments = [], 0
+
+    def flush(archived, summaries):
+        ArchivedDay.objects.bulk_create(archived)
+        rollups.store(summaries)
+
+    with transaction.atomic():
+        archived, summaries = [], []
+        for day, day_rows in groupby(rows.iterator(chunk_size=5000), key=itemgetter(0)):
+            day_rows = list(day_rows)
+            archived.append(ArchivedDay(date=day, assignments=[
+                [assignment_id, task_type, time_slot, worker_id, is_commander]
+                for _, task_type, time_slot, worker_id, _, assignment_id, is_commander in day_rows
+            ]))
+            summaries.append(rollups.summarize(day, [row[:5] for row in day_rows]))
+            days.append(day)
+            assignments += len(day_rows)
+            if len(archived) >= batch_size:
+                flush(archived, summaries)
+                archived, summaries = [], []
+        flush(archived, summaries)
+
+        # Left alone, the post_delete receivers would re-summarize the days as empty
+        # and take the archived assignments off the workers' counters
+        token = _archiving.set(True)
+        try:
+            with managed_changes():
+                Assignment.objects.filter(date__lt=cutoff).delete()
+        finally:
+            _archiving.reset(token)
+        fragments.invalidate(days)
+    return len(days), assignments
+
+
+def restore(dates):
+    """Move archived days among dates back into Assignment (same ids), before they are written to.
+
+    One query when none of the dates is archived (none at all for today and
+    later). Assignments of since-deleted workers come back without a worker,
+    as they would have been left. Returns the number of days restored.
+    """
+    past = _past(dates)
+    if not past:
+        return 0
+    archived = list(ArchivedDay.objects.filter(date__in=past))
+    if not archived:
+        return 0
+    worker_ids = {row[3] for day in archived for row in day.assignments if row[3]}
+    existing = set(Worker.objects.filter(id__in=worker_ids).values_list('id', flat=True))
+    # A day is either archived or live: never both, never lost half way
+    with transaction.atomic():
+        Assignment.objects.bulk_create([
+            Assignment(
+                id=assignment_id, date=day.date, task_type=task_type, time_slot=time_slot,
+                worker_id=worker_id if worker_id in existing else None, is_commander=is_commander,
+            )
+            for day in archived
+            for assignment_id, task_type, time_slot, worker_id, is_commander in day.assignments
+        ])
+        ArchivedDay.objects.filter(id__in=[day.id for day in archived]).delete()
+        # The days' assignments are back in the table: worker statistics may change
+        fragments.invalidate(day.date for day in archived)
+    return len(archived)
+
+
+def _expand(archived_days):
+    """{date: [unsaved Assignment with its worker]} of ArchivedDay rows, with one query for the workers."""
+    archived_days = list(archived_days)
+    if not archived_days:
+        return {}
+    worker_ids = {row[3] for day in archived_days for row in day.assignments if row[3]}
+    workers = Worker.objects.in_bulk(worker_ids)
+    return {
+        day.date: [
+            Assignment(
+                id=assignment_id, date=day.date, task_type=task_type, time_slot=time_slot,
+                worker=workers.get(worker_id), is_commander=is_commander,
+            )
+            for assignment_id, task_type, time_slot, worker_id, is_commander in day.assignments
+        ]
+        for day in archived_days
+    }
+
+
+def load_days(dates):
+    """Archived assignments of the given dates, as {date: [Assignment]} in calendar order.
+
+    For days Assignment has nothing for: no query unless one of them is in
+    the past, and two at most (the days and their workers).
+    """
+    past = _past(dates)
+    if not past:
+        return {}
+    return _expand(ArchivedDay.objects.filter(date__in=past))
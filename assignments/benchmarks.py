@@ -0,0 +1,428 @@
+import asyncio
+import platform
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from io import StringIO
+import django
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import call_command
+from django.db import connection, reset_queries, transaction
+from django.test import AsyncClient, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from workers.models import Worker
+from . import fragments, profiling, queue_cache, views
+from .models import Assignment, TaskQueue
+from .counter_logic import _guard_rows
+
+
+def generate_history(workers=200, days=365, end_date=None, batch_size=5000):
+    """Create synthetic workers and a fully staffed roster for `days` days ending at end_date.
+
+    Workers are spread over every department and get an entry in every task
+    queue. Every day gets all guard slots and full-day tasks filled in worker
+    rotation, so the history looks like a real unit's (33 assignments a day).
+    Returns (workers, start_date, end_date).
+    """
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    departments = [value for value, _ in Worker.DEPARTMENT_CHOICES]
+    created = Worker.objects.bulk_create([
+        Worker(
+            name=f'Benchmark {i}',
+            title='commander' if i % 10 == 0 else 'soldier',
+            department=departments[i % len(departments)],
+        )
+        for i in range(workers)
+    ])
+    TaskQueue.objects.bulk_create([
+        TaskQueue(worker=worker, task_type=task_type, position=position)
+        for task_type, _ in TaskQueue.TASK_TYPE_CHOICES
+        for position, worker in enumerate(created)
+    ])
+    TaskQueue.bump_version()
+
+    seats = [
+        ('guard_duty', time_slot)
+        for time_slot, _ in Assignment.TIME_SLOT_CHOICES
+        for _ in range(Assignment.get_required_workers_for_slot(time_slot))
+    ]
+    seats += [
+        (task_type, None)
+        for task_type, required in Assignment.FULL_DAY_REQUIRED_WORKERS.items()
+        for _ in range(required)
+    ]
+
+    batch = []
+    cursor = 0
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        for task_type, time_slot in seats:
+            batch.append(Assignment(
+                date=day,
+                time_slot=time_slot,
+                task_type=task_type,
+                worker=created[cursor % workers],
+            ))
+            cursor += 1
+        if len(batch) >= batch_size:
+            Assignment.objects.bulk_create(batch)
+            batch = []
+    Assignment.objects.bulk_create(batch)
+    return created, start_date, end_date
+
+
+def lookup_queries(worker, day):
+    """The Assignment lookups the app runs, as (name, queryset) pairs for a worker and a date."""
+    month_start = day.replace(day=1)
+    month_end = month_start + timedelta(days=30)
+    return [
+        ('day', Assignment.objects.filter(date=day).select_related('worker')
+            .order_by('time_slot', 'task_type', 'id')),
+        ('month', Assignment.objects.filter(date__range=(month_start, month_end)).select_related('worker')
+            .order_by('date', 'time_slot', 'task_type', 'id')),
+        ('guard_slot', _guard_rows(date=day, time_slot='01:00-03:00')),
+        ('guard_day', _guard_rows(date=day)),
+        ('guard_range', _guard_rows(date__range=(month_start, month_end))),
+        ('full_day_task', Assignment.objects.filter(date=day, task_type='patrol_a', time_slot__isnull=True)),
+        ('worker_history', Assignment.objects.filter(worker=worker).order_by('-date')[:30]),
+        ('worker_month', Assignment.objects.filter(worker=worker, date__range=(month_start, month_end))),
+    ]
+
+
+def explain(queryset, label):
+    """Query plan of a queryset.
+
+    The label is appended as an SQL comment: SQLite keeps prepared EXPLAIN
+    statements in the connection's statement cache and does not re-plan them
+    after an index is dropped, so each phase needs its own statement text.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {label} */', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def measure(queryset, label, repeat=20):
+    """Run a queryset `repeat` times after one warm-up run; returns (query plan, median milliseconds)."""
+    plan = explain(queryset, label)
+    list(queryset.all())  # warm up the page cache
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    return plan, statistics.median(timings)
+
+
+def index_benchmark(workers=200, days=7300, repeat=20):
+    """Compare the Assignment lookups with and without the Meta.indexes on a synthetic history.
+
+    The history is generated, measured, and then rolled back, so the
+    database is left unchanged. The indexes are dropped inside the same
+    transaction for the baseline run.
+
+    Returns (number of rows, [{name, indexed_plan, indexed_ms, baseline_plan, baseline_ms}]).
+    """
+    results = []
+    with transaction.atomic():
+        created, start_date, end_date = generate_history(workers=workers, days=days)
+        rows = Assignment.objects.count()
+        worker = created[len(created) // 2]
+        day = start_date + timedelta(days=days // 2)
+
+        # Refresh planner statistics for the new rows
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        for name, queryset in lookup_queries(worker, day):
+            plan, ms = measure(queryset, 'indexed', repeat)
+            results.append({'name': name, 'indexed_plan': plan, 'indexed_ms': ms})
+
+        # The schema editor can't be entered inside a transaction on SQLite; only its SQL is used
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for index in Assignment._meta.indexes:
+                cursor.execute(str(index.remove_sql(Assignment, editor)))
+
+        for result, (_, queryset) in zip(results, lookup_queries(worker, day)):
+            result['baseline_plan'], result['baseline_ms'] = measure(queryset, 'baseline', repeat)
+
+        transaction.set_rollback(True)
+
+    return rows, results
+
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def summarize(timings, query_counts=None):
+    """Latency percentiles (ms) and query counts (when given) of one benchmark case."""
+    ordered = sorted(timings)
+    summary = {
+        'runs': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+    for percentile in PERCENTILES:
+        index = min(len(ordered) - 1, round(percentile / 100 * (len(ordered) - 1)))
+        summary[f'p{percentile}_ms'] = round(ordered[index], 3)
+    if query_counts:
+        summary['queries'] = {
+            'min': min(query_counts),
+            'max': max(query_counts),
+            'mean': round(statistics.fmean(query_counts), 2),
+        }
+    return summary
+
+
+class HotPathBenchmark:
+    """Times the scheduling hot paths against a synthetic history.
+
+    Views are called directly with RequestFactory requests (no middleware),
+    so the numbers cover the view, its queries and template rendering.
+    Each case runs `iterations` times; every run's wall time and query count
+    is recorded.
+    """
+
+    CASES = [
+        'calendar_view',
+        'assign_worker',
+        'remove_assignment',
+        'move_to_end',
+        'move_to_front',
+        'initialize_queues',
+    ]
+
+    def __init__(self, workers, start_date, end_date, iterations=50, seed=0):
+        self.workers = workers
+        self.start_date = start_date
+        self.end_date = end_date
+        self.iterations = iterations
+        self.random = random.Random(seed)
+        self.factory = RequestFactory()
+        self.assigned = []
+
+    def _request(self, method, path, data=None):
+        request = getattr(self.factory, method)(path, data or {})
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        return request
+
+    def _random_date(self):
+        return self.start_date + timedelta(days=self.random.randrange((self.end_date - self.start_date).days + 1))
+
+    def calendar_view(self, iteration):
+        selected_date = self._random_date().isoformat()
+        views.calendar_view(self._request('get', reverse('assignments:calendar'), {'date': selected_date}))
+
+    def assign_worker(self, iteration):
+        # Future dates are empty, so each run assigns one night guard without collisions
+        worker = self.random.choice(self.workers)
+        slot_date = self.end_date + timedelta(days=iteration + 1)
+        views.assign_worker(self._request('post', reverse('assignments:assign_worker'), {
+            'date': slot_date.isoformat(),
+            'task_type': 'guard_duty',
+            'time_slot': '01:00-03:00',
+            'worker_id': worker.id,
+        }))
+        self.assigned.append((slot_date, worker.id))
+
+    def remove_assignment(self, iteration):
+        slot_date, worker_id = self.assigned[iteration]
+        assignment_id = Assignment.objects.filter(
+            date=slot_date, worker_id=worker_id, task_type='guard_duty'
+        ).values_list('id', flat=True).first()
+        views.remove_assignment(
+            self._request('post', reverse('assignments:remove_assignment', args=[assignment_id])),
+            assignment_id,
+        )
+
+    def move_to_end(self, iteration):
+        TaskQueue.move_to_end(self.random.choice(self.workers), 'guard_duty')
+
+    def move_to_front(self, iteration):
+        TaskQueue.move_to_front(self.random.choice(self.workers), 'kitchen')
+
+    def initialize_queues(self, iteration):
+        call_command('initialize_queues', stdout=StringIO())
+
+    def _setup_initialize_queues(self, iteration):
+        # Give the command some work: drop the queue entries of a few workers
+        TaskQueue.objects.filter(worker__in=self.random.sample(self.workers, 5)).delete()
+
+    def _setup_remove_assignment(self, iteration):
+        # Removes undo the assign_worker runs; assign first when that case was skipped
+        if iteration >= len(self.assigned):
+            self.assign_worker(iteration)
+
+    def run_case(self, name):
+        setup = getattr(self, f'_setup_{name}', None)
+        case = getattr(self, name)
+        timings, query_counts = [], []
+        for iteration in range(self.iterations):
+            if setup:
+                setup(iteration)
+            # The debug query log is capped; start each run empty so the count stays exact
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                case(iteration)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+        return summarize(timings, query_counts)
+
+    def run(self, cases=None):
+        return {name: self.run_case(name) for name in (cases or self.CASES)}
+
+
+def hot_path_benchmark(workers=300, days=730, iterations=50, cases=None, seed=0):
+    """Generate a synthetic history, time the hot paths and roll everything back.
+
+    Returns a JSON-serializable report:
+    {'meta': {...}, 'results': {case: summary}, 'queue_cache': {hits, misses, hit_ratio}}.
+    """
+    with transaction.atomic():
+        created, start_date, end_date = generate_history(workers=workers, days=days)
+        rows = Assignment.objects.count()
+        benchmark = HotPathBenchmark(created, start_date, end_date, iterations=iterations, seed=seed)
+        queue_cache.reset_stats()
+        results = benchmark.run(cases)
+        cache_stats = queue_cache.stats()
+        # calendar_view cached the synthetic days' fragments
+        fragments.discard(start_date + timedelta(days=offset) for offset in range(days))
+        transaction.set_rollback(True)
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'workers': workers,
+            'days': days,
+            'assignments': rows,
+            'iterations': iterations,
+            'seed': seed,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'results': results,
+        'queue_cache': cache_stats,
+    }
+
+
+def compare_reports(baseline, current):
+    """Ratio of current to baseline p50 latency and mean query count, per case present in both."""
+    comparison = {}
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        comparison[name] = {
+            'p50_ratio': round(result['p50_ms'] / previous['p50_ms'], 2) if previous['p50_ms'] else None,
+            'queries_delta': round(result['queries']['mean'] - previous['queries']['mean'], 2),
+        }
+    return comparison
+
+
+# Sync views and their async ORM versions, requested side by side
+CONCURRENT_CASES = {
+    'calendar_sync': 'assignments:calendar',
+    'calendar_async': 'assignments:calendar_async',
+    'workers_sync': 'workers:list',
+    'workers_async': 'workers:list_async',
+}
+
+
+async def _load(paths, concurrency):
+    """Request every path through the ASGI handler, at most `concurrency` at a time.
+
+    Returns (per-request milliseconds, total wall milliseconds).
+    """
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def fetch(path):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} answered {response.status_code}')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(path) for path in paths))
+    return timings, (time.perf_counter() - started) * 1000
+
+
+def concurrent_benchmark(workers=300, days=730, requests=200, concurrency=10, seed=0):
+    """Compare the sync views with their async ORM versions under concurrent load.
+
+    Every case gets the same `requests` random dates, `concurrency` in
+    flight at a time, through the full ASGI handler and middleware. The
+    day fragments of those dates are dropped before each case so every case
+    starts cold. The synthetic history is rolled back.
+
+    Returns {'meta': {...}, 'results': {case: summary with throughput_rps}}.
+    """
+    results = {}
+    with transaction.atomic():
+        created, start_date, end_date = generate_history(workers=workers, days=days)
+        rng = random.Random(seed)
+        dates = [start_date + timedelta(days=rng.randrange(days)) for _ in range(requests)]
+
+        for name, url_name in CONCURRENT_CASES.items():
+            fragments.invalidate(dates)
+            paths = [f'{reverse(url_name)}?date={day.isoformat()}' for day in dates]
+            # The test client's host, allowed as the test runner does
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                timings, wall_ms = async_to_sync(_load)(paths, concurrency)
+            results[name] = summarize(timings)
+            results[name]['throughput_rps'] = round(len(paths) / wall_ms * 1000, 1)
+
+        fragments.discard(dates)
+        transaction.set_rollback(True)
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'workers': workers,
+            'days': days,
+            'requests': requests,
+            'concurrency': concurrency,
+            'seed': seed,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+
+def profile_requests(paths, repeat=10, workers=None, days=30):
+    """GET each path `repeat` times through the test client with query profiling on.
+
+    Runs against the current database, or with `workers` against a synthetic
+    history of `days` days that is rolled back afterwards. Returns the
+    profiling registry's per-view snapshot (see assignments.profiling).
+    """
+    profiling.registry.reset()
+    with transaction.atomic():
+        if workers:
+            generate_history(workers=workers, days=days)
+        # The client's handler loads the middleware under these settings
+        with override_settings(QUERY_PROFILING=True, ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            for _ in range(repeat):
+                for path in paths:
+                    client.get(path)
+        snapshot = profiling.registry.snapshot()
+        if workers:
+            fragments.discard(date.today() - timedelta(days=offset) for offset in range(days))
+        transaction.set_rollback(True)
+    return snapshot
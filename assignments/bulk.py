@@ -0,0 +1,151 @@
+from collections import defaultdict
+from datetime import date
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from workers.models import Worker
+from . import archive, fragments, metrics, rollups
+from .models import Assignment, TaskQueue
+from .counter_logic import bonus_deltas, guard_slot_rows
+from .counters import apply_counter_deltas, managed_changes
+
+
+TASK_TYPES = [choice[0] for choice in Assignment.TASK_TYPE_CHOICES]
+TIME_SLOTS = [choice[0] for choice in Assignment.TIME_SLOT_CHOICES]
+
+
+def _parse_create(index, item, workers, errors):
+    """Validate one create item and build its (unsaved) Assignment, or record errors."""
+    prefix = f'create[{index}]'
+    if not isinstance(item, dict):
+        errors.append(f'{prefix}: expected an object')
+        return None
+
+    try:
+        assignment_date = date.fromisoformat(item.get('date') or '')
+    except (TypeError, ValueError):
+        errors.append(f'{prefix}: invalid date {item.get("date")!r}')
+        return None
+
+    task_type = item.get('task_type')
+    time_slot = item.get('time_slot') or None
+    if task_type not in TASK_TYPES:
+        errors.append(f'{prefix}: invalid task_type {task_type!r}')
+        return None
+    if task_type == 'guard_duty' and time_slot not in TIME_SLOTS:
+        errors.append(f'{prefix}: guard_duty needs a valid time_slot')
+        return None
+    if task_type != 'guard_duty' and time_slot:
+        errors.append(f'{prefix}: {task_type} is a full-day task and takes no time_slot')
+        return None
+
+    worker = workers.get(item.get('worker_id'))
+    if worker is None:
+        errors.append(f'{prefix}: unknown worker_id {item.get("worker_id")!r}')
+        return None
+
+    # Only JSON booleans: bool() would read the string "false" as True
+    is_commander = item.get('is_commander', False)
+    if not isinstance(is_commander, bool):
+        errors.append(f'{prefix}: is_commander must be true or false, not {is_commander!r}')
+        return None
+
+    return Assignment(
+        date=assignment_date,
+        time_slot=time_slot,
+        task_type=task_type,
+        worker=worker,
+        is_commander=is_commander,
+    )
+
+
+def apply_bulk_changes(creates, removes):
+    """Create and remove many assignments, possibly across several dates, atomically.
+
+    creates is a list of {date, task_type, time_slot, worker_id, is_commander}
+    objects and removes a list of assignment ids. Everything is applied in one
+    transaction with one queue rotation pass per task type (removed workers to
+    the front, assigned workers to the end) and one batched counter update.
+    Raises ValidationError, without changing anything, if any item is invalid.
+
+    Returns the sorted list of affected dates.
+    """
+    if not isinstance(creates, list) or not isinstance(removes, list):
+        raise ValidationError('"create" and "remove" must be lists')
+
+    errors = []
+    worker_ids = [item.get('worker_id') for item in creates if isinstance(item, dict)]
+    workers = Worker.objects.in_bulk([wid for wid in worker_ids if isinstance(wid, int)])
+    new_assignments = []
+    for index, item in enumerate(creates):
+        assignment = _parse_create(index, item, workers, errors)
+        if assignment is not None:
+            new_assignments.append(assignment)
+
+    remove_ids = [rid for rid in removes if isinstance(rid, int)]
+    if len(remove_ids) != len(removes):
+        errors.append('remove: assignment ids must be integers')
+
+    with transaction.atomic():
+        removed = list(Assignment.objects.filter(id__in=remove_ids).select_related('worker'))
+        missing = set(remove_ids) - {assignment.id for assignment in removed}
+        if missing:
+            errors.append(f'remove: unknown assignment ids {sorted(missing)}')
+        if errors:
+            raise ValidationError(errors)
+
+        # Before reading the slots: archived days come back into Assignment
+        archive.restore(a.date for a in new_assignments)
+        dates = {a.date for a in removed} | {a.date for a in new_assignments}
+        slots_before = guard_slot_rows(dates)
+
+        with managed_changes():
+            Assignment.objects.filter(id__in=[a.id for a in removed]).delete()
+        metrics.assignments_changed(metrics.ASSIGNMENTS_REMOVED, removed, source='bulk')
+        try:
+            with transaction.atomic():
+                Assignment.objects.bulk_create(new_assignments)
+        except IntegrityError:
+            raise ValidationError('create: duplicate assignment')
+        metrics.assignments_changed(metrics.ASSIGNMENTS_CREATED, new_assignments, source='bulk')
+        # bulk_create sends no signals; deletes already invalidated and summarized their days
+        fragments.invalidate(a.date for a in new_assignments)
+        rollups.refresh(a.date for a in new_assignments)
+
+        # Guard slots after the changes, derived in memory
+        slots_after = {key: list(rows) for key, rows in slots_before.items()}
+        for assignment in removed:
+            if assignment.task_type == 'guard_duty' and assignment.worker_id:
+                rows = slots_after[(assignment.date, assignment.time_slot)]
+                rows.remove((assignment.worker_id, assignment.worker.department))
+        for assignment in new_assignments:
+            if assignment.task_type == 'guard_duty':
+                slots_after.setdefault((assignment.date, assignment.time_slot), []).append(
+                    (assignment.worker_id, assignment.worker.department)
+                )
+
+        hard_chores = defaultdict(int)
+        outer_partner = defaultdict(int)
+        for assignment in removed:
+            if assignment.worker_id and Assignment.is_night_shift(assignment.task_type, assignment.time_slot):
+                hard_chores[assignment.worker_id] -= 1
+        for assignment in new_assignments:
+            if Assignment.is_night_shift(assignment.task_type, assignment.time_slot):
+                hard_chores[assignment.worker_id] += 1
+        for key, rows in slots_after.items():
+            for worker_id, delta in bonus_deltas(slots_before.get(key, []), rows).items():
+                outer_partner[worker_id] += delta
+
+        apply_counter_deltas(reason='bulk', hard_chores_counter=hard_chores, outer_partner_counter=outer_partner)
+
+        # One rotation pass per task type
+        to_front = defaultdict(list)
+        to_end = defaultdict(list)
+        for assignment in removed:
+            if assignment.worker_id:
+                to_front[assignment.task_type].append(assignment.worker_id)
+        for assignment in new_assignments:
+            to_end[assignment.task_type].append(assignment.worker_id)
+        for task_type in set(to_front) | set(to_end):
+            TaskQueue.bulk_move(task_type, to_front=to_front[task_type], to_end=to_end[task_type])
+
+    return sorted(dates)
@@ -0,0 +1,58 @@
+from collections import defaultdict
+from .models import Assignment
+
+
+def departments_status(rows):
+    """Evaluate one guard slot from (worker_id, department) pairs, in memory.
+
+    Returns (has_different_departments, worker_ids_with_department): the slot
+    earns the multi-department bonus when its workers come from more than one
+    department; workers without a department never take part.
+    """
+    worker_ids = [worker_id for worker_id, department in rows if department]
+    departments = {department for _, department in rows if department}
+    return len(departments) > 1, worker_ids
+
+
+def bonus_deltas(before_rows, after_rows):
+    """Outer partner changes for a guard slot going from before_rows to after_rows.
+
+    Both are (worker_id, department) pairs. Workers who hold the bonus after
+    but not before gain 1; workers who held it before but not after lose 1;
+    workers who keep it are unchanged.
+    """
+    had_bonus, before_ids = departments_status(before_rows)
+    has_bonus, after_ids = departments_status(after_rows)
+    credited_before = set(before_ids) if had_bonus else set()
+    credited_after = set(after_ids) if has_bonus else set()
+
+    deltas = {worker_id: 1 for worker_id in credited_after - credited_before}
+    deltas.update({worker_id: -1 for worker_id in credited_before - credited_after})
+    return deltas
+
+
+def _guard_rows(**filters):
+    """Guard duty (date, time_slot, worker_id, department) rows in a single query."""
+    return Assignment.objects.filter(
+        task_type='guard_duty',
+        time_slot__isnull=False,
+        worker__isnull=False,
+        **filters
+    ).values_list('date', 'time_slot', 'worker_id', 'worker__department')
+
+
+def slot_rows(slot_date, time_slot):
+    """(worker_id, department) pairs of a guard slot's workers, in a single query.
+
+    Pass them to departments_status, or to bonus_deltas with the slot's
+    rows before or after a change.
+    """
+    return [(worker_id, department) for _, _, worker_id, department in _guard_rows(date=slot_date, time_slot=time_slot)]
+
+
+def guard_slot_rows(dates):
+    """Get {(date, time_slot): [(worker_id, department), ...]} for the given dates in one query."""
+    slots = defaultdict(list)
+    for slot_date, time_slot, worker_id, department in _guard_rows(date__in=list(dates)):
+        slots[(slot_date, time_slot)].append((worker_id, department))
+    return slots
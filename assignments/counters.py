@@ -0,0 +1,208 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from django.db.models import Case, F, Max, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from workers.models import Worker
+from . import metrics
+from .counter_logic import bonus_deltas, guard_slot_rows
+from .models import Assignment, CounterEvent, CounterCheckpoint
+
+
+COUNTER_FIELDS = ['hard_chores_counter', 'outer_partner_counter']
+
+# Set while code that applies its own counter changes (assign/remove views, bulk API,
+# archive) writes assignments; the Assignment signal receivers then leave the counters alone
+_managed = ContextVar('counter_changes_managed', default=False)
+
+
+@contextmanager
+def managed_changes():
+    """Mark the assignment writes inside the block as already accounted for in the counters."""
+    token = _managed.set(True)
+    try:
+        yield
+    finally:
+        _managed.reset(token)
+
+
+def changes_managed():
+    return _managed.get()
+
+
+def apply_counter_deltas(reason='assign', assignment_id=None, **deltas):
+    """Apply worker counter changes in a single atomic UPDATE statement.
+
+    Takes one {worker_id: delta} mapping per counter field, e.g.
+    apply_counter_deltas(hard_chores_counter={1: 1}, outer_partner_counter={1: 1, 2: 1}).
+    Counters are computed in SQL (counter = counter + delta), so concurrent
+    changes are not lost, and never go below zero. The change actually
+    applied to each counter is appended to the CounterEvent ledger, keyed
+    to assignment_id when the change comes from a single assignment.
+
+    Returns the number of workers updated.
+    """
+    updates = {}
+    worker_ids = set()
+    requested = {}
+
+    for field_name, field_deltas in deltas.items():
+        if field_name not in COUNTER_FIELDS:
+            raise ValueError(f'Unknown counter field: {field_name}')
+
+        by_delta = defaultdict(list)
+        for worker_id, delta in field_deltas.items():
+            if delta:
+                by_delta[delta].append(worker_id)
+        if not by_delta:
+            continue
+
+        updates[field_name] = Case(
+            *[
+                When(id__in=ids, then=Greatest(F(field_name) + delta, Value(0)))
+                for delta, ids in by_delta.items()
+            ],
+            default=F(field_name),
+        )
+        worker_ids.update(wid for ids in by_delta.values() for wid in ids)
+        requested[field_name] = {wid: delta for wid, delta in field_deltas.items() if delta}
+
+    if not updates:
+        return 0
+
+    with transaction.atomic():
+        # The applied deltas are worked out from these values, so they must be the ones the
+        # UPDATE below changes: FOR UPDATE locks the rows until commit. SQLite has no row
+        # locks, but a transaction that read them cannot write after another one did
+        # (it fails as "database is locked"), so the ledger never records a stale diff.
+        current = {
+            row[0]: dict(zip(COUNTER_FIELDS, row[1:]))
+            for row in Worker.objects.select_for_update().filter(id__in=worker_ids).values_list('id', *COUNTER_FIELDS)
+        }
+        updated = Worker.objects.filter(id__in=worker_ids).update(updated_at=timezone.now(), **updates)
+
+        events = []
+        for field_name, field_deltas in requested.items():
+            for worker_id, delta in field_deltas.items():
+                if worker_id not in current:
+                    continue
+                value = current[worker_id][field_name]
+                applied = max(0, value + delta) - value
+                if applied:
+                    events.append(CounterEvent(
+                        worker_id=worker_id,
+                        assignment_id=assignment_id,
+                        counter=field_name,
+                        delta=applied,
+                        reason=reason,
+                    ))
+        CounterEvent.objects.bulk_create(events)
+        metrics.counters_changed(events)
+
+    return updated
+
+
+def assignment_changed(assignment_id, before, after):
+    """Apply the counter changes of an assignment saved or deleted outside the counter service (admin, shell).
+
+    before and after are the assignment's (date, task_type, time_slot,
+    worker_id, department) before and after the change, None when it was
+    created or deleted. Night shifts move between the workers, and the
+    multi-department bonus of each guard slot involved is diffed from the
+    slot's workers (as stored now, after the change). Recorded in the ledger
+    as adjustments, so rebuild_counters replays them.
+    """
+    hard_chores = defaultdict(int)
+    for row, sign in ((before, -1), (after, 1)):
+        if row and row[3] and Assignment.is_night_shift(row[1], row[2]):
+            hard_chores[row[3]] += sign
+
+    slots = {(row[0], row[2]) for row in (before, after) if row and row[1] == 'guard_duty' and row[2]}
+    outer_partner = defaultdict(int)
+    if slots:
+        current = guard_slot_rows({slot_date for slot_date, _ in slots})
+        for key in slots:
+            after_rows = list(current.get(key, []))
+            before_rows = list(after_rows)
+            if after and after[3] and (after[0], after[2]) == key:
+                stored = next((row for row in before_rows if row[0] == after[3]), None)
+                if stored:
+                    before_rows.remove(stored)
+            if before and before[3] and (before[0], before[2]) == key:
+                before_rows.append((before[3], before[4]))
+            for worker_id, delta in bonus_deltas(before_rows, after_rows).items():
+                outer_partner[worker_id] += delta
+
+    apply_counter_deltas(
+        reason='adjust',
+        assignment_id=assignment_id,
+        hard_chores_counter=hard_chores,
+        outer_partner_counter=outer_partner,
+    )
+
+
+def record_adjustments(worker, previous, reason='adjust'):
+    """Record counter edits made outside the counter service (forms, admin) in the ledger.
+
+    previous is {counter_field: value before the edit}; a new worker passes zeros.
+    """
+    events = []
+    for field_name in COUNTER_FIELDS:
+        delta = getattr(worker, field_name) - previous.get(field_name, 0)
+        if delta:
+            events.append(CounterEvent(worker=worker, counter=field_name, delta=delta, reason=reason))
+    CounterEvent.objects.bulk_create(events)
+
+
+def rebuild_counters(incremental=False):
+    """Recompute every worker's counters from the CounterEvent ledger.
+
+    A full rebuild sums the whole ledger with one GROUP BY query per counter.
+    An incremental rebuild starts from the latest CounterCheckpoint and only
+    sums the events after it. Either way, workers whose stored counters
+    differ are corrected with a bulk update and a new checkpoint is saved.
+
+    Returns (number of workers corrected, new checkpoint).
+    """
+    with transaction.atomic():
+        last_event_id = CounterEvent.objects.aggregate(Max('id'))['id__max'] or 0
+        workers = {worker.id: worker for worker in Worker.objects.only('id', *COUNTER_FIELDS)}
+
+        checkpoint = CounterCheckpoint.objects.first() if incremental else None
+        since_event_id = checkpoint.last_event_id if checkpoint else 0
+
+        totals = {}
+        for worker_id in workers:
+            base = checkpoint.totals.get(str(worker_id), {}) if checkpoint else {}
+            totals[worker_id] = {field_name: base.get(field_name, 0) for field_name in COUNTER_FIELDS}
+
+        for field_name in COUNTER_FIELDS:
+            rows = (
+                CounterEvent.objects
+                .filter(counter=field_name, id__gt=since_event_id, id__lte=last_event_id)
+                .values('worker_id')
+                .annotate(total=Sum('delta'))
+                .values_list('worker_id', 'total')
+            )
+            for worker_id, total in rows:
+                if worker_id in totals:
+                    totals[worker_id][field_name] += total
+
+        now = timezone.now()
+        changed = []
+        for worker_id, worker in workers.items():
+            if any(getattr(worker, f) != totals[worker_id][f] for f in COUNTER_FIELDS):
+                for field_name in COUNTER_FIELDS:
+                    setattr(worker, field_name, totals[worker_id][field_name])
+                worker.updated_at = now
+                changed.append(worker)
+        Worker.objects.bulk_update(changed, COUNTER_FIELDS + ['updated_at'])
+
+        new_checkpoint = CounterCheckpoint.objects.create(
+            last_event_id=last_event_id,
+            totals={str(worker_id): worker_totals for worker_id, worker_totals in totals.items()},
+        )
+
+    return len(changed), new_checkpoint
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+# Open calendars subscribe to their date's channel and to the queue channel
+QUEUES_CHANNEL = 'queues'
+
+
+def day_channel(selected_date):
+    return f'day:{selected_date.isoformat()}'
+
+
+class Subscription:
+    """One listener's queue of events, read from its own event loop.
+
+    Publishers may run in any thread (sync views run in a thread pool under
+    ASGI); events are handed to the listener's loop thread-safely. A listener
+    that falls more than `maxsize` events behind gets a single 'overflow'
+    event instead of the rest, and should reload.
+    """
+
+    def __init__(self, broker, channels, maxsize=100):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            # Make room so the overflow notice itself gets through
+            self.queue.get_nowait()
+            event = {'type': 'overflow'}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class InProcessBroker:
+    """Fan-out pub/sub within one process.
+
+    Enough for a single ASGI server process, and what tests use. A
+    deployment with several processes needs a broker shared between them
+    (e.g. Redis pub/sub) with the same subscribe/publish methods, selected
+    with the ASSIGNMENT_EVENTS_BROKER setting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, *channels):
+        """Subscribe to channels; must be called from a running event loop."""
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].discard(subscription)
+                if not self._subscriptions[channel]:
+                    del self._subscriptions[channel]
+
+    def publish(self, channel, event):
+        """Send an event to every subscriber of a channel. Returns the number of subscribers."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # The listener's event loop is gone
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker (settings.ASSIGNMENT_EVENTS_BROKER, InProcessBroker by default)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'ASSIGNMENT_EVENTS_BROKER', 'assignments.events.InProcessBroker')
+            _broker = import_string(path)()
+        return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'ASSIGNMENT_EVENTS_BROKER':
+        with _broker_lock:
+            _broker = None
+
+
+def publish_days(dates):
+    """Tell open calendars of these dates that their assignments changed, once the transaction commits."""
+    dates = sorted(set(d for d in dates if d))
+    if not dates:
+        return
+
+    def send():
+        broker = get_broker()
+        for selected_date in dates:
+            broker.publish(day_channel(selected_date), {'type': 'assignment', 'date': selected_date.isoformat()})
+
+    transaction.on_commit(send)
+
+
+def publish_queues(task_types):
+    """Tell open calendars that these task queues changed, once the transaction commits."""
+    task_types = sorted(set(task_types))
+    transaction.on_commit(
+        lambda: get_broker().publish(QUEUES_CHANNEL, {'type': 'queue', 'task_types': task_types})
+    )
+
+
+def format_sse(event):
+    """An event as a server-sent events message, its type as the event name."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(selected_date, heartbeat=15, max_seconds=600):
+    """Server-sent events of a date's assignment changes and of all queue changes.
+
+    Starts with a 'ready' event and sends a comment line every `heartbeat`
+    idle seconds to keep proxies from closing the connection. Ends after
+    `max_seconds` (or an overflow); EventSource then reconnects by itself,
+    which also bounds how long a stream lingers after its client left.
+    """
+    async with get_broker().subscribe(day_channel(selected_date), QUEUES_CHANNEL) as subscription:
+        yield 'retry: 3000\n\n'
+        yield format_sse({'type': 'ready', 'date': selected_date.isoformat()})
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            event = await subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(event)
+            if event['type'] == 'overflow':
+                break
@@ -0,0 +1,159 @@
+from django.core.cache import cache
+from django.utils import timezone
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from . import events, metrics
+from .models import Assignment, DayVersion
+
+
+# Fragments are shared between users, so they are cached with this in place of
+# the CSRF token and each response gets its own token substituted in
+CSRF_PLACEHOLDER = 'csrf-token-placeholder'
+
+TEMPLATES = {
+    'guard_table': 'assignments/partials/guard_table.html',
+    'full_day_tasks': 'assignments/partials/full_day_tasks.html',
+}
+
+# One guard slot row or one full-day task card, re-rendered alone after an assign/remove
+SLOT_TEMPLATES = {
+    'guard_duty': 'assignments/partials/guard_slot_row.html',
+    'kitchen': 'assignments/partials/kitchen_card.html',
+    'patrol_a': 'assignments/partials/patrol_a_card.html',
+    'patrol_b': 'assignments/partials/patrol_b_card.html',
+}
+
+
+# Entries of replaced versions are never read again; this lets them expire
+TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(selected_date, changed_at):
+    version = changed_at.timestamp() if changed_at else 0
+    return f'calendar-day:{selected_date.isoformat()}:{version}'
+
+
+def _versions(selected_date):
+    return DayVersion.objects.filter(date=selected_date).values_list('changed_at', flat=True)
+
+
+def _current_key(selected_date):
+    return _cache_key(selected_date, _versions(selected_date).first())
+
+
+def lookup(selected_date):
+    """(cache key, cached {fragment name: html} or None) of a date, in one query for its version.
+
+    Pass the key on to render(): the version is read before the day's
+    assignments, so fragments rendered from data that changed meanwhile are
+    stored under a key that is already out of date.
+    """
+    key = _current_key(selected_date)
+    return key, _counted(cache.get(key))
+
+
+async def alookup(selected_date):
+    """Async version of lookup."""
+    key = _cache_key(selected_date, await _versions(selected_date).afirst())
+    return key, _counted(await cache.aget(key))
+
+
+def get_cached(selected_date):
+    """Cached {fragment name: html} of a date (with the CSRF placeholder), or None."""
+    return lookup(selected_date)[1]
+
+
+def _counted(fragments):
+    metrics.cache_lookup('calendar_day', hits=int(fragments is not None), misses=int(fragments is None))
+    return fragments
+
+
+def render(day, key=None):
+    """Render and cache (under key, from lookup()) the guard table and full-day task cards of a DaySchedule.
+
+    Archived days are rendered read-only and not cached: nothing invalidates
+    them when a worker they show is renamed, and old days are rarely viewed.
+    """
+    context = {
+        'selected_date': day.date,
+        'archived': day.archived,
+        'schedule_data': day.schedule_data,
+        'kitchen_workers': day.full_day_workers('kitchen'),
+        'patrol_a_workers': day.full_day_workers('patrol_a'),
+        'patrol_b_workers': day.full_day_workers('patrol_b'),
+        'csrf_token': CSRF_PLACEHOLDER,
+    }
+    fragments = {name: str(render_to_string(template, context)) for name, template in TEMPLATES.items()}
+    if not day.archived:
+        cache.set(key or _current_key(day.date), fragments, timeout=TIMEOUT)
+    return fragments
+
+
+def for_request(fragments, request):
+    """Fragments ready to embed in a response: the request's CSRF token filled in."""
+    token = get_token(request)
+    return {name: mark_safe(html.replace(CSRF_PLACEHOLDER, token)) for name, html in fragments.items()}
+
+
+def slot_element_id(task_type, time_slot):
+    """DOM id of the element rendered by render_slot (set in the slot templates)."""
+    if task_type == 'guard_duty':
+        return f'guard-slot-{time_slot}'
+    return f'task-card-{task_type}'
+
+
+def render_slot(request, selected_date, task_type, time_slot):
+    """Render one guard slot row or full-day task card of a date from a single query.
+
+    Rendered with the request, so its forms carry the request's own CSRF token.
+    """
+    assignments = list(
+        Assignment.objects.filter(date=selected_date, task_type=task_type, time_slot=time_slot)
+        .select_related('worker')
+        .order_by('id')
+    )
+    context = {'selected_date': selected_date}
+    if task_type == 'guard_duty':
+        context['slot'] = {
+            'time_slot': time_slot,
+            'guard_workers': assignments,
+            'required_workers': Assignment.get_required_workers_for_slot(time_slot),
+        }
+    else:
+        context['assignments'] = assignments
+    return render_to_string(SLOT_TEMPLATES[task_type], context, request=request)
+
+
+def invalidate(dates):
+    """Mark the cached fragments of the given dates as stale and notify their open calendars.
+
+    One upsert of the dates' DayVersion rows, committed with the change
+    itself, so every process stops reading the old fragments at once
+    whatever cache backend it uses.
+    """
+    dates = {selected_date for selected_date in dates if selected_date}
+    if not dates:
+        return
+    now = timezone.now()
+    DayVersion.objects.bulk_create(
+        [DayVersion(date=selected_date, changed_at=now) for selected_date in dates],
+        update_conflicts=True, unique_fields=['date'], update_fields=['changed_at'],
+    )
+    events.publish_days(dates)
+
+
+def discard(dates):
+    """Delete the cached fragments of the given dates, under their current and unversioned keys.
+
+    For data that is about to be rolled back (benchmarks): invalidate() is
+    rolled back with it, and the dates' fragments would be served again.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+    versions = DayVersion.objects.filter(date__in=dates).values_list('date', 'changed_at')
+    cache.delete_many(
+        [_cache_key(selected_date, None) for selected_date in dates]
+        + [_cache_key(selected_date, changed_at) for selected_date, changed_at in versions]
+    )
@@ -0,0 +1,52 @@
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from assignments.archive import archive_before, default_cutoff
+from assignments.models import Assignment
+
+
+class Command(BaseCommand):
+    help = 'Move assignments older than the archive horizon into compact ArchivedDay rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help=f'Keep this many days before today (default: ASSIGNMENT_ARCHIVE_AFTER_DAYS, '
+                 f'{settings.ASSIGNMENT_ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument('--before', help='Archive every date before this one (YYYY-MM-DD) instead')
+        parser.add_argument('--batch-size', type=int, default=500, help='Archived days inserted per query')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = date.fromisoformat(options['before'])
+            except ValueError as e:
+                raise CommandError(f'Invalid date: {e}')
+        elif options['days'] is not None:
+            if options['days'] < 0:
+                raise CommandError('--days must be zero or more')
+            cutoff = date.today() - timedelta(days=options['days'])
+        else:
+            cutoff = default_cutoff()
+        if cutoff > date.today():
+            raise CommandError('Only past days can be archived')
+
+        if options['dry_run']:
+            counts = Assignment.objects.filter(date__lt=cutoff).aggregate(
+                days=Count('date', distinct=True), assignments=Count('id')
+            )
+            self.stdout.write(
+                f"Would archive {counts['assignments']} assignments of {counts['days']} days before {cutoff}"
+            )
+            return
+
+        started = time.perf_counter()
+        days, assignments = archive_before(cutoff, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {assignments} assignments of {days} days before {cutoff} in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,24 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from assignments.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailySummary rollups from the assignment history in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD). Defaults to the earliest.')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD). Defaults to the latest.')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start']) if options['start'] else None
+            end_date = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        started = time.perf_counter()
+        days = backfill(start_date, end_date)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Summarized {days} days in {elapsed:.2f}s'))
@@ -0,0 +1,55 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from assignments.benchmarks import HotPathBenchmark, compare_reports, hot_path_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Time the scheduling hot paths on synthetic data and write the results as JSON (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=300, help='Number of synthetic workers')
+        parser.add_argument('--days', type=int, default=730, help='Days of synthetic assignment history')
+        parser.add_argument('--iterations', type=int, default=50, help='Runs per benchmark case')
+        parser.add_argument('--case', action='append', choices=HotPathBenchmark.CASES,
+                            help='Only run this case (repeatable). Defaults to all cases.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for picking workers and dates')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--compare', help='Previous JSON report to compare against')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 20 or options['days'] < 1 or options['iterations'] < 1:
+            raise CommandError('--workers must be at least 20, --days and --iterations at least 1')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        report = hot_path_benchmark(
+            workers=options['workers'],
+            days=options['days'],
+            iterations=options['iterations'],
+            cases=options['case'],
+            seed=options['seed'],
+        )
+        if baseline:
+            report['comparison'] = compare_reports(baseline, report)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        # Human-readable summary on stderr so stdout stays valid JSON
+        for name, result in report['results'].items():
+            line = f"{name:<20} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  queries {result['queries']['mean']:>6}"
+            if baseline and name in report['comparison']:
+                change = report['comparison'][name]
+                line += f"  (p50 x{change['p50_ratio']}, queries {change['queries_delta']:+})"
+            self.stderr.write(line)
@@ -0,0 +1,42 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from assignments.benchmarks import concurrent_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync calendar and worker list with their async ORM versions under concurrent load (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=300, help='Number of synthetic workers')
+        parser.add_argument('--days', type=int, default=730, help='Days of synthetic assignment history')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per case')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at a time')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for picking dates')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 20 or min(options['days'], options['requests'], options['concurrency']) < 1:
+            raise CommandError('--workers must be at least 20, --days, --requests and --concurrency at least 1')
+
+        report = concurrent_benchmark(
+            workers=options['workers'],
+            days=options['days'],
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            seed=options['seed'],
+        )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        # Human-readable summary on stderr so stdout stays valid JSON
+        for name, result in report['results'].items():
+            self.stderr.write(
+                f"{name:<16} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms"
+                f"  {result['throughput_rps']:>7.1f} req/s"
+            )
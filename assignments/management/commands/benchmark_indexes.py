@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from assignments.benchmarks import index_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Show query plans and timings of the Assignment lookups with and without their indexes (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=200, help='Number of synthetic workers')
+        parser.add_argument('--days', type=int, default=7300, help='Days of synthetic history (33 rows a day)')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query; the median is reported')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 20 or options['days'] < 1 or options['repeat'] < 1:
+            raise CommandError('--workers must be at least 20, --days and --repeat at least 1')
+
+        rows, results = index_benchmark(
+            workers=options['workers'], days=options['days'], repeat=options['repeat']
+        )
+
+        self.stdout.write(f'Synthetic history: {rows} assignments\n')
+        self.stdout.write(f'{"query":<16}{"indexed ms":>12}{"no index ms":>13}{"speedup":>9}')
+        for result in results:
+            speedup = result['baseline_ms'] / result['indexed_ms'] if result['indexed_ms'] else 0
+            self.stdout.write(
+                f'{result["name"]:<16}{result["indexed_ms"]:>12.2f}{result["baseline_ms"]:>13.2f}{speedup:>8.1f}x'
+            )
+
+        for result in results:
+            self.stdout.write(f'\n{result["name"]}')
+            self.stdout.write(f'  indexed:  {result["indexed_plan"]}'.replace('\n', '\n            '))
+            self.stdout.write(f'  no index: {result["baseline_plan"]}'.replace('\n', '\n            '))
@@ -0,0 +1,46 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from assignments.roster import RosterGenerator
+
+
+class Command(BaseCommand):
+    help = 'Automatically fill all guard slots and full-day tasks for one or more days from the task queues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='First date to schedule (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--days', type=int, default=1, help='Number of consecutive days to schedule')
+        parser.add_argument('--min-rest-hours', type=int, help='Minimum hours between two guard shifts of a worker')
+        parser.add_argument('--dry-run', action='store_true', help='Show the plan without saving it')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError(f"Invalid date: {options['date']}")
+        
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        
+        generator = RosterGenerator(min_rest_hours=options['min_rest_hours'])
+        plans = generator.generate_range(start_date, options['days'], dry_run=options['dry_run'])
+        
+        # List every assignment for a single day (or with -v 2); otherwise one line per day
+        detailed = options['days'] == 1 or options['verbosity'] >= 2
+        
+        for plan in plans:
+            self.stdout.write(f'\nRoster for {plan.date.isoformat()}: {len(plan)} assignments')
+            if detailed:
+                for assignment in plan.assignments:
+                    worker = generator.workers[assignment.worker_id]
+                    slot = assignment.time_slot or 'full day'
+                    commander = ' (commander)' if assignment.is_commander else ''
+                    self.stdout.write(f'  {assignment.task_type} - {slot}: {worker.name}{commander}')
+            
+            for task_type, time_slot in plan.unfilled:
+                self.stdout.write(self.style.WARNING(f'  {task_type} - {time_slot or "full day"}: no available worker'))
+        
+        total = sum(len(plan) for plan in plans)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'\nDry run: {total} assignments planned, nothing saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\nSuccessfully created {total} assignments'))
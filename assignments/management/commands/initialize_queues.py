@@ -1,5 +1,4 @@
 from django.core.management.base import BaseCommand
-from django.db.models import Max
 from workers.models import Worker
 from assignments.models import TaskQueue
 
@@ -8,33 +7,14 @@ class Command(BaseCommand):
     help = 'Initialize task queues for all workers'
 
     def handle(self, *args, **options):
-        workers = Worker.objects.all()
+        worker_ids = list(Worker.objects.values_list('id', flat=True))
         
-        if not workers.exists():
+        if not worker_ids:
             self.stdout.write(self.style.WARNING('No workers found. Create workers first.'))
             return
         
-        # Get all task types
-        task_types = [choice[0] for choice in TaskQueue.TASK_TYPE_CHOICES]
-        
-        created_count = 0
-        
-        for worker in workers:
-            for task_type in task_types:
-                # Check if queue entry already exists
-                if not TaskQueue.objects.filter(worker=worker, task_type=task_type).exists():
-                    # Get max position for this task
-                    max_position = TaskQueue.objects.filter(task_type=task_type).aggregate(
-                        Max('position')
-                    )['position__max'] or -1
-                    
-                    # Create queue entry at end
-                    TaskQueue.objects.create(
-                        worker=worker,
-                        task_type=task_type,
-                        position=max_position + 1
-                    )
-                    created_count += 1
+        # Missing entries of every worker and task type in one bulk insert
+        created_count = TaskQueue.initialize_workers(worker_ids)
         
         if created_count > 0:
             self.stdout.write(self.style.SUCCESS(
@@ -44,10 +24,12 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS('All queues already initialized'))
         
         # Display current queues
+        queues = {task_type: [] for task_type, _ in TaskQueue.TASK_TYPE_CHOICES}
+        for entry in TaskQueue.objects.select_related('worker').order_by('task_type', 'position'):
+            queues[entry.task_type].append(entry)
+        
         self.stdout.write('\nCurrent Queue Status:')
         for task_type, task_name in TaskQueue.TASK_TYPE_CHOICES:
             self.stdout.write(f'\n{task_name}:')
-            queue = TaskQueue.objects.filter(task_type=task_type).select_related('worker').order_by('position')
-            for entry in queue:
-                self.stdout.write(f'  {entry.position}. {entry.worker.name} ({entry.worker.get_title_display()})')
-
+            for idx, entry in enumerate(queues[task_type]):
+                self.stdout.write(f'  {idx}. {entry.worker.name} ({entry.worker.get_title_display()})')
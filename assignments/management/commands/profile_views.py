@@ -0,0 +1,49 @@
+import json
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from assignments.benchmarks import profile_requests
+
+
+class Command(BaseCommand):
+    help = 'Profile the queries and latency of pages (GET) in this process and report N+1 suspects as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append',
+                            help='Path to request (repeatable). Defaults to today\'s calendar and the worker list.')
+        parser.add_argument('--repeat', type=int, default=10, help='Requests per path')
+        parser.add_argument('--workers', type=int,
+                            help='Profile against a synthetic history of this many workers (rolled back)')
+        parser.add_argument('--days', type=int, default=30, help='Days of synthetic history (with --workers)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['days'] < 1:
+            raise CommandError('--repeat and --days must be at least 1')
+        if options['workers'] is not None and options['workers'] < 20:
+            raise CommandError('--workers must be at least 20')
+
+        paths = options['path'] or [
+            f"{reverse('assignments:calendar')}?date={date.today().isoformat()}",
+            reverse('workers:list'),
+        ]
+        report = profile_requests(paths, repeat=options['repeat'], workers=options['workers'], days=options['days'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Profile report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        # Human-readable summary on stderr so stdout stays valid JSON
+        for name, result in report.items():
+            self.stderr.write(
+                f"{name:<28} p50 {result['wall_ms']['p50']:>8.2f} ms  db {result['db_ms']['mean']:>7.2f} ms"
+                f"  queries {result['queries']['mean']:>6}  duplicates {result['duplicate_queries']['mean']:>5}"
+            )
+            for pattern in result['n_plus_one']:
+                self.stderr.write(self.style.WARNING(
+                    f"  N+1: {pattern['max_repeats']}x at {pattern['location']}: {pattern['sql'][:120]}"
+                ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from assignments.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute worker counters from the counter event ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only replay events since the last checkpoint',
+        )
+
+    def handle(self, *args, **options):
+        changed, checkpoint = rebuild_counters(incremental=options['incremental'])
+        
+        mode = 'Incremental' if options['incremental'] else 'Full'
+        self.stdout.write(f'{mode} rebuild up to event {checkpoint.last_event_id}')
+        
+        if changed:
+            self.stdout.write(self.style.WARNING(f'Corrected counters of {changed} workers'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All counters match the ledger'))
@@ -0,0 +1,257 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from collections import Counter as _Tally
+from asgiref.sync import iscoroutinefunction
+from django.db import transaction
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Seconds; a queue move is a few small queries
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+# Label values that come from the client are kept to these, anything else is counted as OTHER,
+# so a client cannot add series (and memory) without bound
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+OTHER = 'other'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names; one value (or series) per label combination."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            values = sorted(self._values.items())
+            lines.extend(line for key, value in values for line in self._samples(key, value))
+        return lines
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self, key, value):
+        yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series['count'] if series else 0
+
+    def _samples(self, key, series):
+        cumulative = 0
+        for bound, hits in zip((*self.buckets, math.inf), series['buckets']):
+            cumulative += hits
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            yield f'{self.name}_bucket{labels} {_format_value(cumulative)}'
+        labels = _format_labels(self.labelnames, key)
+        yield f'{self.name}_sum{labels} {_format_value(series["sum"])}'
+        yield f'{self.name}_count{labels} {_format_value(series["count"])}'
+
+
+class Registry:
+    """The process's metrics, rendered together in the Prometheus text format.
+
+    Values live in this process's memory: with several server processes each
+    one reports its own, and Prometheus sums them across scrape targets.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'Duplicate metric {metric.name}')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self):
+        return '\n'.join(line for metric in self._metrics.values() for line in metric.render()) + '\n'
+
+
+registry = Registry()
+
+ASSIGNMENTS_CREATED = registry.counter(
+    'assignments_created_total', 'Assignments created, by task type and source (single, bulk, roster)',
+    ['task_type', 'source'],
+)
+ASSIGNMENTS_REMOVED = registry.counter(
+    'assignments_removed_total', 'Assignments removed, by task type and source (single, bulk)',
+    ['task_type', 'source'],
+)
+QUEUE_OPERATION_SECONDS = registry.histogram(
+    'queue_operation_duration_seconds', 'Duration of TaskQueue moves and rebalances, retries included',
+    ['operation', 'task_type'], buckets=FAST_BUCKETS,
+)
+QUEUE_ROWS_WRITTEN = registry.counter(
+    'queue_rows_written_total', 'Queue rows written by TaskQueue moves and rebalances',
+    ['operation', 'task_type'],
+)
+QUEUE_CONFLICTS = registry.counter(
+    'queue_conflicts_total', 'Queue change attempts retried after a concurrent change of the same queue',
+    ['task_type'],
+)
+COUNTER_UPDATES = registry.counter(
+    'worker_counter_updates_total', 'Worker counter changes applied, by counter and reason',
+    ['counter', 'reason'],
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups, by cache (queue, calendar_day) and result (hit, miss)',
+    ['cache', 'result'],
+)
+VIEW_SECONDS = registry.histogram(
+    'view_duration_seconds', 'Latency of the assignments views, by view and HTTP method',
+    ['view', 'method'],
+)
+
+
+def assignments_changed(counter, assignments, source):
+    """Count created or removed assignments per task type once the transaction commits."""
+    # Imported here: models import this module
+    from .models import Assignment
+    task_types = {task_type for task_type, _ in Assignment.TASK_TYPE_CHOICES}
+    by_task_type = _Tally(
+        assignment.task_type if assignment.task_type in task_types else OTHER for assignment in assignments
+    )
+    if not by_task_type:
+        return
+
+    def record():
+        for task_type, amount in by_task_type.items():
+            counter.inc(amount, task_type=task_type, source=source)
+
+    transaction.on_commit(record)
+
+
+def counters_changed(events):
+    """Count applied worker counter changes (CounterEvents) once the transaction commits."""
+    by_counter = _Tally((event.counter, event.reason) for event in events)
+    if not by_counter:
+        return
+
+    def record():
+        for (counter, reason), amount in by_counter.items():
+            COUNTER_UPDATES.inc(amount, counter=counter, reason=reason)
+
+    transaction.on_commit(record)
+
+
+def queue_operation(operation, task_type, started, rows):
+    """Record a finished TaskQueue operation started at time.perf_counter() `started`."""
+    QUEUE_OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation, task_type=task_type)
+    QUEUE_ROWS_WRITTEN.inc(rows, operation=operation, task_type=task_type)
+
+
+def cache_lookup(cache, hits=0, misses=0):
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result='hit')
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result='miss')
+
+
+def _method(request):
+    return request.method if request.method in HTTP_METHODS else OTHER
+
+
+def timed_view(view):
+    """Record a view's latency (sync or async) in VIEW_SECONDS under its function name."""
+    name = view.__name__
+
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                VIEW_SECONDS.observe(time.perf_counter() - started, view=name, method=_method(request))
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                VIEW_SECONDS.observe(time.perf_counter() - started, view=name, method=_method(request))
+
+    return wrapper
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0003_taskqueue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='task_type',
+            field=models.CharField(choices=[('guard_duty', 'שמירה'), ('patrol_a', "סיור א'"), ('patrol_b', "סיור ב'"), ('kitchen', 'מטבח')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='taskqueue',
+            name='position',
+            field=models.IntegerField(default=0, help_text='Queue order key (lowest = first in line)'),
+        ),
+        migrations.AlterField(
+            model_name='taskqueue',
+            name='task_type',
+            field=models.CharField(choices=[('guard_duty', 'שמירה'), ('patrol_a', "סיור א'"), ('patrol_b', "סיור ב'"), ('kitchen', 'מטבח')], max_length=50),
+        ),
+    ]
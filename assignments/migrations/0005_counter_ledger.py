@@ -0,0 +1,60 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_opening_balances(apps, schema_editor):
+    """Seed the ledger with each worker's current counters, so the ledger sums match them."""
+    Worker = apps.get_model('workers', 'Worker')
+    CounterEvent = apps.get_model('assignments', 'CounterEvent')
+    
+    events = []
+    for worker_id, hard_chores, outer_partner in Worker.objects.values_list(
+        'id', 'hard_chores_counter', 'outer_partner_counter'
+    ):
+        if hard_chores:
+            events.append(CounterEvent(worker_id=worker_id, counter='hard_chores_counter', delta=hard_chores, reason='opening'))
+        if outer_partner:
+            events.append(CounterEvent(worker_id=worker_id, counter='outer_partner_counter', delta=outer_partner, reason='opening'))
+    CounterEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0004_worker_department_alter_worker_title'),
+        ('assignments', '0004_alter_assignment_task_type_alter_taskqueue_position_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(help_text='Last CounterEvent id included in the totals')),
+                ('totals', models.JSONField(help_text='{worker_id: {counter: total}}')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-last_event_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CounterEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counter', models.CharField(choices=[('hard_chores_counter', 'משימות קשות'), ('outer_partner_counter', 'שותף חיצוני')], max_length=50)),
+                ('delta', models.IntegerField(help_text='Change actually applied to the counter (after flooring at zero)')),
+                ('reason', models.CharField(choices=[('assign', 'שיבוץ'), ('remove', 'הסרת שיבוץ'), ('roster', 'שיבוץ אוטומטי'), ('adjust', 'עדכון ידני'), ('opening', 'יתרת פתיחה')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('assignment', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='counter_events', to='assignments.assignment')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_events', to='workers.worker')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['counter', 'worker'], name='assignments_counter_e30cb1_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0005_counter_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='counterevent',
+            name='reason',
+            field=models.CharField(choices=[('assign', 'שיבוץ'), ('remove', 'הסרת שיבוץ'), ('roster', 'שיבוץ אוטומטי'), ('bulk', 'עדכון מרוכז'), ('adjust', 'עדכון ידני'), ('opening', 'יתרת פתיחה')], max_length=20),
+        ),
+    ]
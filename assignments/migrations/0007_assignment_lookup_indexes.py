@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0006_counterevent_bulk_reason'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['date', 'task_type', 'time_slot'], name='assignment_date_task_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['worker', 'date'], name='assignment_worker_date_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+TASK_TYPES = ['guard_duty', 'patrol_a', 'patrol_b', 'kitchen']
+
+
+def create_versions(apps, schema_editor):
+    """One version row per task type, so a bump is always a single UPDATE."""
+    QueueVersion = apps.get_model('assignments', 'QueueVersion')
+    QueueVersion.objects.bulk_create([QueueVersion(task_type=task_type) for task_type in TASK_TYPES])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0007_assignment_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueVersion',
+            fields=[
+                ('task_type', models.CharField(choices=[('guard_duty', 'שמירה'), ('patrol_a', "סיור א'"), ('patrol_b', "סיור ב'"), ('kitchen', 'מטבח')], max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
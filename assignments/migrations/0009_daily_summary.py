@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-18 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0008_queue_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('guard_duty', models.PositiveIntegerField(default=0)),
+                ('patrol_a', models.PositiveIntegerField(default=0)),
+                ('patrol_b', models.PositiveIntegerField(default=0)),
+                ('kitchen', models.PositiveIntegerField(default=0)),
+                ('night_shifts', models.PositiveIntegerField(default=0, help_text='Guard assignments in the night shift slots')),
+                ('multi_department_slots', models.PositiveIntegerField(default=0, help_text='Guard slots with workers from more than one department')),
+                ('night_shift_workers', models.JSONField(default=dict, help_text='{worker_id: night shifts}')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'daily summaries',
+                'ordering': ['date'],
+            },
+        ),
+    ]
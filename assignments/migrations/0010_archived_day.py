@@ -0,0 +1,25 @@
+# Generated by Django 4.2.25 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0009_daily_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('assignments', models.JSONField(help_text='[[id, task_type, time_slot, worker_id, is_commander], ...]')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-18 01:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0010_archived_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayVersion',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
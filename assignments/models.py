@@ -1,5 +1,9 @@
-from django.db import models
+import random
+import time
+from django.db import OperationalError, models, transaction
+from django.utils import timezone
 from workers.models import Worker
+from . import events, metrics
 
 
 class Assignment(models.Model):
@@ -27,6 +31,16 @@ class Assignment(models.Model):
         ('05:00-07:00', '05:00-07:00'),
     ]
     
+    # Guard duty slots that count as night shifts (+1 hard chores)
+    NIGHT_SHIFT_SLOTS = ['01:00-03:00', '03:00-05:00']
+    
+    # Number of workers needed per full-day task
+    FULL_DAY_REQUIRED_WORKERS = {
+        'kitchen': 2,
+        'patrol_a': 6,
+        'patrol_b': 6,
+    }
+    
     date = models.DateField()
     time_slot = models.CharField(
         max_length=20, 
@@ -47,6 +61,12 @@ class Assignment(models.Model):
     class Meta:
         ordering = ['date', 'time_slot', 'task_type']
         unique_together = [['date', 'time_slot', 'task_type', 'worker']]
+        indexes = [
+            # Day/range pages and guard slot department checks
+            models.Index(fields=['date', 'task_type', 'time_slot'], name='assignment_date_task_slot_idx'),
+            # Per-worker history (latest assignments, rest gaps)
+            models.Index(fields=['worker', 'date'], name='assignment_worker_date_idx'),
+        ]
     
     def __str__(self):
         worker_name = self.worker.name if self.worker else "Unassigned"
@@ -68,6 +88,15 @@ class Assignment(models.Model):
         """Get the number of required workers for a given time slot."""
         daytime_slots = ['07:00-09:00', '09:00-11:00', '11:00-13:00', '13:00-15:00', '15:00-17:00']
         return 1 if time_slot in daytime_slots else 2
+    
+    @classmethod
+    def is_night_shift(cls, task_type, time_slot):
+        """Check if a task/time slot pair is a night shift guard duty."""
+        return task_type == 'guard_duty' and time_slot in cls.NIGHT_SHIFT_SLOTS
+
+
+class QueueConflict(Exception):
+    """A queue change kept losing to concurrent changes of the same queue."""
 
 
 class TaskQueue(models.Model):
@@ -75,9 +104,15 @@ class TaskQueue(models.Model):
     
     TASK_TYPE_CHOICES = Assignment.TASK_TYPE_CHOICES
     
+    # Positions beyond this (in either direction) trigger a renumbering pass
+    REBALANCE_LIMIT = 1_000_000
+    
+    # Attempts of a queue change that conflicts with concurrent changes before giving up
+    MAX_ATTEMPTS = 5
+    
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='task_queues')
     task_type = models.CharField(max_length=50, choices=TASK_TYPE_CHOICES)
-    position = models.IntegerField(default=0, help_text="Queue position (0 = first in line)")
+    position = models.IntegerField(default=0, help_text="Queue order key (lowest = first in line)")
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -103,89 +138,397 @@ class TaskQueue(models.Model):
     
     @classmethod
     def move_to_end(cls, worker, task_type):
-        """Move a worker to the end of the queue for a specific task."""
-        from django.db import transaction
+        """Move a worker to the end of the queue for a specific task.
         
-        with transaction.atomic():
-            # Get all queue entries for this task, lock them
-            all_entries = list(cls.objects.filter(task_type=task_type).select_for_update().order_by('position'))
-            
-            # Find the worker's current entry
-            worker_queue = None
-            for entry in all_entries:
-                if entry.worker_id == worker.id:
-                    worker_queue = entry
-                    break
-            
-            # If worker not in queue, create entry at end
-            if not worker_queue:
-                max_position = len(all_entries) - 1 if all_entries else -1
-                cls.objects.create(worker=worker, task_type=task_type, position=max_position + 1)
-                return
-            
-            # Remove worker from current position
-            all_entries.remove(worker_queue)
-            
-            # Reorder: assign new sequential positions
-            for idx, entry in enumerate(all_entries):
-                entry.position = idx
-                entry.save()
-            
-            # Put worker at the end
-            worker_queue.position = len(all_entries)
-            worker_queue.save()
+        Positions are an ordering key, not a dense index: the worker takes the
+        slot after the current tail, so only the worker's own row is written.
+        """
+        def change():
+            tail = cls.objects.filter(task_type=task_type).exclude(worker=worker).aggregate(
+                models.Max('position')
+            )['position__max']
+            position = tail + 1 if tail is not None else 0
+            cls._place(worker, task_type, position)
+            return position
+        
+        started = time.perf_counter()
+        position = cls._optimistic([task_type], change)
+        metrics.queue_operation('move_to_end', task_type, started, rows=1)
+        cls._rebalance_if_needed(task_type, position)
     
     @classmethod
     def move_to_front(cls, worker, task_type):
-        """Move a worker to the front (position 0) of the queue for a specific task."""
-        from django.db import transaction
+        """Move a worker to the front of the queue for a specific task.
         
-        with transaction.atomic():
-            # Get all queue entries for this task, lock them
-            all_entries = list(cls.objects.filter(task_type=task_type).select_for_update().order_by('position'))
-            
-            # Find the worker's current entry
-            worker_queue = None
-            for entry in all_entries:
-                if entry.worker_id == worker.id:
-                    worker_queue = entry
-                    break
-            
-            # If worker not in queue, create entry at front
-            if not worker_queue:
-                # Shift everyone down
-                for entry in all_entries:
-                    entry.position += 1
-                    entry.save()
-                cls.objects.create(worker=worker, task_type=task_type, position=0)
-                return
+        The worker takes the slot before the current head (positions may go
+        negative), so only the worker's own row is written.
+        """
+        def change():
+            head = cls.objects.filter(task_type=task_type).exclude(worker=worker).aggregate(
+                models.Min('position')
+            )['position__min']
+            position = head - 1 if head is not None else 0
+            cls._place(worker, task_type, position)
+            return position
+        
+        started = time.perf_counter()
+        position = cls._optimistic([task_type], change)
+        metrics.queue_operation('move_to_front', task_type, started, rows=1)
+        cls._rebalance_if_needed(task_type, position)
+    
+    @classmethod
+    def _place(cls, worker, task_type, position):
+        """Write a worker's queue position, creating the entry if missing."""
+        updated = cls.objects.filter(worker=worker, task_type=task_type).update(
+            position=position, updated_at=timezone.now()
+        )
+        if not updated:
+            # bulk_create: no post_save, the caller bumps the version itself
+            cls.objects.bulk_create([cls(worker=worker, task_type=task_type, position=position)])
+    
+    @classmethod
+    def _rebalance_if_needed(cls, task_type, *positions):
+        # Positions drift by one per move; renumber on the rare occasion they grow large
+        if max(abs(position) for position in positions) >= cls.REBALANCE_LIMIT:
+            cls.rebalance(task_type)
+    
+    @classmethod
+    def _optimistic(cls, task_types, change, expected=None):
+        """Run a read-then-write queue change with optimistic concurrency control.
+        
+        The queues' versions are read first and bumped last with a
+        compare-and-swap; when another change of the same queues committed in
+        between, this attempt is rolled back and retried with fresh data, up
+        to MAX_ATTEMPTS times (then QueueConflict). SQLite reports the same
+        race as "database is locked" once this transaction's snapshot is
+        stale; that is retried too when this is the outermost transaction.
+        Nothing is locked while the change reads, so readers never wait.
+        
+        expected ({task_type: version}, from versions()) is for changes
+        planned from queues read earlier: the swap is checked against those
+        versions, and a conflict is raised at once since retrying would
+        replay the same stale plan.
+        
+        Returns what change() returns.
+        """
+        outermost = not transaction.get_connection().in_atomic_block
+        attempts = 1 if expected is not None else cls.MAX_ATTEMPTS
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    if expected is not None:
+                        versions = {task_type: expected[task_type] for task_type in task_types if task_type in expected}
+                    else:
+                        versions = dict(
+                            QueueVersion.objects.filter(task_type__in=task_types).values_list('task_type', 'version')
+                        )
+                    result = change()
+                    cls._swap_versions(task_types, versions)
+                    return result
+            except QueueConflict:
+                pass
+            except OperationalError as e:
+                if not outermost or 'locked' not in str(e):
+                    raise
+            for task_type in task_types:
+                metrics.QUEUE_CONFLICTS.inc(task_type=task_type)
+            if expected is not None:
+                raise QueueConflict(f'{", ".join(task_types)} queue changed since it was read')
+            # Back off a little (randomized) so the competing changes spread out
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+        raise QueueConflict(f'{", ".join(task_types)} queue changed concurrently {cls.MAX_ATTEMPTS} times in a row')
+    
+    @classmethod
+    def _swap_versions(cls, task_types, versions):
+        """Bump the queue versions only if they are still the ones read; QueueConflict otherwise."""
+        missing = [task_type for task_type in task_types if task_type not in versions]
+        if missing:
+            cls.bump_version(*missing)
+        if not versions:
+            return
+        
+        expected = models.Q()
+        for task_type, version in versions.items():
+            expected |= models.Q(task_type=task_type, version=version)
+        updated = QueueVersion.objects.filter(expected).update(
+            version=models.F('version') + 1, changed_at=timezone.now()
+        )
+        if updated < len(versions):
+            raise QueueConflict(f'{", ".join(versions)} queue changed concurrently')
+        events.publish_queues(list(versions))
+    
+    @classmethod
+    def versions(cls):
+        """{task_type: version} of every queue, to plan changes from and pass back as expected versions."""
+        return dict(QueueVersion.objects.values_list('task_type', 'version'))
+    
+    @classmethod
+    def bulk_move(cls, task_type, to_front=(), to_end=(), expected=None):
+        """Apply several queue moves for one task type in a single pass.
+        
+        Equivalent to calling move_to_front for each worker in to_front, then
+        move_to_end for each worker in to_end, but only the moved rows are
+        written, with one bulk update. With expected (versions()), raises
+        QueueConflict if the queue changed since those versions were read.
+        """
+        # Replay the moves on the moved workers only: later moves win
+        front, end = [], []
+        for worker_id in to_front:
+            for moves in (front, end):
+                if worker_id in moves:
+                    moves.remove(worker_id)
+            front.insert(0, worker_id)
+        for worker_id in to_end:
+            for moves in (front, end):
+                if worker_id in moves:
+                    moves.remove(worker_id)
+            end.append(worker_id)
+        if not front and not end:
+            return
+        
+        def change():
+            bounds = cls.objects.filter(task_type=task_type).exclude(worker_id__in=front + end).aggregate(
+                head=models.Min('position'), tail=models.Max('position')
+            )
+            head = bounds['head'] if bounds['head'] is not None else 0
+            tail = bounds['tail'] if bounds['tail'] is not None else head - 1
             
-            # Remove worker from current position
-            all_entries.remove(worker_queue)
+            positions = {worker_id: head - len(front) + idx for idx, worker_id in enumerate(front)}
+            positions.update({worker_id: tail + 1 + idx for idx, worker_id in enumerate(end)})
             
-            # Reorder: assign new sequential positions starting from 1
-            for idx, entry in enumerate(all_entries):
-                entry.position = idx + 1
-                entry.save()
+            now = timezone.now()
+            entries = list(cls.objects.filter(task_type=task_type, worker_id__in=positions))
+            for entry in entries:
+                entry.position = positions.pop(entry.worker_id)
+                entry.updated_at = now
+            cls.objects.bulk_update(entries, ['position', 'updated_at'])
             
-            # Put worker at the front (position 0)
-            worker_queue.position = 0
-            worker_queue.save()
+            # Workers without a queue entry yet
+            cls.objects.bulk_create([
+                cls(worker_id=worker_id, task_type=task_type, position=position)
+                for worker_id, position in positions.items()
+            ])
+            return head - len(front), tail + len(end)
+        
+        started = time.perf_counter()
+        bounds = cls._optimistic([task_type], change, expected)
+        metrics.queue_operation('bulk_move', task_type, started, rows=len(front) + len(end))
+        cls._rebalance_if_needed(task_type, *bounds)
+    
+    @classmethod
+    def rebalance(cls, task_type):
+        """Renumber a task's queue to sequential positions (0, 1, 2, ...) keeping its order."""
+        def change():
+            entries = list(cls.objects.filter(task_type=task_type).order_by('position', 'id'))
+            for idx, entry in enumerate(entries):
+                entry.position = idx
+            cls.objects.bulk_update(entries, ['position'])
+            return len(entries)
+        
+        started = time.perf_counter()
+        rows = cls._optimistic([task_type], change)
+        metrics.queue_operation('rebalance', task_type, started, rows=rows)
     
     @classmethod
     def initialize_for_worker(cls, worker):
         """Initialize queue entries for a new worker across all task types."""
-        task_types = [choice[0] for choice in cls.TASK_TYPE_CHOICES]
+        return cls.initialize_workers([worker.id])
+    
+    @classmethod
+    def initialize_workers(cls, worker_ids):
+        """Append workers to the end of every task queue they are missing from.
         
-        for task_type in task_types:
-            # Get max position for this task
-            max_position = cls.objects.filter(task_type=task_type).aggregate(
-                models.Max('position')
-            )['position__max'] or -1
-            
-            # Create queue entry at end
-            cls.objects.get_or_create(
-                worker=worker,
-                task_type=task_type,
-                defaults={'position': max_position + 1}
+        One query for the workers' existing entries, one for the current tail
+        of every queue and one bulk insert, however many workers and task
+        types there are. Workers join in the given order.
+        
+        Returns the number of entries created.
+        """
+        worker_ids = list(dict.fromkeys(worker_ids))
+        if not worker_ids:
+            return 0
+        
+        existing = set(
+            cls.objects.filter(worker_id__in=worker_ids).order_by().values_list('worker_id', 'task_type')
+        )
+        tails = dict(
+            cls.objects.values('task_type').annotate(tail=models.Max('position')).values_list('task_type', 'tail')
+        )
+        
+        entries = []
+        for task_type, _ in cls.TASK_TYPE_CHOICES:
+            tail = tails.get(task_type)
+            position = tail + 1 if tail is not None else 0
+            for worker_id in worker_ids:
+                if (worker_id, task_type) not in existing:
+                    entries.append(cls(worker_id=worker_id, task_type=task_type, position=position))
+                    position += 1
+        
+        # A concurrent initializer may have added some entries meanwhile; keep theirs
+        cls.objects.bulk_create(entries, ignore_conflicts=True)
+        if entries:
+            cls.bump_version(*{entry.task_type for entry in entries})
+        return len(entries)
+    
+    @classmethod
+    def bump_version(cls, *task_types):
+        """Mark the queues of the given task types (all when none given) as changed.
+        
+        Every write to queue positions goes through here, so cached queue
+        state is never served once it is out of date, and open calendars
+        are told (assignments.events).
+        """
+        task_types = list(task_types) or [choice[0] for choice in cls.TASK_TYPE_CHOICES]
+        now = timezone.now()
+        updated = QueueVersion.objects.filter(task_type__in=task_types).update(
+            version=models.F('version') + 1, changed_at=now
+        )
+        if updated < len(task_types):
+            QueueVersion.objects.bulk_create(
+                [QueueVersion(task_type=task_type, version=1, changed_at=now) for task_type in task_types],
+                ignore_conflicts=True,
             )
+        events.publish_queues(task_types)
+
+
+class QueueVersion(models.Model):
+    """Per-task-type version of the queue state, bumped on every queue change.
+    
+    Cached queue reads (assignments.queue_cache) are keyed by it. It lives in
+    the database so every process sees a bump, and it changes in the same
+    transaction as the positions it describes.
+    """
+    
+    task_type = models.CharField(max_length=50, choices=TaskQueue.TASK_TYPE_CHOICES, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.get_task_type_display()} v{self.version}"
+
+
+class DayVersion(models.Model):
+    """Version of one date's rendered calendar fragments, changed whenever they go stale.
+    
+    Cached fragments (assignments.fragments) are keyed by it, so a change
+    made by any process is seen by every process and cache. A change is a
+    single upsert setting changed_at, in the same transaction as the change
+    it describes; dates never changed have no row.
+    """
+    
+    date = models.DateField(primary_key=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y} @ {self.changed_at:%d/%m/%Y %H:%M:%S}"
+
+
+class CounterEvent(models.Model):
+    """Append-only ledger entry for a change to one of a worker's counters."""
+    
+    COUNTER_CHOICES = [
+        ('hard_chores_counter', 'משימות קשות'),
+        ('outer_partner_counter', 'שותף חיצוני'),
+    ]
+    
+    REASON_CHOICES = [
+        ('assign', 'שיבוץ'),
+        ('remove', 'הסרת שיבוץ'),
+        ('roster', 'שיבוץ אוטומטי'),
+        ('bulk', 'עדכון מרוכז'),
+        ('adjust', 'עדכון ידני'),
+        ('opening', 'יתרת פתיחה'),
+    ]
+    
+    worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='counter_events')
+    # No DB constraint: events keep the assignment id after the assignment is deleted
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='counter_events',
+    )
+    counter = models.CharField(max_length=50, choices=COUNTER_CHOICES)
+    delta = models.IntegerField(help_text="Change actually applied to the counter (after flooring at zero)")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['counter', 'worker']),
+        ]
+    
+    def __str__(self):
+        return f"{self.worker.name} - {self.get_counter_display()} {self.delta:+d} ({self.get_reason_display()})"
+
+
+class CounterCheckpoint(models.Model):
+    """Snapshot of every worker's ledger totals up to an event, for incremental rebuilds."""
+    
+    last_event_id = models.BigIntegerField(help_text="Last CounterEvent id included in the totals")
+    totals = models.JSONField(help_text="{worker_id: {counter: total}}")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-last_event_id']
+    
+    def __str__(self):
+        return f"Checkpoint @ event {self.last_event_id} ({self.created_at:%d/%m/%Y %H:%M})"
+
+
+class DailySummary(models.Model):
+    """Rollup of one day's assignments, for history reports that should not scan Assignment rows.
+    
+    Kept current by assignments.rollups whenever the day's assignments
+    change; days without assignments have no row.
+    """
+    
+    date = models.DateField(unique=True)
+    guard_duty = models.PositiveIntegerField(default=0)
+    patrol_a = models.PositiveIntegerField(default=0)
+    patrol_b = models.PositiveIntegerField(default=0)
+    kitchen = models.PositiveIntegerField(default=0)
+    night_shifts = models.PositiveIntegerField(default=0, help_text="Guard assignments in the night shift slots")
+    multi_department_slots = models.PositiveIntegerField(
+        default=0, help_text="Guard slots with workers from more than one department"
+    )
+    night_shift_workers = models.JSONField(default=dict, help_text="{worker_id: night shifts}")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    TASK_FIELDS = [task_type for task_type, _ in Assignment.TASK_TYPE_CHOICES]
+    
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'daily summaries'
+    
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y}: {self.total} assignments, {self.night_shifts} night shifts"
+    
+    @property
+    def total(self):
+        return sum(getattr(self, field) for field in self.TASK_FIELDS)
+
+
+class ArchivedDay(models.Model):
+    """The assignments of one day moved out of Assignment, compacted into a single row.
+    
+    Written by assignments.archive (archive_assignments command); the day's
+    DailySummary stays, and the calendar reads the day from here when
+    Assignment has nothing for it.
+    """
+    
+    # Order of the values in each row of `assignments`
+    ROW_FIELDS = ['id', 'task_type', 'time_slot', 'worker_id', 'is_commander']
+    
+    date = models.DateField(unique=True)
+    assignments = models.JSONField(help_text="[[id, task_type, time_slot, worker_id, is_commander], ...]")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y}: {len(self.assignments)} archived assignments"
@@ -0,0 +1,227 @@
+import os
+import statistics
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# The profile of the request being handled; copied into the threads that
+# sync_to_async runs ORM calls in, so async views are profiled too
+_current = ContextVar('query_profile', default=None)
+
+# Distinct repeated statements remembered per view
+MAX_PATTERNS = 50
+
+
+def _repeat_threshold():
+    return getattr(settings, 'QUERY_PROFILING_REPEATS', 5)
+
+
+def _caller():
+    """'path:line in function' of the innermost project frame (not Django, not this module)."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename
+        if path.startswith(base_dir) and 'site-packages' not in path and path != __file__:
+            return f'{os.path.relpath(path, base_dir)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class RequestProfile:
+    """Queries and timings of one request.
+
+    A statement run `repeat_threshold` times or more with different
+    parameters is the mark of a query in a loop (N+1); where it was run from
+    is taken from the stack when it reaches the threshold. The very same
+    statement and parameters run twice count as duplicates.
+    """
+
+    def __init__(self, repeat_threshold=None):
+        self.repeat_threshold = repeat_threshold or _repeat_threshold()
+        self.started = time.perf_counter()
+        self.wall_time = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+        self.locations = {}
+
+    def record(self, sql, params, many, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql] += 1
+        if not many:
+            self.executions[sql, repr(params)] += 1
+        if self.statements[sql] == self.repeat_threshold:
+            self.locations[sql] = _caller()
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+
+    @property
+    def duplicates(self):
+        """Executions beyond the first of identical statement + parameters."""
+        return sum(count - 1 for count in self.executions.values())
+
+    @property
+    def repeated(self):
+        """{sql: executions} of the statements run at least repeat_threshold times."""
+        return {sql: count for sql, count in self.statements.items() if count >= self.repeat_threshold}
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, params, many, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    """Time every query of every connection; a no-op outside a profiled request."""
+    if _execute_wrapper not in connection.execute_wrappers:
+        # First, so connection.execute_wrapper() blocks open around connecting pop their own wrapper
+        connection.execute_wrappers.insert(0, _execute_wrapper)
+
+
+@contextmanager
+def capture(repeat_threshold=None):
+    """Profile the queries run inside the block (in this context); yields the RequestProfile."""
+    profile = RequestProfile(repeat_threshold)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        profile.finish()
+        _current.reset(token)
+
+
+class _ViewStats:
+    def __init__(self, window):
+        self.requests = 0
+        self.samples = deque(maxlen=window)
+        self.patterns = {}
+
+    def add(self, profile):
+        self.requests += 1
+        self.samples.append((profile.wall_time * 1000, profile.db_time * 1000, profile.queries, profile.duplicates))
+        for sql, count in profile.repeated.items():
+            pattern = self.patterns.get(sql)
+            if pattern is None:
+                if len(self.patterns) >= MAX_PATTERNS:
+                    continue
+                pattern = self.patterns[sql] = {'requests': 0, 'max_repeats': 0, 'location': None}
+            pattern['requests'] += 1
+            pattern['max_repeats'] = max(pattern['max_repeats'], count)
+            pattern['location'] = profile.locations.get(sql) or pattern['location']
+
+
+def _percentile(ordered, percentile):
+    return ordered[min(len(ordered) - 1, round(percentile / 100 * (len(ordered) - 1)))]
+
+
+def _summary(values, percentiles=(50, 95)):
+    ordered = sorted(values)
+    summary = {'mean': round(statistics.fmean(ordered), 3), 'max': round(ordered[-1], 3)}
+    for percentile in percentiles:
+        summary[f'p{percentile}'] = round(_percentile(ordered, percentile), 3)
+    return summary
+
+
+class ProfileRegistry:
+    """Rolling per-view aggregates of request profiles, kept in this process's memory.
+
+    Each view keeps its last QUERY_PROFILING_WINDOW requests for the
+    latency and query figures, and its repeated statements (N+1 suspects)
+    since the last reset.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, profile):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats(getattr(settings, 'QUERY_PROFILING_WINDOW', 500))
+            stats.add(profile)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self):
+        """Aggregates of every profiled view as JSON-ready dicts, slowest (p95 wall time) first."""
+        with self._lock:
+            views = {
+                name: (stats.requests, list(stats.samples), [dict(pattern, sql=sql) for sql, pattern in stats.patterns.items()])
+                for name, stats in self._views.items()
+            }
+        report = {}
+        for name, (requests, samples, patterns) in views.items():
+            wall, db, queries, duplicates = zip(*samples)
+            report[name] = {
+                'requests': requests,
+                'window': len(samples),
+                'wall_ms': _summary(wall),
+                'db_ms': _summary(db),
+                'queries': _summary(queries),
+                'duplicate_queries': _summary(duplicates),
+                'n_plus_one': sorted(patterns, key=lambda pattern: (-pattern['requests'], -pattern['max_repeats'])),
+            }
+        return dict(sorted(report.items(), key=lambda item: -item[1]['wall_ms']['p95']))
+
+
+registry = ProfileRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class QueryProfilingMiddleware:
+    """Record each request's query count, DB time, repeated queries and wall time per view.
+
+    Only active with settings.QUERY_PROFILING; list it first in MIDDLEWARE
+    so the wall time covers the other middleware too. Queries a streaming
+    response runs while streaming are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with capture() as profile:
+            response = self.get_response(request)
+        registry.record(_view_name(request), profile)
+        return response
+
+    async def __acall__(self, request):
+        with capture() as profile:
+            response = await self.get_response(request)
+        registry.record(_view_name(request), profile)
+        return response
@@ -0,0 +1,103 @@
+import threading
+from django.core.cache import cache
+from . import metrics
+from .models import QueueVersion, TaskQueue
+
+
+TASK_TYPES = [choice[0] for choice in TaskQueue.TASK_TYPE_CHOICES]
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cache_key(task_type, version, changed_at):
+    # changed_at keeps keys unique when a version number comes back (database restore, test rollback)
+    return f'taskqueue:{task_type}:{version}:{changed_at.timestamp()}'
+
+
+def _record(hits, misses):
+    with _stats_lock:
+        _stats['hits'] += hits
+        _stats['misses'] += misses
+    metrics.cache_lookup('queue', hits, misses)
+
+
+def get_queues(task_types=None):
+    """Get {task_type: [TaskQueue entries in queue order]}, served from the cache when current.
+
+    One query reads the queue versions; only task types whose cached entry
+    is missing or stale are loaded, together, with a second query. Entries
+    come with their worker (select_related).
+    """
+    task_types = list(task_types or TASK_TYPES)
+    keys = {
+        task_type: _cache_key(task_type, version, changed_at)
+        for task_type, version, changed_at in QueueVersion.objects.filter(task_type__in=task_types)
+        .values_list('task_type', 'version', 'changed_at')
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    queues = {}
+    missing = []
+    for task_type in task_types:
+        key = keys.get(task_type)
+        if key in cached:
+            queues[task_type] = cached[key]
+        else:
+            missing.append(task_type)
+    _record(len(task_types) - len(missing), len(missing))
+
+    if missing:
+        loaded = {task_type: [] for task_type in missing}
+        entries = (
+            TaskQueue.objects.filter(task_type__in=missing)
+            .select_related('worker')
+            .order_by('task_type', 'position')
+        )
+        for entry in entries:
+            loaded[entry.task_type].append(entry)
+        # A queue that has never been bumped has no version to key on; it is not cached
+        cache.set_many({keys[task_type]: loaded[task_type] for task_type in missing if task_type in keys})
+        queues.update(loaded)
+
+    return queues
+
+
+def get_queue(task_type):
+    """Get one task type's queue entries in queue order (cached)."""
+    return get_queues([task_type])[task_type]
+
+
+def etag(task_type):
+    """Validator of a task type's queue (changes with its version), or None if it has no version row."""
+    row = QueueVersion.objects.filter(task_type=task_type).values_list('version', 'changed_at').first()
+    if row is None:
+        return None
+    version, changed_at = row
+    return f'{task_type}-{version}-{changed_at.timestamp()}'
+
+
+def serialize(entries):
+    """JSON-serializable queue entries, in queue order."""
+    return [
+        {
+            'position': entry.position,
+            'worker_id': entry.worker_id,
+            'worker_name': entry.worker.name,
+            'worker_title': entry.worker.get_title_display(),
+        }
+        for entry in entries
+    ]
+
+
+def stats():
+    """Hit/miss counts of this process since start (or the last reset), per task type read."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 3) if total else None}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats['hits'] = _stats['misses'] = 0
@@ -0,0 +1,183 @@
+import heapq
+from collections import Counter, defaultdict
+from functools import cached_property
+from itertools import groupby
+from operator import itemgetter
+from django.db import transaction
+from workers.models import Worker
+from .counter_logic import departments_status
+from .models import ArchivedDay, Assignment, DailySummary
+
+
+SUMMARY_FIELDS = DailySummary.TASK_FIELDS + ['night_shifts', 'multi_department_slots', 'night_shift_workers']
+COUNT_FIELDS = DailySummary.TASK_FIELDS + ['night_shifts', 'multi_department_slots']
+
+
+def _assignment_rows(**filters):
+    """(date, task_type, time_slot, worker_id, department) of assignments, in date order, in one query."""
+    return (
+        Assignment.objects.filter(**filters)
+        .order_by('date')
+        .values_list('date', 'task_type', 'time_slot', 'worker_id', 'worker__department')
+    )
+
+
+def _archived_rows(**filters):
+    """The same rows for the assignments of archived days, in date order."""
+    departments = dict(Worker.objects.values_list('id', 'department'))
+    days = ArchivedDay.objects.filter(**filters).order_by('date').values_list('date', 'assignments')
+    for day, rows in days.iterator():
+        for _, task_type, time_slot, worker_id, _ in rows:
+            yield day, task_type, time_slot, worker_id, departments.get(worker_id)
+
+
+def summarize(day, rows):
+    """Build (unsaved) the DailySummary of a day from its assignment rows, in memory."""
+    summary = DailySummary(date=day)
+    guard_slots = defaultdict(list)
+    night_shift_workers = Counter()
+    for _, task_type, time_slot, worker_id, department in rows:
+        setattr(summary, task_type, getattr(summary, task_type) + 1)
+        if Assignment.is_night_shift(task_type, time_slot):
+            summary.night_shifts += 1
+            if worker_id:
+                night_shift_workers[str(worker_id)] += 1
+        if task_type == 'guard_duty' and time_slot and worker_id:
+            guard_slots[time_slot].append((worker_id, department))
+    summary.multi_department_slots = sum(1 for slot in guard_slots.values() if departments_status(slot)[0])
+    summary.night_shift_workers = dict(night_shift_workers)
+    return summary
+
+
+def refresh(dates):
+    """Recompute the summaries of the given dates from their assignments.
+
+    Called wherever a day's assignments change, in the same transaction:
+    one query reads the days' assignments and one upserts their summaries
+    (or deletes those of days left empty), however many assignments and
+    dates there are.
+    """
+    dates = {day for day in dates if day}
+    if not dates:
+        return
+    # Days being written to are never archived (assignments.archive.restore runs first)
+    rows_by_day = defaultdict(list)
+    for row in _assignment_rows(date__in=dates):
+        rows_by_day[row[0]].append(row)
+
+    store(summarize(day, rows) for day, rows in rows_by_day.items())
+    empty = dates - set(rows_by_day)
+    if empty:
+        DailySummary.objects.filter(date__in=empty).delete()
+
+
+def store(summaries):
+    """Insert or replace (by date) DailySummary rows in one query."""
+    summaries = list(summaries)
+    if summaries:
+        DailySummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=SUMMARY_FIELDS + ['updated_at'],
+        )
+
+
+def backfill(start_date=None, end_date=None, batch_size=1000):
+    """Rebuild the summaries of a date range (default: all history) from the assignments in bulk.
+
+    Streams the assignments, archived days included, in date order and
+    inserts the summaries in batches, in one transaction. Returns the number
+    of days summarized.
+    """
+    filters = {}
+    if start_date:
+        filters['date__gte'] = start_date
+    if end_date:
+        filters['date__lte'] = end_date
+
+    days = 0
+    with transaction.atomic():
+        DailySummary.objects.filter(**filters).delete()
+        batch = []
+        rows = heapq.merge(
+            _assignment_rows(**filters).iterator(chunk_size=5000), _archived_rows(**filters), key=itemgetter(0)
+        )
+        for day, day_rows in groupby(rows, key=itemgetter(0)):
+            batch.append(summarize(day, day_rows))
+            if len(batch) >= batch_size:
+                DailySummary.objects.bulk_create(batch)
+                days += len(batch)
+                batch = []
+        DailySummary.objects.bulk_create(batch)
+        days += len(batch)
+    return days
+
+
+class HistoryReport:
+    """Assignment totals, per-day rollups and night shifts per worker for a date range.
+
+    Read from DailySummary only: one query for the days and one for the
+    names of the workers who did night shifts, however many assignments
+    the range holds.
+    """
+
+    # (field, label) of the report's table columns
+    COLUMNS = Assignment.TASK_TYPE_CHOICES + [
+        ('night_shifts', 'משמרות לילה'),
+        ('multi_department_slots', 'עמדות רב-מחלקתיות'),
+    ]
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = list(DailySummary.objects.filter(date__range=(start_date, end_date)))
+
+    @cached_property
+    def totals(self):
+        """{field: sum over the range} for the task types, night shifts and multi-department slots."""
+        totals = {field: sum(getattr(day, field) for day in self.days) for field in COUNT_FIELDS}
+        totals['total'] = sum(totals[field] for field in DailySummary.TASK_FIELDS)
+        return totals
+
+    @property
+    def rows(self):
+        """One row per summarized day: {date, total, counts in COLUMNS order}."""
+        return [
+            {'date': day.date, 'total': day.total, 'counts': [getattr(day, field) for field, _ in self.COLUMNS]}
+            for day in self.days
+        ]
+
+    @property
+    def total_counts(self):
+        """The range's totals in COLUMNS order."""
+        return [self.totals[field] for field, _ in self.COLUMNS]
+
+    @cached_property
+    def night_shifts_by_worker(self):
+        """[(worker or None if deleted, worker_id, night shifts)], most night shifts first."""
+        by_key = Counter()
+        for day in self.days:
+            by_key.update(day.night_shift_workers)
+        counts = {int(worker_id): count for worker_id, count in by_key.items()}
+        workers = Worker.objects.only('id', 'name').in_bulk(list(counts))
+        return [
+            (workers.get(worker_id), worker_id, count)
+            for worker_id, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        ]
+
+    def as_dict(self):
+        """JSON-serializable report."""
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'totals': self.totals,
+            'days': [
+                {'date': day.date.isoformat(), 'total': day.total, **{field: getattr(day, field) for field in COUNT_FIELDS}}
+                for day in self.days
+            ],
+            'night_shifts_by_worker': [
+                {'worker_id': worker_id, 'name': worker.name if worker else None, 'night_shifts': count}
+                for worker, worker_id, count in self.night_shifts_by_worker
+            ],
+        }
@@ -0,0 +1,313 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from workers.models import Worker
+from . import archive, fragments, metrics, rollups
+from .models import Assignment, TaskQueue
+from .counter_logic import departments_status
+from .counters import apply_counter_deltas
+
+
+class RosterPlan:
+    """Assignments planned for a single date, not yet written to the database."""
+
+    def __init__(self, plan_date):
+        self.date = plan_date
+        self.assignments = []
+        self.unfilled = []
+        self.existing_guards = defaultdict(list)
+
+    def __len__(self):
+        return len(self.assignments)
+
+
+class RosterGenerator:
+    """Fill guard slots and full-day tasks for one or more dates from the task queues.
+
+    Workers, queues and the existing assignments of the planned range are
+    loaded once; planning then runs in memory, rotating the queues as workers
+    are picked. Committing writes the assignments, counter changes and queue
+    positions in a single transaction.
+
+    Hard constraints: a worker does at most one task per day, never holds two
+    overlapping shifts, rests at least min_rest_hours between guard shifts, and
+    each patrol gets a commander. With balance_counters, candidates for night
+    shifts and mixed-department guard slots are ranked by their projected
+    counters, with queue order breaking ties.
+    """
+
+    FULL_DAY_ORDER = ['patrol_a', 'patrol_b', 'kitchen']
+    COMMANDER_TASKS = ['patrol_a', 'patrol_b']
+
+    # Minimum hours between the end of one guard shift and the start of the next
+    MIN_REST_HOURS = 8
+
+    # Hour the schedule day starts at (the first guard slot); full-day tasks span 24 hours from it
+    DAY_START_HOUR = 7
+
+    def __init__(self, min_rest_hours=None, balance_counters=True):
+        self.min_rest_hours = self.MIN_REST_HOURS if min_rest_hours is None else min_rest_hours
+        self.balance_counters = balance_counters
+
+        self.workers = {worker.id: worker for worker in Worker.objects.all()}
+        self.hard_chores = {wid: worker.hard_chores_counter for wid, worker in self.workers.items()}
+        self.outer_partner = {wid: worker.outer_partner_counter for wid, worker in self.workers.items()}
+        self.shifts = defaultdict(list)
+
+        # Read before the queues: the rotations are committed only if no queue changed since
+        self.queue_versions = TaskQueue.versions()
+        self.queues = defaultdict(list)
+        queue_rows = TaskQueue.objects.order_by('task_type', 'position').values_list('task_type', 'worker_id')
+        for task_type, worker_id in queue_rows:
+            self.queues[task_type].append(worker_id)
+        self.moved = defaultdict(list)
+
+    @classmethod
+    def shift_hours(cls, shift_date, time_slot):
+        """Get a shift's (start, end) as absolute hours, so shifts on different days compare directly."""
+        day_start = shift_date.toordinal() * 24
+        if time_slot is None:
+            return day_start, day_start + 24
+
+        start_hour, end_hour = int(time_slot[:2]), int(time_slot[6:8])
+        offset = (start_hour - cls.DAY_START_HOUR) % 24
+        length = (end_hour - start_hour) % 24
+        return day_start + offset, day_start + offset + length
+
+    def _is_free(self, worker_id, start, end, is_guard):
+        """Check a shift neither overlaps the worker's shifts nor cuts a guard rest gap short."""
+        for shift_start, shift_end, shift_is_guard in self.shifts[worker_id]:
+            if start < shift_end and shift_start < end:
+                return False
+            if is_guard and shift_is_guard:
+                gap = start - shift_end if start >= shift_end else shift_start - end
+                if gap < self.min_rest_hours:
+                    return False
+        return True
+
+    def _rotate(self, task_type, worker_id):
+        """Move a worker to the end of the in-memory queue."""
+        queue = self.queues[task_type]
+        queue.remove(worker_id)
+        queue.append(worker_id)
+
+        moved = self.moved[task_type]
+        if worker_id in moved:
+            moved.remove(worker_id)
+        moved.append(worker_id)
+
+    def _pick(self, task_type, busy, hours, commander=False, cost=None):
+        """Get the best free worker for a seat.
+
+        Without a cost function this is the first free worker in queue order.
+        With one, the lowest cost wins and queue order breaks ties.
+        """
+        is_guard = task_type == 'guard_duty'
+        best_id, best_cost = None, None
+
+        for worker_id in self.queues[task_type]:
+            if worker_id in busy:
+                continue
+            if commander and self.workers[worker_id].title != 'commander':
+                continue
+            if not self._is_free(worker_id, *hours, is_guard):
+                continue
+            if cost is None:
+                return worker_id
+
+            worker_cost = cost(worker_id)
+            if not any(worker_cost):
+                return worker_id
+            if best_cost is None or worker_cost < best_cost:
+                best_id, best_cost = worker_id, worker_cost
+
+        return best_id
+
+    def _guard_cost(self, time_slot, slot_workers):
+        """Cost of a guard seat: projected hard chores for night shifts, outer partner if it mixes departments."""
+        if not self.balance_counters:
+            return None
+
+        is_night_shift = Assignment.is_night_shift('guard_duty', time_slot)
+        partner_departments = {self.workers[wid].department for wid in slot_workers} - {None, ''}
+
+        def cost(worker_id):
+            department = self.workers[worker_id].department
+            mixes = bool(department) and bool(partner_departments - {department})
+            return (
+                self.hard_chores[worker_id] if is_night_shift else 0,
+                self.outer_partner[worker_id] + 1 if mixes else 0,
+            )
+
+        return cost
+
+    def _assign(self, plan, busy, worker_id, task_type, time_slot=None, is_commander=False):
+        plan.assignments.append(Assignment(
+            date=plan.date,
+            time_slot=time_slot,
+            task_type=task_type,
+            worker_id=worker_id,
+            is_commander=is_commander,
+        ))
+        busy.add(worker_id)
+        self.shifts[worker_id].append((*self.shift_hours(plan.date, time_slot), task_type == 'guard_duty'))
+        self._rotate(task_type, worker_id)
+        if Assignment.is_night_shift(task_type, time_slot):
+            self.hard_chores[worker_id] += 1
+
+    def _plan_day(self, plan_date, existing):
+        """Plan all empty seats of a date, keeping the given existing assignments."""
+        plan = RosterPlan(plan_date)
+
+        busy = set()
+        filled = defaultdict(int)
+        has_commander = set()
+        for worker_id, task_type, time_slot, is_commander in existing:
+            busy.add(worker_id)
+            filled[(task_type, time_slot)] += 1
+            if is_commander:
+                has_commander.add(task_type)
+            if task_type == 'guard_duty':
+                plan.existing_guards[time_slot].append(worker_id)
+
+        full_day_hours = self.shift_hours(plan_date, None)
+
+        # Commander seats first, so one patrol cannot use up every commander
+        for task_type in self.COMMANDER_TASKS:
+            if task_type in has_commander:
+                continue
+            if filled[(task_type, None)] >= Assignment.FULL_DAY_REQUIRED_WORKERS[task_type]:
+                continue
+            worker_id = self._pick(task_type, busy, full_day_hours, commander=True)
+            if worker_id is None:
+                plan.unfilled.append((task_type, None))
+            else:
+                self._assign(plan, busy, worker_id, task_type, is_commander=True)
+            filled[(task_type, None)] += 1
+
+        # Remaining full-day seats
+        for task_type in self.FULL_DAY_ORDER:
+            missing = Assignment.FULL_DAY_REQUIRED_WORKERS[task_type] - filled[(task_type, None)]
+            for _ in range(missing):
+                worker_id = self._pick(task_type, busy, full_day_hours)
+                if worker_id is None:
+                    plan.unfilled.append((task_type, None))
+                    continue
+                self._assign(plan, busy, worker_id, task_type)
+
+        # Guard duty time slots
+        for time_slot, _ in Assignment.TIME_SLOT_CHOICES:
+            hours = self.shift_hours(plan_date, time_slot)
+            slot_workers = list(plan.existing_guards.get(time_slot, []))
+            new_ids = []
+            missing = Assignment.get_required_workers_for_slot(time_slot) - filled[('guard_duty', time_slot)]
+            for _ in range(missing):
+                worker_id = self._pick('guard_duty', busy, hours, cost=self._guard_cost(time_slot, slot_workers))
+                if worker_id is None:
+                    plan.unfilled.append(('guard_duty', time_slot))
+                    continue
+                self._assign(plan, busy, worker_id, 'guard_duty', time_slot)
+                slot_workers.append(worker_id)
+                new_ids.append(worker_id)
+
+            for wid in self._credited_partners(plan.existing_guards.get(time_slot, []), new_ids):
+                self.outer_partner[wid] += 1
+
+        return plan
+
+    def plan_range(self, start_date, days):
+        """Plan consecutive days starting at start_date. Returns one RosterPlan per day."""
+        end_date = start_date + timedelta(days=days - 1)
+
+        # Neighbouring days are loaded too, for overlap and rest-gap checks at the edges
+        rows = Assignment.objects.filter(
+            date__range=(start_date - timedelta(days=1), end_date + timedelta(days=1)),
+            worker__isnull=False,
+        ).values_list('date', 'worker_id', 'task_type', 'time_slot', 'is_commander')
+
+        existing = defaultdict(list)
+        for shift_date, worker_id, task_type, time_slot, is_commander in rows:
+            existing[shift_date].append((worker_id, task_type, time_slot, is_commander))
+            self.shifts[worker_id].append((*self.shift_hours(shift_date, time_slot), task_type == 'guard_duty'))
+
+        return [
+            self._plan_day(start_date + timedelta(days=i), existing[start_date + timedelta(days=i)])
+            for i in range(days)
+        ]
+
+    def plan_day(self, plan_date):
+        """Plan all empty seats of a single date."""
+        return self.plan_range(plan_date, 1)[0]
+
+    def _department_status(self, worker_ids):
+        """Multi-department status of a guard slot, from the loaded workers."""
+        return departments_status([(wid, self.workers[wid].department) for wid in worker_ids])
+
+    def _credited_partners(self, before, new_ids):
+        """Get workers whose outer partner counter goes up when new_ids join a guard slot."""
+        if not new_ids:
+            return []
+        has_different_departments, with_department = self._department_status(before + new_ids)
+        if not has_different_departments:
+            return []
+        # Workers already in a mixed slot were credited when they were assigned
+        if self._department_status(before)[0]:
+            return [wid for wid in new_ids if wid in with_department]
+        return with_department
+
+    def counter_deltas(self, plans):
+        """Compute hard chores and outer partner increments for planned assignments."""
+        hard_chores = defaultdict(int)
+        outer_partner = defaultdict(int)
+
+        for plan in plans:
+            new_guards = defaultdict(list)
+            for assignment in plan.assignments:
+                if Assignment.is_night_shift(assignment.task_type, assignment.time_slot):
+                    hard_chores[assignment.worker_id] += 1
+                if assignment.task_type == 'guard_duty':
+                    new_guards[assignment.time_slot].append(assignment.worker_id)
+
+            for time_slot, new_ids in new_guards.items():
+                for wid in self._credited_partners(plan.existing_guards.get(time_slot, []), new_ids):
+                    outer_partner[wid] += 1
+
+        return hard_chores, outer_partner
+
+    def _save_queue_positions(self):
+        """Write the in-memory rotations: moved workers go after the current tail, in move order.
+
+        Raises QueueConflict when a queue changed since it was read for
+        planning: the plan was made from positions that are gone.
+        """
+        for task_type, worker_ids in self.moved.items():
+            TaskQueue.bulk_move(task_type, to_end=worker_ids, expected=self.queue_versions)
+        self.moved = defaultdict(list)
+
+    def commit(self, plans):
+        """Write planned assignments, counter changes and queue positions in one transaction."""
+        hard_chores, outer_partner = self.counter_deltas(plans)
+
+        with transaction.atomic():
+            created = Assignment.objects.bulk_create([a for plan in plans for a in plan.assignments])
+            metrics.assignments_changed(metrics.ASSIGNMENTS_CREATED, created, source='roster')
+            fragments.invalidate(plan.date for plan in plans if plan.assignments)
+            rollups.refresh(plan.date for plan in plans if plan.assignments)
+            apply_counter_deltas(
+                reason='roster', hard_chores_counter=hard_chores, outer_partner_counter=outer_partner
+            )
+            self._save_queue_positions()
+
+    def generate_range(self, start_date, days, dry_run=False):
+        """Plan consecutive days and (unless dry_run) commit them. Returns the plans."""
+        if not dry_run:
+            # Planned around the days' existing assignments, archived ones included
+            archive.restore(start_date + timedelta(days=offset) for offset in range(days))
+        plans = self.plan_range(start_date, days)
+        if not dry_run:
+            self.commit(plans)
+        return plans
+
+    def generate(self, plan_date, dry_run=False):
+        """Plan a full day and (unless dry_run) commit it. Returns the plan."""
+        return self.generate_range(plan_date, 1, dry_run=dry_run)[0]
@@ -0,0 +1,266 @@
+from collections import defaultdict
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from .models import Assignment
+from . import archive, queue_cache
+
+
+class DaySchedule:
+    """Snapshot of a single date's assignments and all task queues.
+
+    Loads everything with a fixed number of queries and groups it in memory,
+    so callers never query per time slot or per task type. Past days with
+    no assignments are looked up in the archive (assignments.archive), and
+    come back read-only (archived=True).
+    """
+
+    FULL_DAY_TASKS = ['kitchen', 'patrol_a', 'patrol_b']
+
+    def __init__(self, selected_date, assignments, queue_entries, archived=False):
+        self.date = selected_date
+        self.assignments = assignments
+        self.archived = archived
+
+        self._guard_by_slot = defaultdict(list)
+        self._full_day_by_task = defaultdict(list)
+        for assignment in assignments:
+            if assignment.task_type == 'guard_duty' and assignment.time_slot:
+                self._guard_by_slot[assignment.time_slot].append(assignment)
+            elif assignment.time_slot is None:
+                self._full_day_by_task[assignment.task_type].append(assignment)
+
+        self._queues = defaultdict(list)
+        for entry in queue_entries:
+            self._queues[entry.task_type].append(entry)
+
+    @staticmethod
+    def _cached_queue_entries():
+        """All queue entries, from the versioned queue cache."""
+        return [entry for queue in queue_cache.get_queues().values() for entry in queue]
+
+    @staticmethod
+    def _day_queryset(selected_date):
+        return (
+            Assignment.objects.filter(date=selected_date)
+            .select_related('worker')
+            .order_by('time_slot', 'task_type', 'id')
+        )
+
+    @classmethod
+    def _day_assignments(cls, selected_date):
+        """(assignments, archived) of a date: one query, and the archive's two for an empty past day."""
+        assignments = list(cls._day_queryset(selected_date))
+        if assignments:
+            return assignments, False
+        archived = archive.load_days([selected_date]).get(selected_date)
+        return (archived, True) if archived else ([], False)
+
+    @classmethod
+    def load(cls, selected_date):
+        """Load the schedule for a date: one query for assignments, one or two for queues.
+
+        Queues come from queue_cache: one query for their versions, plus one to
+        reload them only when a queue changed since it was cached.
+        """
+        assignments, archived = cls._day_assignments(selected_date)
+        return cls(selected_date, assignments, cls._cached_queue_entries(), archived)
+
+    @classmethod
+    def load_assignments(cls, selected_date):
+        """A schedule with the assignments only (one query), for when no queue is needed."""
+        assignments, archived = cls._day_assignments(selected_date)
+        return cls(selected_date, assignments, [], archived)
+
+    @classmethod
+    async def aload_assignments(cls, selected_date):
+        """Async version of load_assignments (Django's async ORM)."""
+        assignments = [assignment async for assignment in cls._day_queryset(selected_date)]
+        if assignments:
+            return cls(selected_date, assignments, [])
+        archived = (await sync_to_async(archive.load_days)([selected_date])).get(selected_date)
+        return cls(selected_date, archived or [], [], archived=bool(archived))
+
+    @classmethod
+    def load_queues(cls, selected_date):
+        """A schedule with the queues only, for when the day's assignments are not needed."""
+        return cls(selected_date, [], cls._cached_queue_entries())
+
+    @classmethod
+    def load_many(cls, dates):
+        """Load schedules for several dates with the same queries as load(). Returns {date: DaySchedule}."""
+        dates = sorted(set(dates))
+        by_date = defaultdict(list)
+        assignments = (
+            Assignment.objects.filter(date__in=dates)
+            .select_related('worker')
+            .order_by('date', 'time_slot', 'task_type', 'id')
+        )
+        for assignment in assignments:
+            by_date[assignment.date].append(assignment)
+        archived = archive.load_days(d for d in dates if d not in by_date)
+        queue_entries = cls._cached_queue_entries()
+        return {d: cls(d, by_date[d] or archived.get(d, []), queue_entries, d in archived) for d in dates}
+
+    @classmethod
+    def load_range(cls, start_date, end_date):
+        """Load every date from start_date to end_date (inclusive) with one range query.
+
+        Queues are not loaded; use load() for a day that needs suggestions.
+        Returns {date: DaySchedule} in date order, including empty days.
+        Archived days are read only when the range has empty past days.
+        """
+        by_date = defaultdict(list)
+        assignments = (
+            Assignment.objects.filter(date__range=(start_date, end_date))
+            .select_related('worker')
+            .order_by('date', 'time_slot', 'task_type', 'id')
+        )
+        for assignment in assignments:
+            by_date[assignment.date].append(assignment)
+        days = (end_date - start_date).days + 1
+        dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        archived = archive.load_days(d for d in dates if d not in by_date)
+        return {d: cls(d, by_date[d] or archived.get(d, []), [], d in archived) for d in dates}
+
+    def guard_workers(self, time_slot):
+        """Get guard duty assignments for a time slot."""
+        return self._guard_by_slot.get(time_slot, [])
+
+    def full_day_workers(self, task_type):
+        """Get assignments for a full-day task (kitchen, patrol_a, patrol_b)."""
+        return self._full_day_by_task.get(task_type, [])
+
+    @property
+    def schedule_data(self):
+        """Guard duty rows in time slot order, as rendered by the calendar."""
+        schedule_data = []
+        for time_slot, _ in Assignment.TIME_SLOT_CHOICES:
+            schedule_data.append({
+                'time_slot': time_slot,
+                'guard_workers': self.guard_workers(time_slot),
+                'required_workers': Assignment.get_required_workers_for_slot(time_slot),
+            })
+        return schedule_data
+
+    def queue_for_task(self, task_type):
+        """Get queue entries for a task type in queue order."""
+        return self._queues.get(task_type, [])
+
+    def next_worker(self, task_type):
+        """Get the worker at the head of the queue for a task."""
+        queue = self.queue_for_task(task_type)
+        return queue[0].worker if queue else None
+
+    @property
+    def task_queues(self):
+        """Queue entries for every task type, keyed by task type."""
+        return {
+            task_type: self.queue_for_task(task_type)
+            for task_type, _ in Assignment.TASK_TYPE_CHOICES
+        }
+
+    def queue_as_list(self, task_type):
+        """JSON-serializable queue of a task type, in queue order."""
+        return queue_cache.serialize(self.queue_for_task(task_type))
+
+    @property
+    def queue_suggestions(self):
+        """Suggested (head of queue) worker for every task type."""
+        queue_suggestions = {}
+        for task_type, _ in Assignment.TASK_TYPE_CHOICES:
+            suggested_worker = self.next_worker(task_type)
+            if suggested_worker:
+                queue_suggestions[task_type] = {
+                    'id': suggested_worker.id,
+                    'name': suggested_worker.name,
+                    'title': suggested_worker.get_title_display(),
+                }
+            else:
+                queue_suggestions[task_type] = None
+        return queue_suggestions
+
+    @staticmethod
+    def _assignment_dict(assignment):
+        return {
+            'id': assignment.id,
+            'worker_id': assignment.worker_id,
+            'worker_name': assignment.worker.name if assignment.worker else None,
+            'is_commander': assignment.is_commander,
+        }
+
+    def as_dict(self):
+        """JSON-serializable snapshot of the day's assignments and queue suggestions."""
+        return {
+            'date': self.date.isoformat(),
+            'guard_duty': {
+                row['time_slot']: {
+                    'required_workers': row['required_workers'],
+                    'assignments': [self._assignment_dict(a) for a in row['guard_workers']],
+                }
+                for row in self.schedule_data
+            },
+            'full_day': {
+                task_type: [self._assignment_dict(a) for a in self.full_day_workers(task_type)]
+                for task_type in self.FULL_DAY_TASKS
+            },
+            'queue_suggestions': self.queue_suggestions,
+        }
+
+
+class ScheduleGrid:
+    """Assignments for a week or month pivoted into a dates × slots grid.
+
+    Columns are every guard duty time slot followed by the full-day tasks;
+    each row holds one date's assignments per column. Built from a single
+    range query (DaySchedule.load_range).
+    """
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = DaySchedule.load_range(start_date, end_date)
+
+    @classmethod
+    def week(cls, any_date):
+        """Grid for the week (Sunday to Saturday) containing any_date."""
+        start_date = any_date - timedelta(days=(any_date.weekday() + 1) % 7)
+        return cls(start_date, start_date + timedelta(days=6))
+
+    @classmethod
+    def month(cls, any_date):
+        """Grid for the calendar month containing any_date."""
+        start_date = any_date.replace(day=1)
+        next_month = (start_date + timedelta(days=32)).replace(day=1)
+        return cls(start_date, next_month - timedelta(days=1))
+
+    @property
+    def columns(self):
+        """(key, label, required workers) for every column: guard time slots, then full-day tasks."""
+        names = dict(Assignment.TASK_TYPE_CHOICES)
+        columns = [
+            (time_slot, label, Assignment.get_required_workers_for_slot(time_slot))
+            for time_slot, label in Assignment.TIME_SLOT_CHOICES
+        ]
+        columns += [
+            (task_type, names[task_type], Assignment.FULL_DAY_REQUIRED_WORKERS[task_type])
+            for task_type in DaySchedule.FULL_DAY_TASKS
+        ]
+        return columns
+
+    @property
+    def rows(self):
+        """One row per date: {date, cells}, with one {assignments, required} cell per column."""
+        time_slots = [time_slot for time_slot, _ in Assignment.TIME_SLOT_CHOICES]
+        required = [required for _, _, required in self.columns]
+        rows = []
+        for day in self.days.values():
+            cells = [day.guard_workers(time_slot) for time_slot in time_slots]
+            cells += [day.full_day_workers(task_type) for task_type in DaySchedule.FULL_DAY_TASKS]
+            rows.append({
+                'date': day.date,
+                'cells': [
+                    {'assignments': assignments, 'required': needed}
+                    for assignments, needed in zip(cells, required)
+                ],
+            })
+        return rows
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from workers.models import Worker
+from . import archive, fragments, rollups
+from .counters import COUNTER_FIELDS, assignment_changed, changes_managed, record_adjustments
+from .models import Assignment, TaskQueue
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS (WAL journal etc.) to a new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver(pre_save, sender=Worker)
+def remember_worker_counters(sender, instance, raw=False, **kwargs):
+    """Keep the stored counters of a worker about to be saved, to diff them after the save."""
+    if raw or not instance.pk:
+        instance._previous_counters = {}
+        return
+    previous = Worker.objects.filter(pk=instance.pk).values(*COUNTER_FIELDS).first()
+    instance._previous_counters = previous or {}
+
+
+@receiver(post_save, sender=Worker)
+def record_worker_counter_edits(sender, instance, raw=False, **kwargs):
+    """Write manual counter edits (worker form, admin) to the counter ledger."""
+    if raw:
+        return
+    record_adjustments(instance, getattr(instance, '_previous_counters', {}))
+
+
+@receiver(post_save, sender=TaskQueue)
+@receiver(post_delete, sender=TaskQueue)
+def bump_queue_version(sender, instance, raw=False, **kwargs):
+    """Queue entries saved or deleted one by one (admin, worker deletion cascade) invalidate cached queues."""
+    if raw:
+        return
+    TaskQueue.bump_version(instance.task_type)
+
+
+@receiver(post_save, sender=Worker)
+def bump_queue_versions_on_worker_edit(sender, instance, created, raw=False, **kwargs):
+    """Cached queue entries carry worker names and titles; an edited worker invalidates them."""
+    if raw or created:
+        return
+    TaskQueue.bump_version()
+
+
+# (date, task_type, time_slot, worker_id, department) of an assignment, as counters.assignment_changed takes it
+ASSIGNMENT_ROW = ['date', 'task_type', 'time_slot', 'worker_id', 'worker__department']
+
+
+def _assignment_row(instance):
+    department = instance.worker.department if instance.worker_id else None
+    return (instance.date, instance.task_type, instance.time_slot, instance.worker_id, department)
+
+
+@receiver(pre_save, sender=Assignment)
+def remember_assignment_date(sender, instance, raw=False, **kwargs):
+    """Keep the stored state of an assignment being edited: both days are invalidated, and counters diffed."""
+    if raw or instance._state.adding:
+        return
+    instance._previous_row = Assignment.objects.filter(pk=instance.pk).values_list(*ASSIGNMENT_ROW).first()
+    instance._previous_date = instance._previous_row[0] if instance._previous_row else None
+
+
+@receiver(pre_save, sender=Assignment)
+def restore_archived_day(sender, instance, raw=False, **kwargs):
+    """An assignment saved on an archived day brings the day back from the archive first."""
+    if raw:
+        return
+    archive.restore([instance.date])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def invalidate_assignment_day(sender, instance, raw=False, **kwargs):
+    """A changed assignment re-renders its day's calendar fragments."""
+    if raw or archive.archiving():
+        return
+    fragments.invalidate([instance.date, getattr(instance, '_previous_date', None)])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def refresh_assignment_day_summary(sender, instance, raw=False, **kwargs):
+    """A changed assignment recomputes its day's DailySummary (both days when it moved)."""
+    if raw or archive.archiving():
+        return
+    rollups.refresh([instance.date, getattr(instance, '_previous_date', None)])
+
+
+@receiver(post_save, sender=Assignment)
+def update_counters_on_assignment_save(sender, instance, raw=False, **kwargs):
+    """Assignments saved outside the counter service (admin, shell) update the counters and the ledger too."""
+    if raw or changes_managed():
+        return
+    assignment_changed(instance.id, getattr(instance, '_previous_row', None), _assignment_row(instance))
+
+
+@receiver(post_delete, sender=Assignment)
+def update_counters_on_assignment_delete(sender, instance, raw=False, **kwargs):
+    """Assignments deleted outside the counter service (admin, shell) update the counters and the ledger too."""
+    if raw or changes_managed():
+        return
+    assignment_changed(instance.id, _assignment_row(instance), None)
+
+
+@receiver(post_save, sender=Worker)
+@receiver(pre_delete, sender=Worker)
+def invalidate_worker_days(sender, instance, raw=False, created=False, **kwargs):
+    """A renamed or deleted worker re-renders every day they are assigned on.
+
+    Deletion is handled before the delete, while the assignments still point
+    at the worker (they are set to NULL with it).
+    """
+    if raw or created:
+        return
+    fragments.invalidate(
+        Assignment.objects.filter(worker=instance).order_by().values_list('date', flat=True).distinct()
+    )
@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments import fragments
+from assignments.archive import archive_before, restore
+from assignments.benchmarks import generate_history
+from assignments.counter_logic import bonus_deltas, guard_slot_rows
+from assignments.models import ArchivedDay, Assignment, CounterEvent, DailySummary, TaskQueue
+from assignments.rollups import backfill
+from assignments.schedule import DaySchedule, ScheduleGrid
+
+
+class ArchiveTest(TestCase):
+    """Test cases for moving old days out of Assignment and reading them back."""
+
+    def setUp(self):
+        """Generate 10 days of history ending 20 days ago, with their summaries."""
+        cache.clear()
+        self.client = Client()
+        self.workers, self.start_date, self.end_date = generate_history(
+            workers=30, days=10, end_date=date.today() - timedelta(days=20)
+        )
+        backfill()
+        self.cutoff = self.start_date + timedelta(days=5)
+
+    def summaries(self):
+        return [(s.date, s.total, s.night_shifts, s.night_shift_workers) for s in DailySummary.objects.all()]
+
+    def test_archive_moves_days_and_keeps_summaries(self):
+        """Test days before the cutoff become one ArchivedDay row each and their summaries stay."""
+        before = self.summaries()
+        old = list(Assignment.objects.filter(date__lt=self.cutoff).values_list('id', flat=True))
+        counters = list(Worker.objects.order_by('id').values_list('hard_chores_counter', 'outer_partner_counter'))
+        events = CounterEvent.objects.count()
+
+        self.assertEqual(archive_before(self.cutoff), (5, len(old)))
+
+        self.assertFalse(Assignment.objects.filter(date__lt=self.cutoff).exists())
+        self.assertEqual(Assignment.objects.count(), 5 * 33)
+        self.assertEqual(ArchivedDay.objects.count(), 5)
+        archived_ids = [row[0] for day in ArchivedDay.objects.all() for row in day.assignments]
+        self.assertEqual(sorted(archived_ids), sorted(old))
+        self.assertEqual(self.summaries(), before)
+        # Archived assignments still count
+        self.assertEqual(
+            list(Worker.objects.order_by('id').values_list('hard_chores_counter', 'outer_partner_counter')), counters
+        )
+        self.assertEqual(CounterEvent.objects.count(), events)
+
+        # A full rebuild reads the archived days too
+        backfill()
+        self.assertEqual(self.summaries(), before)
+
+    def test_calendar_reads_archived_day(self):
+        """Test an archived day renders read-only, like the day it was, without being cached."""
+        day = self.start_date
+        names = set(Assignment.objects.filter(date=day).values_list('worker__name', flat=True))
+        live = DaySchedule.load_assignments(day)
+        archive_before(self.cutoff)
+
+        with self.assertNumQueries(3):
+            archived = DaySchedule.load_assignments(day)
+        self.assertTrue(archived.archived)
+        self.assertEqual(
+            [(a.id, a.worker_id, a.is_commander) for a in archived.assignments],
+            [(a.id, a.worker_id, a.is_commander) for a in live.assignments],
+        )
+
+        response = self.client.get(reverse('assignments:calendar'), {'date': day.isoformat()})
+        self.assertContains(response, 'מארכיון')
+        for name in names:
+            self.assertContains(response, name)
+        self.assertNotContains(response, 'remove/')
+        self.assertIsNone(fragments.get_cached(day))
+
+    def test_range_views_read_archived_days(self):
+        """Test the week and month grids include archived days next to live ones."""
+        archive_before(self.cutoff)
+
+        with self.assertNumQueries(3):
+            days = DaySchedule.load_range(self.start_date, self.end_date)
+
+        self.assertEqual([d.archived for d in days.values()], [True] * 5 + [False] * 5)
+        self.assertTrue(all(len(d.assignments) == 33 for d in days.values()))
+        self.assertEqual(len(ScheduleGrid(self.start_date, self.end_date).rows), 10)
+
+    def test_assigning_restores_the_day(self):
+        """Test writing to an archived day first brings its assignments back, with their ids."""
+        day = self.start_date
+        before = list(Assignment.objects.filter(date=day).values_list('id', 'worker_id', 'is_commander'))
+        archive_before(self.cutoff)
+        worker = Worker.objects.create(name="Late", title="soldier", department='1')
+        TaskQueue.initialize_for_worker(worker)
+
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': day.isoformat(), 'task_type': 'kitchen', 'worker_id': worker.id,
+        })
+
+        restored = Assignment.objects.filter(date=day).exclude(worker=worker)
+        self.assertEqual(sorted(restored.values_list('id', 'worker_id', 'is_commander')), sorted(before))
+        self.assertFalse(ArchivedDay.objects.filter(date=day).exists())
+        self.assertEqual(DailySummary.objects.get(date=day).total, 34)
+        self.assertEqual(ArchivedDay.objects.count(), 4)
+
+    def test_bulk_restores_before_reading_slots(self):
+        """Test the bulk API credits departments as if the archived guard slot had never left."""
+        day = self.start_date
+        worker = Worker.objects.create(name="Late", title="soldier", department='9')
+        slot = guard_slot_rows([day])[(day, '01:00-03:00')]
+        expected = bonus_deltas(slot, slot + [(worker.id, worker.department)])
+        archive_before(self.cutoff)
+
+        response = self.client.post(reverse('assignments:bulk_assignments'), {
+            'create': [{'date': day.isoformat(), 'task_type': 'guard_duty', 'time_slot': '01:00-03:00',
+                        'worker_id': worker.id}],
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Assignment.objects.filter(date=day).count(), 34)
+        bonus = CounterEvent.objects.filter(counter='outer_partner_counter', reason='bulk')
+        self.assertEqual(dict(bonus.values_list('worker_id', 'delta')), expected)
+
+    def test_restore_is_free_for_live_days(self):
+        """Test today and later days are never looked up in the archive."""
+        with self.assertNumQueries(0):
+            self.assertEqual(restore([date.today(), date.today() + timedelta(days=3)]), 0)
+
+    def test_failed_restore_keeps_the_archive(self):
+        """Test a restore that fails half way leaves the days archived and no assignment behind."""
+        archive_before(self.cutoff)
+        archived = list(ArchivedDay.objects.order_by('date').values_list('date', flat=True))
+
+        with mock.patch.object(QuerySet, 'delete', side_effect=DatabaseError('disk I/O error')):
+            with self.assertRaises(DatabaseError):
+                restore([self.start_date])
+
+        self.assertFalse(Assignment.objects.filter(date=self.start_date).exists())
+        self.assertEqual(list(ArchivedDay.objects.order_by('date').values_list('date', flat=True)), archived)
+
+    def test_command(self):
+        """Test archive_assignments reports a dry run, archives and refuses future cutoffs."""
+        out = StringIO()
+        call_command('archive_assignments', '--before', self.cutoff.isoformat(), '--dry-run', stdout=out)
+        self.assertIn('Would archive 165 assignments of 5 days', out.getvalue())
+        self.assertEqual(ArchivedDay.objects.count(), 0)
+
+        call_command('archive_assignments', '--days', '24', stdout=out)
+        self.assertIn('Archived 165 assignments of 5 days', out.getvalue())
+        self.assertEqual(ArchivedDay.objects.count(), 5)
+
+        with self.assertRaises(CommandError):
+            call_command('archive_assignments', '--before', (date.today() + timedelta(days=1)).isoformat())
@@ -0,0 +1,65 @@
+import re
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, AsyncClient, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments.models import Assignment, TaskQueue
+
+
+def strip_tokens(content):
+    """Page content without the (per-response masked) CSRF tokens."""
+    return re.sub(rb'value="[A-Za-z0-9]{64}"', b'', content)
+
+
+class AsyncViewsTest(TestCase):
+    """Test cases for the async ORM versions of the calendar and worker list."""
+
+    def setUp(self):
+        """Set up workers, queues and a day of assignments."""
+        cache.clear()
+        self.day = date(2025, 6, 1)
+        self.workers = [Worker.objects.create(name=f"Async {i}", title="soldier") for i in range(3)]
+        TaskQueue.initialize_workers([worker.id for worker in self.workers])
+        Assignment.objects.create(date=self.day, time_slot='07:00-09:00', task_type='guard_duty', worker=self.workers[0])
+        Assignment.objects.create(date=self.day, task_type='kitchen', worker=self.workers[1])
+
+    async def test_calendar_matches_sync_view(self):
+        """Test the async calendar renders the same page as the sync one, cold and cached."""
+        params = {'date': self.day.isoformat()}
+        sync_response = await sync_to_async(Client().get)(reverse('assignments:calendar'), params)
+        await sync_to_async(cache.clear)()
+
+        client = AsyncClient()
+        for _ in range(2):
+            response = await client.get(reverse('assignments:calendar_async'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(strip_tokens(response.content), strip_tokens(sync_response.content))
+            self.assertEqual(response['ETag'], sync_response['ETag'])
+
+    async def test_calendar_not_modified(self):
+        """Test the async calendar answers 304 to an up-to-date ETag and 200 after a change."""
+        client = AsyncClient()
+        params = {'date': self.day.isoformat()}
+        etag = (await client.get(reverse('assignments:calendar_async'), params))['ETag']
+
+        response = await client.get(reverse('assignments:calendar_async'), params, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        await Assignment.objects.acreate(date=self.day, task_type='kitchen', worker=self.workers[2])
+        response = await client.get(reverse('assignments:calendar_async'), params, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Async 2")
+
+    async def test_worker_list(self):
+        """Test the async worker list shows every worker and supports 304."""
+        client = AsyncClient()
+        response = await client.get(reverse('workers:list_async'))
+        self.assertEqual(response.status_code, 200)
+        for worker in self.workers:
+            self.assertContains(response, worker.name)
+        self.assertContains(response, '<strong>3</strong>')
+
+        response = await client.get(reverse('workers:list_async'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
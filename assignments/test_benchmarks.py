@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from workers.models import Worker
+from assignments import fragments
+from assignments.models import Assignment, TaskQueue
+from assignments.benchmarks import (
+    CONCURRENT_CASES, HotPathBenchmark, compare_reports, concurrent_benchmark, generate_history,
+    hot_path_benchmark, index_benchmark, summarize,
+)
+
+
+class IndexBenchmarkTest(TestCase):
+    """Test cases for the synthetic history and index benchmark."""
+
+    def test_generate_history_fills_every_seat(self):
+        """Test each synthetic day has every guard slot and full-day task staffed."""
+        workers, start_date, end_date = generate_history(workers=40, days=3)
+
+        self.assertEqual((end_date - start_date).days, 2)
+        per_day = sum(
+            Assignment.get_required_workers_for_slot(slot) for slot, _ in Assignment.TIME_SLOT_CHOICES
+        ) + sum(Assignment.FULL_DAY_REQUIRED_WORKERS.values())
+        self.assertEqual(Assignment.objects.filter(date=start_date).count(), per_day)
+        self.assertEqual(Assignment.objects.count(), per_day * 3)
+        departments = set(Worker.objects.values_list('department', flat=True))
+        self.assertEqual(departments, {value for value, _ in Worker.DEPARTMENT_CHOICES})
+        self.assertEqual(TaskQueue.objects.count(), 40 * len(TaskQueue.TASK_TYPE_CHOICES))
+
+    def test_benchmark_rolls_back_and_uses_new_indexes(self):
+        """Test the benchmark leaves no data behind and the plans use the Meta indexes."""
+        rows, results = index_benchmark(workers=40, days=10, repeat=1)
+
+        self.assertGreater(rows, 0)
+        self.assertFalse(Assignment.objects.exists())
+        self.assertFalse(Worker.objects.exists())
+        plans = {result['name']: result for result in results}
+        self.assertIn('assignment_worker_date_idx', plans['worker_history']['indexed_plan'])
+        self.assertNotIn('assignment_worker_date_idx', plans['worker_history']['baseline_plan'])
+
+    def test_command_prints_timings_and_plans(self):
+        """Test the benchmark_indexes command output."""
+        out = StringIO()
+        call_command('benchmark_indexes', workers=40, days=5, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('Synthetic history', output)
+        self.assertIn('worker_history', output)
+        self.assertIn('no index:', output)
+
+
+class HotPathBenchmarkTest(TestCase):
+    """Benchmark-style regression tests: run every hot path and hold its query budget."""
+
+    # Maximum queries per call; raise only with a reason
+    QUERY_BUDGETS = {
+        'calendar_view': 5,  # 4 once the day's fragments are cached (1 reads their version), 2 for a 304
+        # 2 keep the day's DailySummary current, 2 are the atomic block's savepoint,
+        # 1 bumps the day's fragment version
+        'assign_worker': 19,
+        'remove_assignment': 21,  # 2 are the atomic block's savepoint, 1 bumps the day's fragment version
+        'move_to_end': 6,
+        'move_to_front': 6,
+    }
+
+    def setUp(self):
+        """Generate a small synthetic history."""
+        workers, start_date, end_date = generate_history(workers=40, days=30)
+        self.benchmark = HotPathBenchmark(workers, start_date, end_date, iterations=3)
+
+    def test_hot_paths_stay_within_query_budgets(self):
+        """Test each hot path runs, is timed and stays within its query budget."""
+        results = self.benchmark.run()
+
+        self.assertEqual(list(results), HotPathBenchmark.CASES)
+        for name, result in results.items():
+            self.assertEqual(result['runs'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            if name in self.QUERY_BUDGETS:
+                self.assertLessEqual(result['queries']['max'], self.QUERY_BUDGETS[name], name)
+
+    def test_assign_and_remove_leave_no_trace(self):
+        """Test the remove runs undo the assign runs."""
+        before = Assignment.objects.count()
+        self.benchmark.run(['assign_worker', 'remove_assignment'])
+
+        self.assertEqual(Assignment.objects.count(), before)
+
+    def test_benchmark_leaves_no_cached_days(self):
+        """Test the synthetic days' fragments are not served once the history is rolled back."""
+        cache.clear()
+        hot_path_benchmark(workers=20, days=3, iterations=6, cases=['calendar_view'])
+
+        for offset in range(3):
+            self.assertIsNone(fragments.get_cached(date.today() - timedelta(days=offset)))
+
+    def test_summarize_percentiles(self):
+        """Test percentiles are taken from the sorted timings."""
+        summary = summarize([float(ms) for ms in range(100, 0, -1)], [2, 4])
+
+        self.assertEqual(summary['p50_ms'], 51.0)
+        self.assertEqual(summary['p99_ms'], 99.0)
+        self.assertEqual(summary['max_ms'], 100.0)
+        self.assertEqual(summary['queries'], {'min': 2, 'max': 4, 'mean': 3.0})
+
+    def test_command_writes_json_and_compares(self):
+        """Test the benchmark command writes a JSON report and compares it to a previous one."""
+        workers_before = Worker.objects.count()
+        report = hot_path_benchmark(workers=30, days=5, iterations=2, cases=['move_to_end'])
+        self.assertEqual(Worker.objects.count(), workers_before)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_path = os.path.join(tmp, 'baseline.json')
+            output_path = os.path.join(tmp, 'current.json')
+            with open(baseline_path, 'w') as baseline_file:
+                json.dump(report, baseline_file)
+
+            call_command(
+                'benchmark', workers=30, days=5, iterations=2, case=['move_to_end'],
+                output=output_path, compare=baseline_path, stdout=StringIO(), stderr=StringIO(),
+            )
+            with open(output_path) as output_file:
+                current = json.load(output_file)
+
+        self.assertEqual(current['meta']['workers'], 30)
+        self.assertEqual(list(current['results']), ['move_to_end'])
+        self.assertIn('p95_ms', current['results']['move_to_end'])
+        self.assertEqual(current['comparison'], compare_reports(report, current))
+
+
+class ConcurrentBenchmarkTest(TestCase):
+    """Test cases for the sync vs async concurrent load benchmark."""
+
+    def test_runs_every_case_and_rolls_back(self):
+        """Test every view pair is measured with a throughput and the history is rolled back."""
+        report = concurrent_benchmark(workers=20, days=3, requests=4, concurrency=2)
+
+        self.assertEqual(list(report['results']), list(CONCURRENT_CASES))
+        for result in report['results'].values():
+            self.assertEqual(result['runs'], 4)
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertNotIn('queries', result)
+        self.assertEqual(Worker.objects.count(), 0)
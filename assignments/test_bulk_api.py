@@ -0,0 +1,174 @@
+import json
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from datetime import date
+from workers.models import Worker
+from assignments.models import Assignment, TaskQueue, CounterEvent
+
+
+class BulkAssignmentApiTest(TestCase):
+    """Test cases for the bulk JSON assignment endpoint."""
+
+    def setUp(self):
+        """Set up workers and queues."""
+        self.client = Client()
+        self.url = reverse('assignments:bulk_assignments')
+        self.day1 = date(2025, 6, 1)
+        self.day2 = date(2025, 6, 2)
+        self.workers = [
+            Worker.objects.create(name=f"Worker {i}", title="soldier", department=str(i % 2 + 1))
+            for i in range(6)
+        ]
+        for worker in self.workers:
+            TaskQueue.initialize_for_worker(worker)
+
+    def post(self, payload):
+        return self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+
+    def guard(self, worker, time_slot, day=None):
+        return {
+            'date': (day or self.day1).isoformat(),
+            'task_type': 'guard_duty',
+            'time_slot': time_slot,
+            'worker_id': worker.id,
+        }
+
+    def test_creates_across_dates_and_returns_snapshots(self):
+        """Test creates for two dates are applied and both days are returned."""
+        response = self.post({'create': [
+            self.guard(self.workers[0], '07:00-09:00'),
+            {'date': self.day2.isoformat(), 'task_type': 'kitchen', 'worker_id': self.workers[1].id},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['dates']
+        self.assertEqual(sorted(data), [self.day1.isoformat(), self.day2.isoformat()])
+        slot = data[self.day1.isoformat()]['guard_duty']['07:00-09:00']
+        self.assertEqual([a['worker_id'] for a in slot['assignments']], [self.workers[0].id])
+        self.assertEqual(data[self.day2.isoformat()]['full_day']['kitchen'][0]['worker_name'], 'Worker 1')
+
+    def test_counters_and_queues_updated_once(self):
+        """Test night shifts, department bonus and queue rotation are applied in one pass."""
+        response = self.post({'create': [
+            self.guard(self.workers[0], '01:00-03:00'),
+            self.guard(self.workers[1], '01:00-03:00'),
+        ]})
+        self.assertEqual(response.status_code, 200)
+
+        for worker in self.workers[:2]:
+            worker.refresh_from_db()
+            self.assertEqual((worker.hard_chores_counter, worker.outer_partner_counter), (1, 1))
+        queue = [entry.worker for entry in TaskQueue.get_queue_for_task('guard_duty')]
+        self.assertEqual(queue[-2:], self.workers[:2])
+        self.assertEqual(set(CounterEvent.objects.values_list('reason', flat=True)), {'bulk'})
+
+    def test_removes_revert_counters_and_queue(self):
+        """Test removing through the API reverts counters and moves workers to the front."""
+        self.post({'create': [
+            self.guard(self.workers[2], '03:00-05:00'),
+            self.guard(self.workers[3], '03:00-05:00'),
+        ]})
+        ids = list(Assignment.objects.filter(date=self.day1).values_list('id', flat=True))
+
+        response = self.post({'remove': ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Assignment.objects.filter(date=self.day1).exists())
+        for worker in self.workers[2:4]:
+            worker.refresh_from_db()
+            self.assertEqual((worker.hard_chores_counter, worker.outer_partner_counter), (0, 0))
+        queue = [entry.worker for entry in TaskQueue.get_queue_for_task('guard_duty')]
+        self.assertEqual(set(queue[:2]), set(self.workers[2:4]))
+
+    def test_invalid_item_rolls_back_everything(self):
+        """Test one invalid item rejects the whole request."""
+        response = self.post({'create': [
+            self.guard(self.workers[0], '07:00-09:00'),
+            {'date': self.day1.isoformat(), 'task_type': 'guard_duty', 'worker_id': self.workers[1].id},
+            {'date': 'not-a-date', 'task_type': 'kitchen', 'worker_id': self.workers[2].id},
+        ], 'remove': [999999]})
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(len(errors), 3)
+        self.assertFalse(Assignment.objects.exists())
+
+    def test_is_commander_must_be_a_boolean(self):
+        """Test is_commander accepts JSON booleans only, so the string "false" is not read as True."""
+        commander = {'date': self.day1.isoformat(), 'task_type': 'patrol_a', 'worker_id': self.workers[0].id}
+        for value in ('false', 'true', 1, None):
+            response = self.post({'create': [dict(commander, is_commander=value)]})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('is_commander', response.json()['errors'][0])
+        self.assertFalse(Assignment.objects.exists())
+
+        self.assertEqual(self.post({'create': [dict(commander, is_commander=True)]}).status_code, 200)
+        self.assertTrue(Assignment.objects.get().is_commander)
+
+    def test_duplicate_rolls_back(self):
+        """Test a duplicate assignment rejects the request without partial writes."""
+        response = self.post({'create': [
+            self.guard(self.workers[0], '01:00-03:00'),
+            self.guard(self.workers[0], '01:00-03:00'),
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Assignment.objects.exists())
+        self.workers[0].refresh_from_db()
+        self.assertEqual(self.workers[0].hard_chores_counter, 0)
+
+    def test_rejects_bad_requests(self):
+        """Test malformed bodies and GET requests are rejected."""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        response = self.client.post(self.url, data='{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+
+    def test_browser_requests_need_the_csrf_token(self):
+        """Test a session without the X-CSRFToken header is refused, and one sending the cookie's value accepted."""
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse('assignments:calendar'))
+        body = json.dumps({'create': [self.guard(self.workers[0], '07:00-09:00')]})
+
+        response = client.post(self.url, data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Assignment.objects.exists())
+
+        response = client.post(
+            self.url, data=body, content_type='application/json',
+            HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    @override_settings(BULK_API_TOKEN='bulk-secret')
+    def test_scripts_authenticate_with_the_token(self):
+        """Test the bearer token replaces the CSRF token, and a wrong token gets the CSRF check."""
+        client = Client(enforce_csrf_checks=True)
+        body = json.dumps({'create': [self.guard(self.workers[0], '07:00-09:00')]})
+
+        response = client.post(self.url, data=body, content_type='application/json', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+        response = client.post(
+            self.url, data=body, content_type='application/json', HTTP_AUTHORIZATION='Bearer bulk-secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    def test_bulk_move_matches_sequential_moves(self):
+        """Test TaskQueue.bulk_move gives the same order as sequential moves."""
+        w = self.workers
+        TaskQueue.bulk_move('kitchen', to_front=[w[4].id, w[5].id], to_end=[w[0].id, w[4].id])
+        bulk_order = [entry.worker for entry in TaskQueue.get_queue_for_task('kitchen')]
+
+        TaskQueue.objects.filter(task_type='patrol_a').delete()
+        for idx, worker in enumerate(w):
+            TaskQueue.objects.create(worker=worker, task_type='patrol_a', position=idx)
+        TaskQueue.move_to_front(w[4], 'patrol_a')
+        TaskQueue.move_to_front(w[5], 'patrol_a')
+        TaskQueue.move_to_end(w[0], 'patrol_a')
+        TaskQueue.move_to_end(w[4], 'patrol_a')
+        sequential_order = [entry.worker for entry in TaskQueue.get_queue_for_task('patrol_a')]
+
+        self.assertEqual(bulk_order, sequential_order)
@@ -0,0 +1,80 @@
+from datetime import date
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments.models import Assignment, TaskQueue
+
+
+class CalendarConditionalGetTest(TestCase):
+    """Test cases for ETag / 304 responses of the calendar day page."""
+
+    def setUp(self):
+        """Set up a worker with queues and one assignment today."""
+        cache.clear()
+        self.client = Client()
+        self.today = date.today()
+        self.url = reverse('assignments:calendar')
+        self.worker = Worker.objects.create(name="Night Guard", title="soldier", department='1')
+        TaskQueue.initialize_workers([self.worker.id])
+        self.assignment = Assignment.objects.create(
+            date=self.today, time_slot='07:00-09:00', task_type='guard_duty', worker=self.worker
+        )
+
+    def get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, {'date': self.today.isoformat()}, **headers)
+
+    def test_unchanged_day_is_not_modified(self):
+        """Test revalidating an unchanged day gets a 304 from the two validator queries."""
+        response = self.get()
+        self.assertIn('ETag', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(2):
+            response = self.get(response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_assignment_changes_modify_the_day(self):
+        """Test assigning and removing on the day change the ETag."""
+        etag = self.get()['ETag']
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.today.isoformat(), 'task_type': 'kitchen', 'worker_id': self.worker.id,
+        }, HTTP_ACCEPT='application/json')
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.assignment.delete()
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_other_days_do_not_modify_the_day(self):
+        """Test an assignment on another date keeps the 304."""
+        etag = self.get()['ETag']
+        Assignment.objects.create(date=date(2020, 1, 1), task_type='kitchen', worker=self.worker)
+
+        self.assertEqual(self.get(etag).status_code, 304)
+
+    def test_worker_changes_modify_the_day(self):
+        """Test counter changes (shown in the worker dropdown) change the ETag."""
+        etag = self.get()['ETag']
+        Worker.objects.create(name="Other", title="soldier")
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.worker.hard_chores_counter = 3
+        self.worker.save()
+        self.assertEqual(self.get(response['ETag']).status_code, 200)
+
+    def test_pending_messages_bypass_the_etag(self):
+        """Test a page with a flash message to show is never answered with a 304."""
+        etag = self.get()['ETag']
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.today.isoformat(), 'task_type': 'kitchen', 'worker_id': 9999,
+        })
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Error:')
+        self.assertNotIn('ETag', response)
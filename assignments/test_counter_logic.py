@@ -0,0 +1,99 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from datetime import date
+from workers.models import Worker
+from assignments.models import Assignment
+from assignments.counter_logic import departments_status, slot_rows
+
+
+class MultiDepartmentSlotTest(TestCase):
+    """Test cases for multi-department slot detection."""
+
+    def setUp(self):
+        """Set up workers from different departments."""
+        self.client = Client()
+        self.today = date(2025, 5, 1)
+        self.dept1 = Worker.objects.create(name="Dept One", title="soldier", department='1')
+        self.dept2 = Worker.objects.create(name="Dept Two", title="soldier", department='2')
+        self.dept1_b = Worker.objects.create(name="Dept One B", title="soldier", department='1')
+        self.no_dept = Worker.objects.create(name="No Dept", title="soldier")
+
+    def guard(self, worker, time_slot='19:00-21:00', slot_date=None):
+        return Assignment.objects.create(
+            date=slot_date or self.today, time_slot=time_slot, task_type='guard_duty', worker=worker
+        )
+
+    def test_different_departments(self):
+        """Test a slot with two departments is detected."""
+        self.guard(self.dept1)
+        self.guard(self.dept2)
+
+        has_diff, worker_ids = departments_status(slot_rows(self.today, '19:00-21:00'))
+
+        self.assertTrue(has_diff)
+        self.assertCountEqual(worker_ids, [self.dept1.id, self.dept2.id])
+
+    def test_same_department(self):
+        """Test a slot with one department is not a multi-department slot."""
+        self.guard(self.dept1)
+        self.guard(self.dept1_b)
+
+        has_diff, worker_ids = departments_status(slot_rows(self.today, '19:00-21:00'))
+
+        self.assertFalse(has_diff)
+        self.assertCountEqual(worker_ids, [self.dept1.id, self.dept1_b.id])
+
+    def test_workers_without_department_are_ignored(self):
+        """Test workers without a department neither trigger nor receive the bonus."""
+        self.guard(self.dept1)
+        self.guard(self.no_dept)
+
+        has_diff, worker_ids = departments_status(slot_rows(self.today, '19:00-21:00'))
+
+        self.assertFalse(has_diff)
+        self.assertEqual(worker_ids, [self.dept1.id])
+
+    def test_slot_check_is_a_single_query(self):
+        """Test checking a slot takes one query."""
+        self.guard(self.dept1)
+        self.guard(self.dept2)
+
+        with self.assertNumQueries(1):
+            slot_rows(self.today, '19:00-21:00')
+
+    def test_assign_view_applies_bonus(self):
+        """Test assigning a partner from another department bumps both outer partner counters."""
+        self.guard(self.dept1)
+
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.today.isoformat(),
+            'task_type': 'guard_duty',
+            'time_slot': '19:00-21:00',
+            'worker_id': self.dept2.id,
+        })
+
+        self.dept1.refresh_from_db()
+        self.dept2.refresh_from_db()
+        self.assertEqual(self.dept1.outer_partner_counter, 1)
+        self.assertEqual(self.dept2.outer_partner_counter, 1)
+
+    def test_view_and_bulk_credit_the_same_bonus(self):
+        """Test assigning one by one through the view and through the bulk API gives the same counters."""
+        dept3 = Worker.objects.create(name="Dept Three", title="soldier", department='3')
+        workers = [self.dept1, self.dept2, dept3]
+        for worker in workers:
+            self.client.post(reverse('assignments:assign_worker'), {
+                'date': self.today.isoformat(), 'task_type': 'guard_duty', 'time_slot': '19:00-21:00',
+                'worker_id': worker.id,
+            })
+        for worker in workers:
+            self.client.post(reverse('assignments:bulk_assignments'), {'create': [{
+                'date': self.today.isoformat(), 'task_type': 'guard_duty', 'time_slot': '21:00-23:00',
+                'worker_id': worker.id,
+            }]}, content_type='application/json')
+
+        # Each slot credits every worker once, however many departments join it
+        counters = list(Worker.objects.filter(id__in=[w.id for w in workers]).order_by('id').values_list(
+            'outer_partner_counter', flat=True
+        ))
+        self.assertEqual(counters, [2, 2, 2])
@@ -0,0 +1,210 @@
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.management import call_command
+from datetime import date
+from io import StringIO
+from workers.models import Worker
+from assignments.models import Assignment, CounterEvent, CounterCheckpoint
+from assignments.counters import apply_counter_deltas, rebuild_counters
+
+
+class ApplyCounterDeltasTest(TestCase):
+    """Test cases for the bulk counter update service."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.worker1 = Worker.objects.create(name="Worker One", title="soldier", department='1', hard_chores_counter=3)
+        self.worker2 = Worker.objects.create(name="Worker Two", title="soldier", department='2', outer_partner_counter=1)
+        self.worker3 = Worker.objects.create(name="Worker Three", title="soldier")
+
+    def test_single_update_for_all_fields(self):
+        """Test deltas for several workers and fields run as one UPDATE."""
+        with CaptureQueriesContext(connection) as queries:
+            updated = apply_counter_deltas(
+                hard_chores_counter={self.worker1.id: 1},
+                outer_partner_counter={self.worker1.id: 1, self.worker2.id: 2},
+            )
+        worker_updates = [q for q in queries if q['sql'].startswith('UPDATE "workers_worker"')]
+        self.assertEqual(len(worker_updates), 1)
+
+        self.assertEqual(updated, 2)
+        self.worker1.refresh_from_db()
+        self.worker2.refresh_from_db()
+        self.worker3.refresh_from_db()
+        self.assertEqual((self.worker1.hard_chores_counter, self.worker1.outer_partner_counter), (4, 1))
+        self.assertEqual((self.worker2.hard_chores_counter, self.worker2.outer_partner_counter), (0, 3))
+        self.assertEqual((self.worker3.hard_chores_counter, self.worker3.outer_partner_counter), (0, 0))
+
+    def test_decrement_floors_at_zero(self):
+        """Test decrements never take a counter below zero."""
+        apply_counter_deltas(outer_partner_counter={self.worker2.id: -1, self.worker3.id: -1})
+
+        self.worker2.refresh_from_db()
+        self.worker3.refresh_from_db()
+        self.assertEqual(self.worker2.outer_partner_counter, 0)
+        self.assertEqual(self.worker3.outer_partner_counter, 0)
+
+    def test_no_deltas_runs_no_query(self):
+        """Test empty or zero deltas skip the database."""
+        with self.assertNumQueries(0):
+            self.assertEqual(apply_counter_deltas(hard_chores_counter={}, outer_partner_counter={self.worker1.id: 0}), 0)
+
+    def test_unknown_field_rejected(self):
+        """Test only worker counter fields can be updated."""
+        with self.assertRaises(ValueError):
+            apply_counter_deltas(name={self.worker1.id: 1})
+
+    def test_remove_from_mixed_night_slot(self):
+        """Test removing from a mixed night slot reverts both counters with one update."""
+        today = date.today()
+        for worker in [self.worker1, self.worker2]:
+            self.client.post(reverse('assignments:assign_worker'), {
+                'date': today.isoformat(),
+                'task_type': 'guard_duty',
+                'time_slot': '01:00-03:00',
+                'worker_id': worker.id,
+            })
+        self.worker1.refresh_from_db()
+        self.assertEqual((self.worker1.hard_chores_counter, self.worker1.outer_partner_counter), (4, 1))
+
+        assignment = Assignment.objects.get(date=today, worker=self.worker2)
+        self.client.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+
+        self.worker1.refresh_from_db()
+        self.worker2.refresh_from_db()
+        self.assertEqual((self.worker1.hard_chores_counter, self.worker1.outer_partner_counter), (4, 0))
+        self.assertEqual((self.worker2.hard_chores_counter, self.worker2.outer_partner_counter), (0, 1))
+
+
+class CounterLedgerTest(TestCase):
+    """Test cases for the counter event ledger and rebuilds."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.today = date.today()
+        self.worker1 = Worker.objects.create(name="Worker One", title="soldier", department='1')
+        self.worker2 = Worker.objects.create(name="Worker Two", title="soldier", department='2')
+
+    def assign(self, worker, time_slot='01:00-03:00'):
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.today.isoformat(),
+            'task_type': 'guard_duty',
+            'time_slot': time_slot,
+            'worker_id': worker.id,
+        })
+        return Assignment.objects.get(date=self.today, worker=worker, time_slot=time_slot)
+
+    def ledger_total(self, worker, counter):
+        return sum(CounterEvent.objects.filter(worker=worker, counter=counter).values_list('delta', flat=True))
+
+    def test_assign_and_remove_write_events(self):
+        """Test view changes are recorded against their assignment."""
+        assignment = self.assign(self.worker1)
+
+        event = CounterEvent.objects.get(worker=self.worker1, counter='hard_chores_counter')
+        self.assertEqual((event.delta, event.reason, event.assignment_id), (1, 'assign', assignment.id))
+
+        self.client.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+
+        removal = CounterEvent.objects.filter(worker=self.worker1, reason='remove').get()
+        self.assertEqual((removal.delta, removal.assignment_id), (-1, assignment.id))
+
+    def test_ledger_records_applied_delta(self):
+        """Test a decrement floored at zero is recorded as no change."""
+        apply_counter_deltas(reason='remove', hard_chores_counter={self.worker1.id: -1})
+
+        self.assertFalse(CounterEvent.objects.filter(worker=self.worker1).exists())
+
+    def test_manual_edits_are_recorded(self):
+        """Test counters changed through a model save land in the ledger."""
+        self.worker1.hard_chores_counter = 4
+        self.worker1.save()
+        worker = Worker.objects.create(name="Veteran", title="soldier", outer_partner_counter=7)
+
+        self.assertEqual(self.ledger_total(self.worker1, 'hard_chores_counter'), 4)
+        self.assertEqual(self.ledger_total(worker, 'outer_partner_counter'), 7)
+
+    def test_full_rebuild_repairs_drift(self):
+        """Test a full rebuild restores counters changed behind the ledger's back."""
+        self.assign(self.worker1)
+        self.assign(self.worker2)
+        Worker.objects.filter(id=self.worker1.id).update(hard_chores_counter=40, outer_partner_counter=0)
+
+        changed, checkpoint = rebuild_counters()
+
+        self.assertEqual(changed, 1)
+        self.worker1.refresh_from_db()
+        self.assertEqual((self.worker1.hard_chores_counter, self.worker1.outer_partner_counter), (1, 1))
+        self.assertEqual(checkpoint.totals[str(self.worker1.id)]['hard_chores_counter'], 1)
+
+    def test_changes_outside_the_views_are_recorded(self):
+        """Test assignments created, moved and deleted through the ORM (admin, shell) keep counters and ledger in step."""
+        self.assign(self.worker1)
+        other = Assignment.objects.create(
+            date=self.today, time_slot='01:00-03:00', task_type='guard_duty', worker=self.worker2
+        )
+
+        def counters(worker):
+            worker.refresh_from_db()
+            return worker.hard_chores_counter, worker.outer_partner_counter
+
+        # Night shift for the new worker, and both now share a multi-department slot
+        self.assertEqual(counters(self.worker1), (1, 1))
+        self.assertEqual(counters(self.worker2), (1, 1))
+
+        other.time_slot = '07:00-09:00'
+        other.save()
+        self.assertEqual(counters(self.worker1), (1, 0))
+        self.assertEqual(counters(self.worker2), (0, 0))
+
+        Assignment.objects.get(worker=self.worker1).delete()
+        self.assertEqual(counters(self.worker1), (0, 0))
+
+        events = CounterEvent.objects.filter(reason='adjust', assignment=other.id)
+        # Night shift and both bonuses on create, all three undone by the move
+        self.assertEqual(events.count(), 6)
+        self.assertEqual(rebuild_counters()[0], 0)
+
+    def test_full_rebuild_query_count_is_constant(self):
+        """Test a full rebuild aggregates each counter once, not per worker."""
+        for i in range(20):
+            Worker.objects.create(name=f"Extra {i}", title="soldier", hard_chores_counter=i)
+
+        # Savepoint pair, max event id, workers, one GROUP BY per counter, checkpoint insert
+        with self.assertNumQueries(7):
+            rebuild_counters()
+
+    def test_incremental_rebuild_replays_new_events_only(self):
+        """Test an incremental rebuild starts from the latest checkpoint."""
+        self.assign(self.worker1)
+        rebuild_counters()
+
+        self.assign(self.worker1, '03:00-05:00')
+        Worker.objects.filter(id=self.worker1.id).update(hard_chores_counter=0)
+
+        with CaptureQueriesContext(connection) as queries:
+            changed, checkpoint = rebuild_counters(incremental=True)
+
+        self.assertEqual(changed, 1)
+        self.worker1.refresh_from_db()
+        self.assertEqual(self.worker1.hard_chores_counter, 2)
+        self.assertEqual(CounterCheckpoint.objects.count(), 2)
+        aggregates = [q['sql'] for q in queries if 'SUM(' in q['sql']]
+        self.assertTrue(all('"id" >' in sql for sql in aggregates))
+
+    def test_rebuild_command(self):
+        """Test the management command reports corrected workers."""
+        self.assign(self.worker1)
+        Worker.objects.filter(id=self.worker1.id).update(hard_chores_counter=9)
+
+        out = StringIO()
+        call_command('rebuild_counters', stdout=out)
+        self.assertIn('Corrected counters of 1 workers', out.getvalue())
+
+        out = StringIO()
+        call_command('rebuild_counters', incremental=True, stdout=out)
+        self.assertIn('All counters match the ledger', out.getvalue())
@@ -0,0 +1,155 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from datetime import date, timedelta
+from workers.models import Worker
+from assignments.models import Assignment, TaskQueue
+from assignments.schedule import DaySchedule, ScheduleGrid
+
+
+class DayScheduleTest(TestCase):
+    """Test cases for the DaySchedule loader."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = Client()
+        self.today = date.today()
+        self.worker1 = Worker.objects.create(name="Worker One", title="soldier")
+        self.worker2 = Worker.objects.create(name="Worker Two", title="commander")
+
+        TaskQueue.objects.create(worker=self.worker1, task_type='kitchen', position=0)
+        TaskQueue.objects.create(worker=self.worker2, task_type='kitchen', position=1)
+        TaskQueue.objects.create(worker=self.worker2, task_type='guard_duty', position=0)
+
+    def populate(self, workers_count):
+        """Create extra workers, queue entries and a full day of assignments."""
+        for i in range(workers_count):
+            worker = Worker.objects.create(name=f"Extra {i}", title="soldier")
+            TaskQueue.initialize_for_worker(worker)
+            time_slot = Assignment.TIME_SLOT_CHOICES[i % len(Assignment.TIME_SLOT_CHOICES)][0]
+            Assignment.objects.create(
+                date=self.today, time_slot=time_slot, task_type='guard_duty', worker=worker
+            )
+            Assignment.objects.create(date=self.today, task_type='patrol_a', worker=worker)
+
+    def test_groups_assignments_by_slot_and_task(self):
+        """Test assignments are grouped per time slot and per full-day task."""
+        Assignment.objects.create(
+            date=self.today, time_slot='07:00-09:00', task_type='guard_duty', worker=self.worker1
+        )
+        Assignment.objects.create(date=self.today, task_type='kitchen', worker=self.worker2)
+        Assignment.objects.create(
+            date=date(2025, 1, 1), time_slot='07:00-09:00', task_type='guard_duty', worker=self.worker2
+        )
+
+        day = DaySchedule.load(self.today)
+
+        self.assertEqual([a.worker for a in day.guard_workers('07:00-09:00')], [self.worker1])
+        self.assertEqual(day.guard_workers('09:00-11:00'), [])
+        self.assertEqual([a.worker for a in day.full_day_workers('kitchen')], [self.worker2])
+        self.assertEqual(len(day.schedule_data), len(Assignment.TIME_SLOT_CHOICES))
+        self.assertEqual(day.schedule_data[0]['required_workers'], 1)
+
+    def test_queues_and_suggestions(self):
+        """Test queues keep position order and suggestions come from the queue head."""
+        day = DaySchedule.load(self.today)
+
+        self.assertEqual([e.worker for e in day.queue_for_task('kitchen')], [self.worker1, self.worker2])
+        self.assertEqual(day.next_worker('kitchen'), self.worker1)
+        self.assertEqual(day.queue_suggestions['guard_duty']['id'], self.worker2.id)
+        self.assertIsNone(day.queue_suggestions['patrol_b'])
+
+    def test_load_uses_fixed_number_of_queries(self):
+        """Test loading a day takes a fixed number of queries regardless of data size."""
+        # Assignments, queue versions and (cold cache) the queues
+        with self.assertNumQueries(3):
+            day = DaySchedule.load(self.today)
+            day.schedule_data
+            day.queue_suggestions
+
+        self.populate(20)
+
+        with self.assertNumQueries(3):
+            day = DaySchedule.load(self.today)
+            day.schedule_data
+            day.queue_suggestions
+
+        # Queues unchanged since: served from the cache
+        with self.assertNumQueries(2):
+            day = DaySchedule.load(self.today)
+            day.queue_suggestions
+        self.assertEqual(len(day.queue_for_task('patrol_a')), 20)
+
+    def test_calendar_query_count_is_constant(self):
+        """Test calendar view query count does not grow with assignments or workers."""
+        url = reverse('assignments:calendar')
+
+        # ETag validators (2), the day's fragment version, workers and assignments;
+        # queues are fetched separately by the dialog
+        with self.assertNumQueries(5):
+            self.client.get(url, {'date': self.today.isoformat()})
+
+        self.populate(20)
+
+        with self.assertNumQueries(5):
+            self.client.get(url, {'date': self.today.isoformat()})
+        # Day fragments cached: validators, fragment version and workers only
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'date': self.today.isoformat()})
+        self.assertContains(response, "Extra 19")
+        self.assertContains(response, reverse('assignments:task_queue', args=['task']))
+
+
+class ScheduleGridTest(TestCase):
+    """Test cases for the week and month grids."""
+
+    def setUp(self):
+        """Set up workers and a month of assignments."""
+        self.client = Client()
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(3)]
+        self.month_start = date(2025, 6, 1)
+        for offset in range(30):
+            day = self.month_start + timedelta(days=offset)
+            Assignment.objects.create(
+                date=day, time_slot='01:00-03:00', task_type='guard_duty', worker=self.workers[offset % 3]
+            )
+            Assignment.objects.create(date=day, task_type='kitchen', worker=self.workers[0])
+        Assignment.objects.create(
+            date=date(2025, 7, 1), time_slot='01:00-03:00', task_type='guard_duty', worker=self.workers[0]
+        )
+
+    def test_week_runs_sunday_to_saturday(self):
+        """Test the week grid starts on the Sunday before the selected date."""
+        grid = ScheduleGrid.week(date(2025, 6, 4))  # Wednesday
+
+        self.assertEqual(grid.start_date, date(2025, 6, 1))
+        self.assertEqual(grid.end_date, date(2025, 6, 7))
+        self.assertEqual(ScheduleGrid.week(date(2025, 6, 1)).start_date, date(2025, 6, 1))
+
+    def test_month_pivots_into_dates_by_columns(self):
+        """Test every date of the month gets a row with one cell per slot and full-day task."""
+        with self.assertNumQueries(1):
+            grid = ScheduleGrid.month(date(2025, 6, 15))
+            rows = grid.rows
+
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(len(grid.columns), len(Assignment.TIME_SLOT_CHOICES) + 3)
+        night_column = [key for key, _, _ in grid.columns].index('01:00-03:00')
+        kitchen_column = [key for key, _, _ in grid.columns].index('kitchen')
+        self.assertEqual(rows[4]['date'], date(2025, 6, 5))
+        self.assertEqual([a.worker for a in rows[4]['cells'][night_column]['assignments']], [self.workers[1]])
+        self.assertEqual(rows[4]['cells'][kitchen_column]['required'], 2)
+        self.assertEqual(rows[4]['cells'][0]['assignments'], [])
+
+    def test_range_views_use_one_query(self):
+        """Test the week and month pages run a single query whatever the data size."""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('assignments:calendar_week'), {'date': '2025-06-10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Worker 2')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('assignments:calendar_month'), {'date': '2025-06-10'})
+        self.assertEqual(len(response.context['grid'].days), 30)
+        self.assertEqual(response.context['next_date'], date(2025, 7, 1))
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+from datetime import date
+from django.test import TestCase, SimpleTestCase, Client, AsyncClient, override_settings
+from django.urls import reverse
+from workers.models import Worker
+from assignments import events
+from assignments.models import Assignment, TaskQueue
+
+
+class RecordingBroker:
+    """Stand-in broker that keeps every published event."""
+
+    published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+        return 0
+
+
+class InProcessBrokerTest(SimpleTestCase):
+    """Test cases for the in-process pub/sub broker."""
+
+    async def test_fan_out_per_channel(self):
+        """Test subscribers get the events of their channels only."""
+        broker = events.InProcessBroker()
+        day = broker.subscribe('day:2025-01-01', events.QUEUES_CHANNEL)
+        other_day = broker.subscribe('day:2025-01-02')
+
+        self.assertEqual(broker.publish('day:2025-01-01', {'type': 'assignment'}), 1)
+        broker.publish(events.QUEUES_CHANNEL, {'type': 'queue'})
+
+        self.assertEqual(await day.get(timeout=1), {'type': 'assignment'})
+        self.assertEqual(await day.get(timeout=1), {'type': 'queue'})
+        self.assertIsNone(await other_day.get(timeout=0.01))
+
+    async def test_publish_from_another_thread(self):
+        """Test events published from a sync view's thread reach the listener's loop."""
+        broker = events.InProcessBroker()
+        async with broker.subscribe('day:2025-01-01') as subscription:
+            thread = threading.Thread(target=broker.publish, args=('day:2025-01-01', {'type': 'assignment'}))
+            thread.start()
+            thread.join()
+            self.assertEqual(await subscription.get(timeout=1), {'type': 'assignment'})
+
+        self.assertEqual(broker.subscriber_count('day:2025-01-01'), 0)
+
+    async def test_slow_listener_gets_overflow(self):
+        """Test a listener that falls behind gets one overflow event and no more."""
+        broker = events.InProcessBroker()
+        subscription = broker.subscribe('day:2025-01-01')
+        for i in range(150):
+            broker.publish('day:2025-01-01', {'type': 'assignment', 'i': i})
+        await asyncio.sleep(0)
+
+        received = []
+        while (event := await subscription.get(timeout=0.01)) is not None:
+            received.append(event)
+        self.assertEqual(len(received), 100)
+        self.assertEqual(received[-1], {'type': 'overflow'})
+
+
+@override_settings(ASSIGNMENT_EVENTS_BROKER='assignments.test_events.RecordingBroker')
+class PublishTest(TestCase):
+    """Test cases for the events published by assignment and queue changes."""
+
+    def setUp(self):
+        """Set up a worker with queues and an empty event record."""
+        self.worker = Worker.objects.create(name="Event Worker", title="soldier")
+        TaskQueue.initialize_workers([self.worker.id])
+        RecordingBroker.published = []
+
+    def test_assign_publishes_day_and_queue_events_on_commit(self):
+        """Test an assignment tells the date's calendars and the queue listeners, after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Client().post(reverse('assignments:assign_worker'), {
+                'date': '2025-05-01', 'task_type': 'kitchen', 'worker_id': self.worker.id,
+            })
+
+        self.assertIn(('day:2025-05-01', {'type': 'assignment', 'date': '2025-05-01'}), RecordingBroker.published)
+        self.assertIn((events.QUEUES_CHANNEL, {'type': 'queue', 'task_types': ['kitchen']}), RecordingBroker.published)
+
+    def test_nothing_is_published_before_commit(self):
+        """Test rolled back changes are never announced."""
+        with self.captureOnCommitCallbacks(execute=False):
+            Assignment.objects.create(date=date(2025, 5, 1), task_type='kitchen', worker=self.worker)
+        self.assertEqual(RecordingBroker.published, [])
+
+
+class CalendarEventsViewTest(TestCase):
+    """Test cases for the server-sent events endpoint."""
+
+    def test_wsgi_requests_are_told_not_to_reconnect(self):
+        """Test the stream is refused with a 204 outside ASGI."""
+        response = Client().get(reverse('assignments:calendar_events'), {'date': '2025-05-01'})
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream_sends_day_events(self):
+        """Test the stream starts with a ready event and relays the date's events."""
+        response = await AsyncClient().get(reverse('assignments:calendar_events'), {'date': '2025-05-01'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content.__aiter__()
+
+        self.assertEqual(await chunks.__anext__(), b'retry: 3000\n\n')
+        self.assertIn(b'event: ready', await chunks.__anext__())
+
+        events.get_broker().publish('day:2025-05-02', {'type': 'assignment', 'date': '2025-05-02'})
+        events.get_broker().publish('day:2025-05-01', {'type': 'assignment', 'date': '2025-05-01'})
+        message = (await chunks.__anext__()).decode()
+        self.assertTrue(message.startswith('event: assignment\n'))
+        self.assertEqual(json.loads(message.split('data: ')[1])['date'], '2025-05-01')
+        await chunks.aclose()
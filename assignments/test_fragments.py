@@ -0,0 +1,130 @@
+import re
+from datetime import date
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments import fragments
+from assignments.models import Assignment, DayVersion, TaskQueue
+from assignments.roster import RosterGenerator
+
+
+class CalendarFragmentCacheTest(TestCase):
+    """Test cases for the per-date calendar fragment cache."""
+
+    def setUp(self):
+        """Set up workers, queues and assignments on two days."""
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('assignments:calendar')
+        self.day1 = date(2025, 3, 1)
+        self.day2 = date(2025, 3, 2)
+        self.worker = Worker.objects.create(name="Guard One", title="soldier", department='1')
+        self.other = Worker.objects.create(name="Cook Two", title="soldier", department='2')
+        TaskQueue.initialize_workers([self.worker.id, self.other.id])
+        Assignment.objects.create(date=self.day1, time_slot='07:00-09:00', task_type='guard_duty', worker=self.worker)
+        Assignment.objects.create(date=self.day2, task_type='kitchen', worker=self.other)
+
+    def get(self, day, client=None):
+        return (client or self.client).get(self.url, {'date': day.isoformat()})
+
+    def test_history_is_served_from_cache(self):
+        """Test a day already rendered skips the assignment query and renders the same page."""
+        first = self.get(self.day1)
+        self.assertIsNotNone(fragments.get_cached(self.day1))
+
+        # ETag validators, the day's fragment version and the worker list
+        with self.assertNumQueries(4):
+            second = self.get(self.day1)
+        self.assertContains(second, "Guard One")
+        # Identical apart from the (per-response masked) CSRF tokens
+        strip_tokens = lambda content: re.sub(rb'value="[A-Za-z0-9]{64}"', b'', content)
+        self.assertEqual(strip_tokens(first.content), strip_tokens(second.content))
+
+    def test_cached_forms_carry_a_valid_csrf_token(self):
+        """Test remove forms from cached fragments post with the viewer's own CSRF token."""
+        self.get(self.day1)
+        client = Client(enforce_csrf_checks=True)
+        response = self.get(self.day1, client=client)
+
+        self.assertNotContains(response, fragments.CSRF_PLACEHOLDER)
+        assignment = Assignment.objects.get(date=self.day1)
+        html = response.content.decode()
+        form = html[html.index(reverse('assignments:remove_assignment', args=[assignment.id])):]
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', form).group(1)
+
+        response = client.post(
+            reverse('assignments:remove_assignment', args=[assignment.id]), {'csrfmiddlewaretoken': token}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Assignment.objects.filter(id=assignment.id).exists())
+
+    def test_assignment_changes_invalidate_their_date_only(self):
+        """Test saving or deleting an assignment drops only that day's fragments."""
+        self.get(self.day1)
+        self.get(self.day2)
+
+        assignment = Assignment.objects.create(date=self.day1, task_type='patrol_a', worker=self.other)
+        self.assertIsNone(fragments.get_cached(self.day1))
+        self.assertIsNotNone(fragments.get_cached(self.day2))
+
+        self.get(self.day1)
+        assignment.date = self.day2
+        assignment.save()
+        self.assertIsNone(fragments.get_cached(self.day1))
+        self.assertIsNone(fragments.get_cached(self.day2))
+
+        self.get(self.day2)
+        assignment.delete()
+        self.assertIsNone(fragments.get_cached(self.day2))
+
+    def test_invalidation_goes_through_the_database(self):
+        """Test a change stales a date's fragments by its DayVersion, which every process's cache sees."""
+        self.get(self.day1)
+        self.get(self.day2)
+        key, cached = fragments.lookup(self.day1)
+        self.assertIsNotNone(cached)
+
+        fragments.invalidate([self.day1])
+        # The old entry is left to expire; it is just never read again
+        self.assertIsNotNone(cache.get(key))
+        self.assertIsNone(fragments.get_cached(self.day1))
+        self.assertIsNotNone(fragments.get_cached(self.day2))
+        self.assertTrue(DayVersion.objects.filter(date=self.day1).exists())
+
+    def test_assign_and_remove_views_rerender(self):
+        """Test the assign/remove form posts show up on the next page load."""
+        def patrol_b_card(response):
+            return response.context['fragments']['full_day_tasks'].split('כרמל')[1]
+
+        self.get(self.day2)
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.day2.isoformat(), 'task_type': 'patrol_b', 'worker_id': self.worker.id,
+        })
+        self.assertIn("Guard One", patrol_b_card(self.get(self.day2)))
+
+        assignment = Assignment.objects.get(date=self.day2, task_type='patrol_b')
+        self.client.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+        self.assertNotIn("Guard One", patrol_b_card(self.get(self.day2)))
+
+    def test_worker_edit_and_deletion_invalidate_their_days(self):
+        """Test a renamed or deleted worker is re-rendered on the days they are assigned."""
+        self.get(self.day1)
+        self.get(self.day2)
+
+        self.worker.name = "Renamed Guard"
+        self.worker.save()
+        self.assertIsNone(fragments.get_cached(self.day1))
+        self.assertIsNotNone(fragments.get_cached(self.day2))
+        self.assertContains(self.get(self.day1), "Renamed Guard")
+
+        self.other.delete()
+        self.assertIsNone(fragments.get_cached(self.day2))
+        self.assertNotIn("Cook Two", self.get(self.day2).context['fragments']['full_day_tasks'])
+
+    def test_bulk_writes_invalidate(self):
+        """Test roster generation (bulk insert, no signals) invalidates its day."""
+        self.get(self.day2)
+        RosterGenerator().generate(self.day2)
+
+        self.assertIsNone(fragments.get_cached(self.day2))
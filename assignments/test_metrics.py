@@ -0,0 +1,172 @@
+from datetime import date
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from workers.models import Worker
+from assignments import metrics
+from assignments.models import Assignment, TaskQueue
+
+
+class RegistryTest(TestCase):
+    """Test cases for the in-process metrics registry and its text format."""
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_renders_per_label_set(self):
+        """Test counters keep one value per label combination, with HELP and TYPE lines."""
+        counter = self.registry.counter('jobs_total', 'Jobs done', ['kind'])
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        counter.inc(kind='b"c')
+
+        self.assertEqual(self.registry.render(), (
+            '# HELP jobs_total Jobs done\n'
+            '# TYPE jobs_total counter\n'
+            'jobs_total{kind="a"} 3.0\n'
+            'jobs_total{kind="b\\"c"} 1.0\n'
+        ))
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histograms render cumulative buckets, +Inf, sum and count."""
+        histogram = self.registry.histogram('wait_seconds', 'Waits', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('wait_seconds_bucket{le="0.1"} 1.0', lines)
+        self.assertIn('wait_seconds_bucket{le="1.0"} 2.0', lines)
+        self.assertIn('wait_seconds_bucket{le="+Inf"} 3.0', lines)
+        self.assertIn('wait_seconds_sum 3.55', lines)
+        self.assertIn('wait_seconds_count 3.0', lines)
+
+    def test_labels_must_match(self):
+        """Test a metric refuses labels it was not declared with."""
+        counter = self.registry.counter('jobs_total', 'Jobs done', ['kind'])
+        with self.assertRaises(ValueError):
+            counter.inc(other='x')
+
+
+class AssignmentMetricsTest(TestCase):
+    """Test cases for the hooks in the assignments views and TaskQueue."""
+
+    def setUp(self):
+        """Set up two workers with queues and empty metrics."""
+        cache.clear()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.client = Client()
+        self.day = date(2025, 4, 1)
+        self.first = Worker.objects.create(name="First", title="soldier", department='1')
+        self.second = Worker.objects.create(name="Second", title="soldier", department='2')
+        TaskQueue.initialize_workers([self.first.id, self.second.id])
+
+    def post(self, *args, **kwargs):
+        # Assignment and counter changes are counted once they commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(*args, **kwargs)
+
+    def assign(self, worker, time_slot='01:00-03:00'):
+        return self.post(reverse('assignments:assign_worker'), {
+            'date': self.day.isoformat(), 'task_type': 'guard_duty', 'time_slot': time_slot, 'worker_id': worker.id,
+        })
+
+    def test_assign_and_remove_are_counted(self):
+        """Test single assigns and removes count per task type, with their queue moves and counter changes."""
+        self.assign(self.first)
+        self.assign(self.second)
+        assignment = Assignment.objects.get(worker=self.first)
+        self.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+
+        self.assertEqual(metrics.ASSIGNMENTS_CREATED.value(task_type='guard_duty', source='single'), 2)
+        self.assertEqual(metrics.ASSIGNMENTS_REMOVED.value(task_type='guard_duty', source='single'), 1)
+        self.assertEqual(metrics.QUEUE_OPERATION_SECONDS.count(operation='move_to_end', task_type='guard_duty'), 2)
+        self.assertEqual(metrics.QUEUE_OPERATION_SECONDS.count(operation='move_to_front', task_type='guard_duty'), 1)
+        self.assertEqual(metrics.QUEUE_ROWS_WRITTEN.value(operation='move_to_end', task_type='guard_duty'), 2)
+        # Night shift: +1, +1, -1; multi-department bonus: +2, then -2
+        self.assertEqual(metrics.COUNTER_UPDATES.value(counter='hard_chores_counter', reason='assign'), 2)
+        self.assertEqual(metrics.COUNTER_UPDATES.value(counter='hard_chores_counter', reason='remove'), 1)
+        self.assertEqual(metrics.COUNTER_UPDATES.value(counter='outer_partner_counter', reason='remove'), 2)
+        self.assertEqual(metrics.VIEW_SECONDS.count(view='assign_worker', method='POST'), 2)
+
+    def test_bulk_and_roster_are_counted_by_source(self):
+        """Test bulk API and roster assignments are counted with their own source."""
+        self.post(reverse('assignments:bulk_assignments'), {
+            'create': [{'date': self.day.isoformat(), 'task_type': 'kitchen', 'worker_id': self.first.id}],
+        }, content_type='application/json')
+        self.post(reverse('assignments:generate_roster'), {'date': '2025-04-02'})
+
+        self.assertEqual(metrics.ASSIGNMENTS_CREATED.value(task_type='kitchen', source='bulk'), 1)
+        self.assertEqual(metrics.QUEUE_ROWS_WRITTEN.value(operation='bulk_move', task_type='kitchen'), 1)
+        roster = Assignment.objects.filter(date=date(2025, 4, 2))
+        for task_type in {assignment.task_type for assignment in roster}:
+            self.assertEqual(
+                metrics.ASSIGNMENTS_CREATED.value(task_type=task_type, source='roster'),
+                roster.filter(task_type=task_type).count(),
+            )
+        self.assertTrue(roster.exists())
+
+    def test_cache_hits_are_counted(self):
+        """Test calendar day and queue cache lookups are counted as hits and misses."""
+        url = f"{reverse('assignments:calendar')}?date={self.day.isoformat()}"
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(reverse('assignments:task_queue', args=['kitchen']))
+        self.client.get(reverse('assignments:task_queue', args=['kitchen']), HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(metrics.CACHE_REQUESTS.value(cache='calendar_day', result='miss'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value(cache='calendar_day', result='hit'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value(cache='queue', result='miss'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value(cache='queue', result='hit'), 1)
+
+    def test_client_values_do_not_add_series(self):
+        """Test unknown HTTP methods are labelled 'other' and unknown task types are rejected, not counted."""
+        self.client.generic('BREW', reverse('assignments:calendar'))
+        response = self.post(reverse('assignments:assign_worker'), {
+            'date': self.day.isoformat(), 'task_type': 'made_up', 'worker_id': self.first.id,
+        }, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Assignment.objects.exists())
+        self.assertEqual(metrics.VIEW_SECONDS.count(view='calendar_view', method='other'), 1)
+        body = metrics.registry.render()
+        self.assertNotIn('BREW', body)
+        self.assertNotIn('made_up', body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            metrics.assignments_changed(
+                metrics.ASSIGNMENTS_CREATED, [Assignment(task_type='made_up')], source='single'
+            )
+        self.assertEqual(metrics.ASSIGNMENTS_CREATED.value(task_type='other', source='single'), 1)
+
+    @override_settings(DEBUG=True)
+    def test_endpoint_serves_text_format(self):
+        """Test /metrics/ serves every metric in the Prometheus text format."""
+        self.assign(self.first)
+
+        response = self.client.get(reverse('assignments:metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('# TYPE assignments_created_total counter', body)
+        self.assertIn('assignments_created_total{task_type="guard_duty",source="single"} 1.0', body)
+        self.assertIn('# TYPE view_duration_seconds histogram', body)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_endpoint_token(self):
+        """Test a configured token is required as a bearer token."""
+        url = reverse('assignments:metrics')
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    def test_endpoint_without_token_needs_debug(self):
+        """Test /metrics/ is refused without a token unless DEBUG is on."""
+        url = reverse('assignments:metrics')
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(url).status_code, 200)
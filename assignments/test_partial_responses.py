@@ -0,0 +1,135 @@
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments.models import Assignment, QueueConflict, TaskQueue
+
+
+class SlotPartialResponseTest(TestCase):
+    """Test cases for the JSON replies of assign/remove to fetch() calls."""
+
+    def setUp(self):
+        """Set up two workers from different departments with queues."""
+        cache.clear()
+        self.client = Client()
+        self.day = date(2025, 4, 1)
+        self.first = Worker.objects.create(name="First Guard", title="soldier", department='1')
+        self.second = Worker.objects.create(name="Second Guard", title="soldier", department='2')
+        TaskQueue.initialize_workers([self.first.id, self.second.id])
+
+    def assign(self, worker, task_type='guard_duty', time_slot='01:00-03:00', **headers):
+        return self.client.post(reverse('assignments:assign_worker'), {
+            'date': self.day.isoformat(),
+            'task_type': task_type,
+            'time_slot': time_slot or '',
+            'worker_id': worker.id,
+        }, **headers)
+
+    def assign_json(self, worker, task_type='guard_duty', time_slot='01:00-03:00'):
+        return self.assign(worker, task_type, time_slot, HTTP_ACCEPT='application/json')
+
+    def test_assign_returns_slot_row_and_next_suggestion(self):
+        """Test assigning via fetch returns the re-rendered guard row and the advanced queue."""
+        response = self.assign_json(self.first)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['ok'])
+        self.assertEqual(data['target'], 'guard-slot-01:00-03:00')
+        self.assertIn('id="guard-slot-01:00-03:00"', data['html'])
+        self.assertIn("First Guard", data['html'])
+        self.assertIn('csrfmiddlewaretoken', data['html'])
+        # The assigned worker went to the back of the queue
+        self.assertEqual(data['queue_suggestions']['guard_duty']['id'], self.second.id)
+        self.assertEqual([entry['worker_id'] for entry in data['queue']], [self.second.id, self.first.id])
+        # Night shift counter is reported for the dropdown
+        self.assertEqual(data['workers'], [{
+            'id': self.first.id,
+            'name': "First Guard",
+            'title': self.first.get_title_display(),
+            'hard_chores_counter': 1,
+            'outer_partner_counter': 0,
+        }])
+
+    def test_assign_reports_every_counter_change(self):
+        """Test a multi-department bonus reports the counters of all workers in the slot."""
+        self.assign_json(self.first)
+        data = self.assign_json(self.second).json()
+
+        counters = {worker['id']: worker['outer_partner_counter'] for worker in data['workers']}
+        self.assertEqual(counters, {self.first.id: 1, self.second.id: 1})
+
+    def test_full_day_task_returns_its_card(self):
+        """Test a full-day task returns only its own card."""
+        data = self.assign_json(self.first, task_type='kitchen', time_slot=None).json()
+
+        self.assertEqual(data['target'], 'task-card-kitchen')
+        self.assertTrue(data['html'].startswith('<div class="card mb-3" id="task-card-kitchen">'))
+        self.assertIn("First Guard", data['html'])
+        self.assertIn('1/2', data['html'])
+
+    def test_remove_returns_emptied_slot(self):
+        """Test removing via fetch returns the slot without the worker, who is back at the front."""
+        self.assign(self.first)
+        assignment = Assignment.objects.get(worker=self.first)
+
+        response = self.client.post(
+            reverse('assignments:remove_assignment', args=[assignment.id]), HTTP_ACCEPT='application/json'
+        )
+
+        data = response.json()
+        self.assertTrue(data['ok'])
+        self.assertEqual(data['target'], 'guard-slot-01:00-03:00')
+        self.assertNotIn("First Guard", data['html'])
+        self.assertEqual(data['queue_suggestions']['guard_duty']['id'], self.first.id)
+        self.assertEqual(data['workers'][0]['hard_chores_counter'], 0)
+        self.assertFalse(Assignment.objects.filter(id=assignment.id).exists())
+
+    def test_errors_return_json(self):
+        """Test failures answer with a 400 JSON message instead of a redirect."""
+        response = self.client.post(reverse('assignments:assign_worker'), {
+            'date': 'not-a-date', 'task_type': 'guard_duty', 'worker_id': self.first.id,
+        }, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['ok'])
+
+        response = self.client.post(
+            reverse('assignments:remove_assignment', args=[9999]), HTTP_ACCEPT='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_queue_conflict_rolls_back(self):
+        """Test a change whose queue move loses to concurrent moves is undone and asks to try again."""
+        with mock.patch.object(TaskQueue, 'move_to_end', side_effect=QueueConflict):
+            response = self.assign_json(self.first)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('נסו שוב', response.json()['message'])
+        self.assertFalse(Assignment.objects.exists())
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.hard_chores_counter, 0)
+
+        self.assign(self.first)
+        assignment = Assignment.objects.get(worker=self.first)
+        with mock.patch.object(TaskQueue, 'move_to_front', side_effect=QueueConflict):
+            response = self.client.post(
+                reverse('assignments:remove_assignment', args=[assignment.id]), HTTP_ACCEPT='application/json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Assignment.objects.filter(id=assignment.id).exists())
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.hard_chores_counter, 1)
+
+    def test_form_posts_still_redirect(self):
+        """Test plain form posts keep the redirect back to the calendar."""
+        response = self.assign(self.first)
+        self.assertRedirects(
+            response, f"{reverse('assignments:calendar')}?date={self.day.isoformat()}", fetch_redirect_response=False
+        )
+
+        assignment = Assignment.objects.get(worker=self.first)
+        response = self.client.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+        self.assertRedirects(
+            response, f"{reverse('assignments:calendar')}?date={self.day.isoformat()}", fetch_redirect_response=False
+        )
@@ -0,0 +1,176 @@
+import json
+from datetime import date
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+from workers.models import Worker
+from assignments import profiling
+from assignments.models import TaskQueue
+
+
+class RequestProfileTest(TestCase):
+    """Test cases for recording the queries of a block of code."""
+
+    def setUp(self):
+        """Set up a few workers."""
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(6)]
+
+    def test_counts_queries_and_db_time(self):
+        """Test every query is counted and timed."""
+        with profiling.capture() as profile:
+            list(Worker.objects.all())
+            Worker.objects.count()
+
+        self.assertEqual(profile.queries, 2)
+        self.assertGreater(profile.db_time, 0)
+        self.assertGreaterEqual(profile.wall_time, profile.db_time)
+        self.assertEqual(profile.duplicates, 0)
+        self.assertEqual(profile.repeated, {})
+
+    def test_flags_query_in_loop_with_its_location(self):
+        """Test a statement repeated per worker is reported as N+1, pointing at the loop."""
+        with profiling.capture(repeat_threshold=5) as profile:
+            for worker in self.workers:
+                Worker.objects.get(id=worker.id)
+
+        [(sql, count)] = profile.repeated.items()
+        self.assertEqual(count, 6)
+        self.assertIn('workers_worker', sql)
+        self.assertIn('assignments/test_profiling.py', profile.locations[sql])
+        self.assertIn('test_flags_query_in_loop_with_its_location', profile.locations[sql])
+        # Different parameters each time: not duplicates
+        self.assertEqual(profile.duplicates, 0)
+
+    def test_counts_identical_queries_as_duplicates(self):
+        """Test running the very same query twice counts one duplicate."""
+        with profiling.capture() as profile:
+            Worker.objects.get(id=self.workers[0].id)
+            Worker.objects.get(id=self.workers[0].id)
+
+        self.assertEqual(profile.duplicates, 1)
+
+    def test_nothing_recorded_outside_capture(self):
+        """Test queries outside a profiled block are not recorded."""
+        with profiling.capture() as profile:
+            pass
+        Worker.objects.count()
+
+        self.assertEqual(profile.queries, 0)
+
+
+class ProfileRegistryTest(TestCase):
+    """Test cases for the rolling per-view aggregates."""
+
+    def setUp(self):
+        self.registry = profiling.ProfileRegistry()
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(5)]
+
+    def record(self, view, queries):
+        with profiling.capture() as profile:
+            for worker in self.workers[:queries]:
+                Worker.objects.get(id=worker.id)
+        self.registry.record(view, profile)
+
+    def test_snapshot_aggregates_per_view(self):
+        """Test each view gets its own request count, query figures and N+1 suspects."""
+        self.record('loop', 5)
+        self.record('loop', 1)
+        self.record('single', 1)
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['loop']['requests'], 2)
+        self.assertEqual(snapshot['loop']['queries']['mean'], 3.0)
+        self.assertEqual(snapshot['loop']['queries']['max'], 5)
+        self.assertEqual(len(snapshot['loop']['n_plus_one']), 1)
+        self.assertEqual(snapshot['loop']['n_plus_one'][0]['requests'], 1)
+        self.assertEqual(snapshot['loop']['n_plus_one'][0]['max_repeats'], 5)
+        self.assertEqual(snapshot['single']['n_plus_one'], [])
+
+    @override_settings(QUERY_PROFILING_WINDOW=2)
+    def test_window_keeps_latest_requests(self):
+        """Test the figures cover only the last QUERY_PROFILING_WINDOW requests."""
+        for queries in (5, 1, 2):
+            self.record('view', queries)
+
+        result = self.registry.snapshot()['view']
+        self.assertEqual(result['requests'], 3)
+        self.assertEqual(result['window'], 2)
+        self.assertEqual(result['queries']['max'], 2)
+
+
+class QueryProfilingMiddlewareTest(TestCase):
+    """Test cases for the profiling middleware and its stats page."""
+
+    def setUp(self):
+        """Set up workers with queues and an empty registry."""
+        cache.clear()
+        profiling.registry.reset()
+        self.addCleanup(profiling.registry.reset)
+        self.day = date(2025, 4, 1)
+        workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(3)]
+        TaskQueue.initialize_workers([worker.id for worker in workers])
+        self.calendar_url = f"{reverse('assignments:calendar')}?date={self.day.isoformat()}"
+
+    def test_disabled_by_default(self):
+        """Test nothing is recorded without QUERY_PROFILING."""
+        Client().get(self.calendar_url)
+
+        self.assertEqual(profiling.registry.snapshot(), {})
+
+    @override_settings(QUERY_PROFILING=True)
+    def test_records_requests_per_view(self):
+        """Test each request is recorded under its view's name with its queries."""
+        client = Client()
+        client.get(self.calendar_url)
+        client.get(reverse('workers:list'))
+
+        snapshot = profiling.registry.snapshot()
+        self.assertEqual(set(snapshot), {'assignments:calendar', 'workers:list'})
+        # An empty past day is also looked up in the archive
+        self.assertEqual(snapshot['assignments:calendar']['queries']['max'], 6)
+        self.assertEqual(snapshot['assignments:calendar']['n_plus_one'], [])
+
+    @override_settings(QUERY_PROFILING=True)
+    async def test_records_async_views(self):
+        """Test queries the async views run in sync_to_async threads are attributed to them."""
+        response = await AsyncClient().get(f"{reverse('assignments:calendar_async')}?date={self.day.isoformat()}")
+
+        self.assertEqual(response.status_code, 200)
+        snapshot = profiling.registry.snapshot()
+        self.assertGreater(snapshot['assignments:calendar_async']['queries']['max'], 0)
+
+    @override_settings(QUERY_PROFILING=True)
+    def test_stats_page_is_staff_only(self):
+        """Test the stats page sends others to the admin login and gives staff the aggregates."""
+        client = Client()
+        client.get(self.calendar_url)
+        url = reverse('assignments:profile_stats')
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        client.force_login(User.objects.create_user('officer', is_staff=True))
+        data = client.get(url).json()
+        self.assertTrue(data['enabled'])
+        self.assertEqual(data['views']['assignments:calendar']['requests'], 1)
+
+        client.post(url)
+        self.assertNotIn('assignments:calendar', client.get(url).json()['views'])
+
+
+class ProfileViewsCommandTest(TestCase):
+    """Test cases for the profile_views management command."""
+
+    def test_reports_profiled_paths(self):
+        """Test the command profiles the given path and prints the per-view report as JSON."""
+        out = StringIO()
+        call_command(
+            'profile_views', '--path', reverse('workers:list'), '--repeat', '2',
+            stdout=out, stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['workers:list']['requests'], 2)
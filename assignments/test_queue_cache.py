@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments import queue_cache
+from assignments.models import QueueVersion, TaskQueue
+
+
+class QueueCacheTest(TestCase):
+    """Test cases for the versioned queue cache."""
+
+    def setUp(self):
+        """Set up workers with initialized queues and clean counters."""
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(3)]
+        TaskQueue.initialize_workers([worker.id for worker in self.workers])
+        queue_cache.reset_stats()
+
+    def kitchen_order(self):
+        return [entry.worker for entry in queue_cache.get_queue('kitchen')]
+
+    def test_second_read_is_a_hit(self):
+        """Test an unchanged queue is served from the cache with only the version query."""
+        self.assertEqual(self.kitchen_order(), self.workers)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.kitchen_order(), self.workers)
+        self.assertEqual(queue_cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_moves_bump_only_their_task_type(self):
+        """Test move_to_end/move_to_front invalidate the moved task type only."""
+        queue_cache.get_queues()
+        guard_version = QueueVersion.objects.get(task_type='guard_duty').version
+
+        TaskQueue.move_to_end(self.workers[0], 'kitchen')
+        queues = queue_cache.get_queues()
+        self.assertEqual([entry.worker for entry in queues['kitchen']], self.workers[1:] + self.workers[:1])
+        self.assertEqual(queue_cache.stats()['misses'], 4 + 1)
+
+        TaskQueue.move_to_front(self.workers[0], 'kitchen')
+        self.assertEqual(self.kitchen_order(), self.workers)
+        self.assertEqual(QueueVersion.objects.get(task_type='guard_duty').version, guard_version)
+
+    def test_new_worker_invalidates(self):
+        """Test initialize_for_worker shows the new worker at the end of every queue."""
+        self.kitchen_order()
+        new_worker = Worker.objects.create(name="New Worker", title="commander")
+        TaskQueue.initialize_for_worker(new_worker)
+
+        self.assertEqual(self.kitchen_order()[-1], new_worker)
+
+    def test_worker_edit_and_deletion_invalidate(self):
+        """Test renamed and deleted workers are not served from a stale cache entry."""
+        self.kitchen_order()
+        self.workers[1].name = "Renamed"
+        self.workers[1].save()
+        self.assertEqual(self.kitchen_order()[1].name, "Renamed")
+
+        self.workers[1].delete()
+        self.assertEqual(self.kitchen_order(), [self.workers[0], self.workers[2]])
+
+    def test_bulk_move_invalidates(self):
+        """Test bulk queue moves (bulk API, roster) bump the version too."""
+        self.kitchen_order()
+        TaskQueue.bulk_move('kitchen', to_end=[self.workers[0].id])
+
+        self.assertEqual(self.kitchen_order()[-1], self.workers[0])
+
+
+class TaskQueueEndpointTest(TestCase):
+    """Test cases for the per-task-type queue endpoint."""
+
+    def setUp(self):
+        """Set up workers with initialized queues."""
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('assignments:task_queue', args=['kitchen'])
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(3)]
+        TaskQueue.initialize_workers([worker.id for worker in self.workers])
+
+    def test_returns_queue_in_order_with_suggestion(self):
+        """Test the queue comes in position order with its head as the suggestion."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['task_type'], 'kitchen')
+        self.assertEqual(data['suggestion']['id'], self.workers[0].id)
+        self.assertEqual([entry['worker_id'] for entry in data['queue']], [w.id for w in self.workers])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_unchanged_queue_is_not_modified(self):
+        """Test revalidating with the ETag gets a 304 from the version query alone."""
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_move_changes_etag(self):
+        """Test a queue move changes the ETag of that task type only."""
+        kitchen_etag = self.client.get(self.url)['ETag']
+        guard_url = reverse('assignments:task_queue', args=['guard_duty'])
+        guard_etag = self.client.get(guard_url)['ETag']
+
+        TaskQueue.move_to_end(self.workers[0], 'kitchen')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=kitchen_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['suggestion']['id'], self.workers[1].id)
+        self.assertEqual(self.client.get(guard_url, HTTP_IF_NONE_MATCH=guard_etag).status_code, 304)
+
+    def test_unknown_task_type(self):
+        """Test an unknown task type is a 404."""
+        response = self.client.get(reverse('assignments:task_queue', args=['laundry']))
+        self.assertEqual(response.status_code, 404)
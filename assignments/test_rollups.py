@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from workers.models import Worker
+from assignments.benchmarks import generate_history
+from assignments.models import Assignment, DailySummary, TaskQueue
+from assignments.rollups import HistoryReport, backfill, refresh
+
+
+class DailySummaryMaintenanceTest(TestCase):
+    """Test cases for keeping DailySummary current as assignments change."""
+
+    def setUp(self):
+        """Set up workers from two departments with queues."""
+        self.client = Client()
+        self.day = date(2025, 4, 1)
+        self.first = Worker.objects.create(name="First", title="soldier", department='1')
+        self.second = Worker.objects.create(name="Second", title="soldier", department='2')
+        self.commander = Worker.objects.create(name="Commander", title="commander", department='1')
+        TaskQueue.initialize_workers([self.first.id, self.second.id, self.commander.id])
+
+    def assign(self, worker, task_type='guard_duty', time_slot='01:00-03:00', day=None):
+        self.client.post(reverse('assignments:assign_worker'), {
+            'date': (day or self.day).isoformat(), 'task_type': task_type,
+            'time_slot': time_slot or '', 'worker_id': worker.id,
+        })
+
+    def test_assign_updates_day_summary(self):
+        """Test assigning counts the task type, night shifts and multi-department slots of the day."""
+        self.assign(self.first)
+        self.assign(self.second)
+        self.assign(self.commander, task_type='kitchen', time_slot=None)
+
+        summary = DailySummary.objects.get(date=self.day)
+        self.assertEqual(summary.guard_duty, 2)
+        self.assertEqual(summary.kitchen, 1)
+        self.assertEqual(summary.total, 3)
+        self.assertEqual(summary.night_shifts, 2)
+        self.assertEqual(summary.multi_department_slots, 1)
+        self.assertEqual(summary.night_shift_workers, {str(self.first.id): 1, str(self.second.id): 1})
+
+    def test_remove_updates_and_empties_day(self):
+        """Test removing updates the summary, and the last removal deletes it."""
+        self.assign(self.first)
+        self.assign(self.second)
+
+        self.client.post(reverse('assignments:remove_assignment', args=[Assignment.objects.get(worker=self.second).id]))
+        summary = DailySummary.objects.get(date=self.day)
+        self.assertEqual(summary.guard_duty, 1)
+        self.assertEqual(summary.multi_department_slots, 0)
+
+        self.client.post(reverse('assignments:remove_assignment', args=[Assignment.objects.get(worker=self.first).id]))
+        self.assertFalse(DailySummary.objects.filter(date=self.day).exists())
+
+    def test_moved_assignment_updates_both_days(self):
+        """Test editing an assignment's date moves it between the two days' summaries."""
+        self.assign(self.first)
+        self.assign(self.commander, task_type='kitchen', time_slot=None)
+        assignment = Assignment.objects.get(worker=self.first)
+
+        assignment.date = self.day + timedelta(days=1)
+        assignment.save()
+
+        self.assertEqual(DailySummary.objects.get(date=self.day).guard_duty, 0)
+        self.assertEqual(DailySummary.objects.get(date=self.day + timedelta(days=1)).night_shifts, 1)
+
+    def test_bulk_and_roster_update_summaries(self):
+        """Test the bulk API and the roster generator keep the summaries current."""
+        self.client.post(reverse('assignments:bulk_assignments'), {
+            'create': [{'date': self.day.isoformat(), 'task_type': 'kitchen', 'worker_id': self.first.id}],
+        }, content_type='application/json')
+        self.client.post(reverse('assignments:generate_roster'), {'date': '2025-04-02'})
+
+        self.assertEqual(DailySummary.objects.get(date=self.day).kitchen, 1)
+        roster_day = date(2025, 4, 2)
+        self.assertEqual(DailySummary.objects.get(date=roster_day).total, Assignment.objects.filter(date=roster_day).count())
+
+
+class BackfillTest(TestCase):
+    """Test cases for building the summaries from existing history."""
+
+    def setUp(self):
+        """Generate a short history (bulk inserted, so it has no summaries yet)."""
+        self.workers, self.start_date, self.end_date = generate_history(workers=30, days=10)
+
+    def snapshot(self):
+        fields = ['date', 'total', 'night_shifts', 'multi_department_slots', 'night_shift_workers']
+        return [[getattr(summary, field) for field in fields] for summary in DailySummary.objects.all()]
+
+    def test_backfill_matches_incremental_refresh(self):
+        """Test the backfill gives every day the same summary as incremental maintenance does."""
+        self.assertEqual(backfill(), 10)
+        backfilled = self.snapshot()
+
+        DailySummary.objects.all().delete()
+        refresh(self.start_date + timedelta(days=offset) for offset in range(10))
+
+        self.assertEqual(self.snapshot(), backfilled)
+        self.assertEqual([row[1] for row in backfilled], [33] * 10)
+        self.assertTrue(any(row[3] for row in backfilled))
+
+    def test_backfill_range_keeps_other_days(self):
+        """Test a ranged backfill only rebuilds (and replaces) that range."""
+        backfill()
+        DailySummary.objects.filter(date=self.end_date).update(kitchen=99)
+        DailySummary.objects.filter(date=self.start_date).update(kitchen=99)
+
+        backfill(start_date=self.end_date)
+
+        self.assertEqual(DailySummary.objects.get(date=self.end_date).kitchen, 2)
+        self.assertEqual(DailySummary.objects.get(date=self.start_date).kitchen, 99)
+
+    def test_command(self):
+        """Test backfill_summaries rebuilds the history and reports the number of days."""
+        out = StringIO()
+        call_command('backfill_summaries', stdout=out)
+
+        self.assertIn('Summarized 10 days', out.getvalue())
+        self.assertEqual(DailySummary.objects.count(), 10)
+
+
+class HistoryReportTest(TestCase):
+    """Test cases for the report read from the summaries."""
+
+    def setUp(self):
+        """Generate a history and its summaries."""
+        self.workers, self.start_date, self.end_date = generate_history(workers=30, days=20)
+        backfill()
+
+    def test_report_reads_summaries_only(self):
+        """Test a report costs two queries however many assignments the range holds."""
+        with self.assertNumQueries(2):
+            report = HistoryReport(self.start_date, self.end_date).as_dict()
+
+        self.assertEqual(len(report['days']), 20)
+        self.assertEqual(report['totals']['total'], Assignment.objects.count())
+        night_shifts = Assignment.objects.filter(task_type='guard_duty', time_slot__in=Assignment.NIGHT_SHIFT_SLOTS)
+        self.assertEqual(report['totals']['night_shifts'], night_shifts.count())
+
+    def test_night_shifts_by_worker(self):
+        """Test night shifts are totalled per worker, most first."""
+        report = HistoryReport(self.start_date, self.end_date)
+
+        night_shifts = Assignment.objects.filter(task_type='guard_duty', time_slot__in=Assignment.NIGHT_SHIFT_SLOTS)
+        worker, worker_id, count = report.night_shifts_by_worker[0]
+        self.assertEqual(count, night_shifts.filter(worker_id=worker_id).count())
+        counts = [count for _, _, count in report.night_shifts_by_worker]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(sum(counts), night_shifts.count())
+
+    def test_report_view(self):
+        """Test the report page renders a range and answers JSON requests with the same data."""
+        params = {'start': self.start_date.isoformat(), 'end': self.end_date.isoformat()}
+        response = self.client.get(reverse('assignments:report'), params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'משמרות לילה לפי לוחם')
+        self.assertEqual(len(response.context['report'].days), 20)
+
+        data = self.client.get(reverse('assignments:report'), params, HTTP_ACCEPT='application/json').json()
+        self.assertEqual(data['start_date'], self.start_date.isoformat())
+        self.assertEqual(len(data['days']), 20)
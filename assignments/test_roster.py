@@ -0,0 +1,249 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from workers.models import Worker
+from assignments.models import Assignment, QueueConflict, TaskQueue
+from assignments.roster import RosterGenerator
+
+
+class RosterGeneratorTest(TestCase):
+    """Test cases for the automatic roster generator."""
+
+    def setUp(self):
+        """Create enough workers for a full day (33 seats) and initialize queues."""
+        self.client = Client()
+        self.day = date(2025, 3, 1)
+        self.commanders = [
+            Worker.objects.create(name=f"Commander {i}", title="commander") for i in range(4)
+        ]
+        self.soldiers = [
+            Worker.objects.create(name=f"Soldier {i:02d}", title="soldier") for i in range(36)
+        ]
+        for worker in self.commanders + self.soldiers:
+            TaskQueue.initialize_for_worker(worker)
+
+    def test_fills_every_seat(self):
+        """Test all guard slots and full-day tasks are filled."""
+        plan = RosterGenerator().generate(self.day)
+
+        self.assertEqual(plan.unfilled, [])
+        for time_slot, _ in Assignment.TIME_SLOT_CHOICES:
+            self.assertEqual(
+                Assignment.objects.filter(date=self.day, task_type='guard_duty', time_slot=time_slot).count(),
+                Assignment.get_required_workers_for_slot(time_slot),
+            )
+        for task_type, required in Assignment.FULL_DAY_REQUIRED_WORKERS.items():
+            self.assertEqual(Assignment.objects.filter(date=self.day, task_type=task_type).count(), required)
+
+    def test_each_worker_used_once_per_day(self):
+        """Test no worker gets two assignments on the same date."""
+        RosterGenerator().generate(self.day)
+
+        worker_ids = list(Assignment.objects.filter(date=self.day).values_list('worker_id', flat=True))
+        self.assertEqual(len(worker_ids), len(set(worker_ids)))
+
+    def test_patrols_get_a_commander(self):
+        """Test each patrol gets exactly one commander who has the commander title."""
+        RosterGenerator().generate(self.day)
+
+        for task_type in ['patrol_a', 'patrol_b']:
+            commanders = Assignment.objects.filter(date=self.day, task_type=task_type, is_commander=True)
+            self.assertEqual(commanders.count(), 1)
+            self.assertEqual(commanders[0].worker.title, 'commander')
+
+    def test_follows_queue_order_and_rotates(self):
+        """Test guards are picked in queue order and moved to the end."""
+        initial_queue = [entry.worker for entry in TaskQueue.get_queue_for_task('guard_duty')]
+
+        RosterGenerator().generate(self.day)
+
+        full_day = {a.worker for a in Assignment.objects.filter(date=self.day, time_slot__isnull=True)}
+        expected_first = [w for w in initial_queue if w not in full_day][0]
+        first_slot = Assignment.objects.get(date=self.day, task_type='guard_duty', time_slot='07:00-09:00')
+        self.assertEqual(first_slot.worker, expected_first)
+
+        queue = list(TaskQueue.get_queue_for_task('guard_duty'))
+        self.assertEqual(queue[-1].worker.assignment_set.get(date=self.day).time_slot, '05:00-07:00')
+        self.assertEqual(len({entry.position for entry in queue}), len(queue))
+
+    def test_stale_plan_is_not_committed(self):
+        """Test a queue moved after planning makes the commit fail and roll back, keeping the move."""
+        generator = RosterGenerator()
+        plans = generator.plan_range(self.day, 1)
+        TaskQueue.move_to_end(self.soldiers[0], 'guard_duty')
+        queue = [entry.worker_id for entry in TaskQueue.get_queue_for_task('guard_duty')]
+
+        with self.assertRaises(QueueConflict):
+            generator.commit(plans)
+
+        self.assertFalse(Assignment.objects.filter(date=self.day).exists())
+        self.assertEqual([entry.worker_id for entry in TaskQueue.get_queue_for_task('guard_duty')], queue)
+        self.soldiers[0].refresh_from_db()
+        self.assertEqual(self.soldiers[0].hard_chores_counter, 0)
+
+    def test_view_reports_conflicts(self):
+        """Test the view answers a lost race with the try-again message instead of an error page."""
+        stale = {task_type: -1 for task_type, _ in TaskQueue.TASK_TYPE_CHOICES}
+        with mock.patch.object(TaskQueue, 'versions', return_value=stale):
+            response = self.client.post(
+                reverse('assignments:generate_roster'), {'date': self.day.isoformat()}, HTTP_ACCEPT='application/json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('נסו שוב', response.json()['message'])
+        self.assertFalse(Assignment.objects.filter(date=self.day).exists())
+
+    def test_keeps_existing_assignments(self):
+        """Test existing assignments are kept and only empty seats are filled."""
+        Assignment.objects.create(
+            date=self.day, task_type='patrol_a', worker=self.commanders[3], is_commander=True
+        )
+
+        RosterGenerator().generate(self.day)
+
+        self.assertEqual(Assignment.objects.filter(date=self.day, task_type='patrol_a').count(), 6)
+        self.assertEqual(
+            Assignment.objects.filter(date=self.day, task_type='patrol_a', is_commander=True).count(), 1
+        )
+
+    def test_night_shift_and_department_counters(self):
+        """Test night shifts and mixed-department slots update counters."""
+        Worker.objects.filter(id__in=[w.id for w in self.soldiers[:20]]).update(department='1')
+        Worker.objects.filter(id__in=[w.id for w in self.soldiers[20:]]).update(department='2')
+
+        RosterGenerator().generate(self.day)
+
+        for assignment in Assignment.objects.filter(date=self.day, time_slot__in=Assignment.NIGHT_SHIFT_SLOTS):
+            self.assertEqual(assignment.worker.hard_chores_counter, 1)
+
+        for time_slot, _ in Assignment.TIME_SLOT_CHOICES:
+            workers = [a.worker for a in Assignment.objects.filter(date=self.day, time_slot=time_slot)]
+            mixed = len({w.department for w in workers if w.department}) > 1
+            for worker in workers:
+                expected = 1 if mixed and worker.department else 0
+                self.assertEqual(worker.outer_partner_counter, expected)
+
+    def test_reports_unfilled_seats(self):
+        """Test seats are reported as unfilled when workers run out."""
+        Worker.objects.filter(id__in=[w.id for w in self.soldiers[10:]]).delete()
+
+        plan = RosterGenerator().generate(self.day)
+
+        self.assertTrue(plan.unfilled)
+        self.assertEqual(len(plan) + len(plan.unfilled), 33)
+
+    def test_dry_run_saves_nothing(self):
+        """Test a dry run plans assignments without writing them."""
+        plan = RosterGenerator().generate(self.day, dry_run=True)
+
+        self.assertEqual(len(plan), 33)
+        self.assertFalse(Assignment.objects.filter(date=self.day).exists())
+
+    def test_generate_roster_view(self):
+        """Test the calendar button fills the selected date."""
+        response = self.client.post(reverse('assignments:generate_roster'), {'date': self.day.isoformat()})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Assignment.objects.filter(date=self.day).count(), 33)
+
+    def test_generate_roster_command(self):
+        """Test the management command fills the given date."""
+        out = StringIO()
+        call_command('generate_roster', date=self.day.isoformat(), stdout=out)
+
+        self.assertIn('Successfully created 33 assignments', out.getvalue())
+        self.assertEqual(Assignment.objects.filter(date=self.day).count(), 33)
+
+
+class RosterBatchTest(TestCase):
+    """Test cases for multi-day roster planning."""
+
+    def setUp(self):
+        """Create a 60-worker company across departments with initialized queues."""
+        self.start = date(2025, 4, 1)
+        departments = ['1', '2', '3', '4']
+        self.workers = []
+        for i in range(60):
+            worker = Worker.objects.create(
+                name=f"Worker {i:02d}",
+                title='commander' if i < 8 else 'soldier',
+                department=departments[i % len(departments)],
+            )
+            TaskQueue.initialize_for_worker(worker)
+            self.workers.append(worker)
+
+    def shifts_by_worker(self):
+        """Get every committed shift as absolute hours, grouped by worker."""
+        shifts = {}
+        for a in Assignment.objects.filter(date__gte=self.start):
+            start, end = RosterGenerator.shift_hours(a.date, a.time_slot)
+            shifts.setdefault(a.worker_id, []).append((start, end, a.task_type == 'guard_duty'))
+        return shifts
+
+    def test_month_respects_hard_constraints(self):
+        """Test 30 days have no overlaps, respect the rest gap and give each patrol a commander."""
+        plans = RosterGenerator().generate_range(self.start, 30)
+
+        self.assertEqual(len(plans), 30)
+        self.assertEqual(sum(len(plan.unfilled) for plan in plans), 0)
+
+        for shifts in self.shifts_by_worker().values():
+            shifts.sort()
+            for (start_a, end_a, guard_a), (start_b, end_b, guard_b) in zip(shifts, shifts[1:]):
+                self.assertLessEqual(end_a, start_b)
+                if guard_a and guard_b:
+                    self.assertGreaterEqual(start_b - end_a, RosterGenerator.MIN_REST_HOURS)
+
+        for task_type in ['patrol_a', 'patrol_b']:
+            commanders = Assignment.objects.filter(task_type=task_type, is_commander=True)
+            self.assertEqual(commanders.count(), 30)
+            self.assertFalse(commanders.exclude(worker__title='commander').exists())
+
+    def test_rest_gap_across_existing_assignments(self):
+        """Test the rest gap is enforced against a shift on the day before the range."""
+        Assignment.objects.create(
+            date=self.start - timedelta(days=1), task_type='guard_duty',
+            time_slot='05:00-07:00', worker=self.workers[20]
+        )
+
+        RosterGenerator().generate(self.start)
+
+        morning = Assignment.objects.filter(date=self.start, time_slot__in=['07:00-09:00', '09:00-11:00', '11:00-13:00'])
+        self.assertNotIn(self.workers[20].id, [a.worker_id for a in morning])
+
+    def test_balances_night_shifts(self):
+        """Test night shifts spread evenly over the company."""
+        RosterGenerator().generate_range(self.start, 30)
+
+        counters = list(Worker.objects.values_list('hard_chores_counter', flat=True))
+        self.assertLessEqual(max(counters) - min(counters), 2)
+
+    def test_counters_match_assignments(self):
+        """Test committed counters match the night shifts and mixed slots planned."""
+        plans = RosterGenerator().generate_range(self.start, 7)
+
+        for worker in Worker.objects.all():
+            nights = Assignment.objects.filter(
+                worker=worker, time_slot__in=Assignment.NIGHT_SHIFT_SLOTS
+            ).count()
+            self.assertEqual(worker.hard_chores_counter, nights)
+
+        self.assertEqual(Assignment.objects.count(), sum(len(plan) for plan in plans))
+
+    def test_planning_uses_fixed_number_of_queries(self):
+        """Test planning loads workers, queue versions, queues and existing assignments once, whatever the range."""
+        with self.assertNumQueries(4):
+            RosterGenerator().plan_range(self.start, 7)
+        with self.assertNumQueries(4):
+            RosterGenerator().plan_range(self.start, 30)
+
+    def test_command_plans_several_days(self):
+        """Test the management command accepts a number of days."""
+        out = StringIO()
+        call_command('generate_roster', date=self.start.isoformat(), days=7, stdout=out)
+
+        self.assertEqual(Assignment.objects.filter(date__gte=self.start).values('date').distinct().count(), 7)
+        self.assertIn('Successfully created 231 assignments', out.getvalue())
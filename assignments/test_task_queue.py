@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from workers.models import Worker
-from assignments.models import TaskQueue
+from assignments.models import QueueConflict, QueueVersion, TaskQueue
 
 
 class TaskQueueTest(TestCase):
@@ -28,14 +34,12 @@ class TaskQueueTest(TestCase):
         # Worker1 is at position 0
         TaskQueue.move_to_end(self.worker1, 'kitchen')
         
-        # Check positions
+        # Check order
         queue = TaskQueue.get_queue_for_task('kitchen')
-        positions = [(q.worker.name, q.position) for q in queue]
+        names = [q.worker.name for q in queue]
         
-        # Worker1 should be at position 2 (end)
-        self.assertEqual(positions[0], ('Worker Two', 0))
-        self.assertEqual(positions[1], ('Worker Three', 1))
-        self.assertEqual(positions[2], ('Worker One', 2))
+        # Worker1 should be at the end
+        self.assertEqual(names, ['Worker Two', 'Worker Three', 'Worker One'])
     
     def test_move_to_end_from_middle(self):
         """Test moving a worker from middle position to end."""
@@ -43,12 +47,10 @@ class TaskQueueTest(TestCase):
         TaskQueue.move_to_end(self.worker2, 'kitchen')
         
         queue = TaskQueue.get_queue_for_task('kitchen')
-        positions = [(q.worker.name, q.position) for q in queue]
+        names = [q.worker.name for q in queue]
         
-        # Order should be: worker1(0), worker3(1), worker2(2)
-        self.assertEqual(positions[0], ('Worker One', 0))
-        self.assertEqual(positions[1], ('Worker Three', 1))
-        self.assertEqual(positions[2], ('Worker Two', 2))
+        # Order should be: worker1, worker3, worker2
+        self.assertEqual(names, ['Worker One', 'Worker Three', 'Worker Two'])
     
     def test_queue_rotation_sequence(self):
         """Test full queue rotation sequence."""
@@ -85,6 +87,51 @@ class TaskQueueTest(TestCase):
                 TaskQueue.objects.filter(worker=new_worker, task_type=task_type).exists()
             )
     
+    def test_initialize_appends_after_position_zero(self):
+        """Test new workers are queued after a head entry at position 0."""
+        TaskQueue.objects.filter(task_type='kitchen').exclude(worker=self.worker1).delete()
+        new_worker = Worker.objects.create(name="New Worker", title="soldier")
+        TaskQueue.initialize_for_worker(new_worker)
+        
+        entry = TaskQueue.objects.get(worker=new_worker, task_type='kitchen')
+        self.assertEqual(entry.position, 1)
+    
+    def test_initialize_workers_in_bulk(self):
+        """Test onboarding many workers takes a fixed number of queries and keeps their order."""
+        new_workers = Worker.objects.bulk_create([
+            Worker(name=f"Recruit {i}", title="soldier") for i in range(150)
+        ])
+        ids = [worker.id for worker in new_workers]
+        
+        with CaptureQueriesContext(connection) as queries:
+            created = TaskQueue.initialize_workers(ids + [self.worker1.id])
+        
+        # Existing entries and queue tails, insert batches (sized by the backend), one version bump
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('SELECT'), 2)
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertLessEqual(len(statements), 6)
+        self.assertEqual(created, 150 * 4 + 3)
+        kitchen = [entry.worker_id for entry in TaskQueue.get_queue_for_task('kitchen')]
+        self.assertEqual(kitchen, [self.worker1.id, self.worker2.id, self.worker3.id] + ids)
+        guard = [entry.worker_id for entry in TaskQueue.get_queue_for_task('guard_duty')]
+        self.assertEqual(guard, ids + [self.worker1.id])
+        self.assertEqual(TaskQueue.initialize_workers(ids), 0)
+    
+    def test_initialize_queues_command(self):
+        """Test the command fills every missing entry with a fixed number of queries."""
+        Worker.objects.bulk_create([Worker(name=f"Recruit {i}", title="soldier") for i in range(50)])
+        out = StringIO()
+        
+        # Worker ids, existing entries, queue tails, insert, version bump, queue display
+        with self.assertNumQueries(6):
+            call_command('initialize_queues', stdout=out)
+        
+        self.assertIn('Successfully initialized 209 queue entries', out.getvalue())
+        self.assertEqual(TaskQueue.objects.count(), 53 * 4)
+        call_command('initialize_queues', stdout=out)
+        self.assertIn('All queues already initialized', out.getvalue())
+    
     def test_get_queue_for_task(self):
         """Test retrieving full queue for a task."""
         queue = TaskQueue.get_queue_for_task('kitchen')
@@ -95,17 +142,68 @@ class TaskQueueTest(TestCase):
         self.assertEqual(queue[1].worker, self.worker2)
         self.assertEqual(queue[2].worker, self.worker3)
     
-    def test_queue_positions_are_sequential(self):
-        """Test that positions remain sequential after operations."""
-        # Move first worker to end
+    def test_queue_positions_are_unique(self):
+        """Test that positions stay unique and increasing after operations."""
         TaskQueue.move_to_end(self.worker1, 'kitchen')
+        TaskQueue.move_to_front(self.worker3, 'kitchen')
+        TaskQueue.move_to_end(self.worker2, 'kitchen')
         
-        # Get all positions
         queue = TaskQueue.get_queue_for_task('kitchen')
         positions = [q.position for q in queue]
         
-        # Should be [0, 1, 2]
-        self.assertEqual(positions, [0, 1, 2])
+        self.assertEqual(positions, sorted(set(positions)))
+        self.assertEqual([q.worker for q in queue], [self.worker3, self.worker1, self.worker2])
+    
+    def test_move_to_end_when_already_last(self):
+        """Test moving the tail worker to the end keeps its position."""
+        TaskQueue.move_to_end(self.worker3, 'kitchen')
+        
+        entry = TaskQueue.objects.get(worker=self.worker3, task_type='kitchen')
+        self.assertEqual(entry.position, 2)
+    
+    def test_move_creates_missing_entry(self):
+        """Test moving a worker without a queue entry creates one."""
+        new_worker = Worker.objects.create(name="New Worker", title="soldier")
+        
+        TaskQueue.move_to_front(new_worker, 'kitchen')
+        self.assertEqual(TaskQueue.get_next_worker('kitchen'), new_worker)
+        
+        TaskQueue.move_to_end(new_worker, 'guard_duty')
+        self.assertEqual(TaskQueue.get_next_worker('guard_duty'), new_worker)
+    
+    def test_move_query_count_is_constant(self):
+        """Test moving a worker does not touch every entry in the queue."""
+        for i in range(30):
+            worker = Worker.objects.create(name=f"Extra {i}", title="soldier")
+            TaskQueue.objects.create(worker=worker, task_type='kitchen', position=i + 3)
+        
+        # Savepoint pair, the queue version, one aggregate for the head/tail, one UPDATE
+        # for the moved row and the compare-and-swap of the queue version
+        with self.assertNumQueries(6):
+            TaskQueue.move_to_end(self.worker1, 'kitchen')
+        with self.assertNumQueries(6):
+            TaskQueue.move_to_front(self.worker1, 'kitchen')
+    
+    def test_rebalance_keeps_order(self):
+        """Test rebalancing renumbers positions sequentially without changing order."""
+        TaskQueue.move_to_front(self.worker3, 'kitchen')
+        TaskQueue.move_to_end(self.worker1, 'kitchen')
+        
+        TaskQueue.rebalance('kitchen')
+        
+        queue = TaskQueue.get_queue_for_task('kitchen')
+        self.assertEqual([q.position for q in queue], [0, 1, 2])
+        self.assertEqual([q.worker for q in queue], [self.worker3, self.worker2, self.worker1])
+    
+    def test_rebalance_triggered_past_limit(self):
+        """Test positions are renumbered once they drift past the limit."""
+        TaskQueue.objects.filter(worker=self.worker3).update(position=TaskQueue.REBALANCE_LIMIT - 1)
+        
+        TaskQueue.move_to_end(self.worker1, 'kitchen')
+        
+        queue = TaskQueue.get_queue_for_task('kitchen')
+        self.assertEqual([q.position for q in queue], [0, 1, 2])
+        self.assertEqual([q.worker for q in queue], [self.worker2, self.worker3, self.worker1])
     
     def test_move_to_front(self):
         """Test moving a worker to the front of the queue."""
@@ -113,12 +211,10 @@ class TaskQueueTest(TestCase):
         TaskQueue.move_to_front(self.worker3, 'kitchen')
         
         queue = TaskQueue.get_queue_for_task('kitchen')
-        positions = [(q.worker.name, q.position) for q in queue]
+        names = [q.worker.name for q in queue]
         
-        # Worker3 should be at position 0
-        self.assertEqual(positions[0], ('Worker Three', 0))
-        self.assertEqual(positions[1], ('Worker One', 1))
-        self.assertEqual(positions[2], ('Worker Two', 2))
+        # Worker3 should be first
+        self.assertEqual(names, ['Worker Three', 'Worker One', 'Worker Two'])
     
     def test_assign_then_remove_cycle(self):
         """Test assign/remove cycle returns worker to front."""
@@ -140,3 +236,55 @@ class TaskQueueTest(TestCase):
         after_remove = TaskQueue.get_next_worker('kitchen')
         self.assertEqual(after_remove, self.worker1)
 
+
+class OptimisticQueueTest(TestCase):
+    """Test cases for the compare-and-swap retry of queue changes."""
+
+    def setUp(self):
+        """Set up three workers in the kitchen queue."""
+        self.workers = [Worker.objects.create(name=f"Worker {i}", title="soldier") for i in range(3)]
+        TaskQueue.initialize_workers([worker.id for worker in self.workers])
+        self.place = TaskQueue._place
+
+    def concurrent_change(self, times):
+        """A _place that lets another writer change the kitchen queue first, `times` times."""
+        calls = []
+
+        def place(worker, task_type, position):
+            calls.append(position)
+            if len(calls) <= times:
+                # Another officer moved someone to the end meanwhile
+                TaskQueue.objects.filter(worker=self.workers[2], task_type='kitchen').update(position=position)
+                QueueVersion.objects.filter(task_type='kitchen').update(version=F('version') + 1)
+            self.place(worker, task_type, position)
+
+        return calls, place
+
+    def test_conflict_is_retried_with_fresh_data(self):
+        """Test a move that raced another change is redone after it, without duplicate positions."""
+        calls, place = self.concurrent_change(times=1)
+        with mock.patch.object(TaskQueue, '_place', side_effect=place):
+            TaskQueue.move_to_end(self.workers[0], 'kitchen')
+
+        self.assertEqual(len(calls), 2)
+        queue = list(TaskQueue.objects.filter(task_type='kitchen').order_by('position'))
+        self.assertEqual([entry.worker for entry in queue], [self.workers[1], self.workers[2], self.workers[0]])
+        self.assertEqual(len({entry.position for entry in queue}), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test a queue that keeps changing raises QueueConflict and leaves the move undone."""
+        calls, place = self.concurrent_change(times=TaskQueue.MAX_ATTEMPTS)
+        head = TaskQueue.objects.get(worker=self.workers[0], task_type='kitchen').position
+        with mock.patch.object(TaskQueue, '_place', side_effect=place), mock.patch('assignments.models.time.sleep'):
+            with self.assertRaises(QueueConflict):
+                TaskQueue.move_to_end(self.workers[0], 'kitchen')
+
+        self.assertEqual(len(calls), TaskQueue.MAX_ATTEMPTS)
+        self.assertEqual(TaskQueue.objects.get(worker=self.workers[0], task_type='kitchen').position, head)
+
+    def test_successful_change_bumps_version_once(self):
+        """Test the compare-and-swap bumps the queue version exactly once."""
+        version = QueueVersion.objects.get(task_type='kitchen').version
+        TaskQueue.move_to_front(self.workers[2], 'kitchen')
+
+        self.assertEqual(QueueVersion.objects.get(task_type='kitchen').version, version + 1)
@@ -5,7 +5,17 @@ app_name = 'assignments'
 
 urlpatterns = [
     path('calendar/', views.calendar_view, name='calendar'),
+    path('calendar/async/', views.calendar_view_async, name='calendar_async'),
+    path('calendar/events/', views.calendar_events, name='calendar_events'),
+    path('calendar/week/', views.calendar_week_view, name='calendar_week'),
+    path('calendar/month/', views.calendar_month_view, name='calendar_month'),
     path('assign-worker/', views.assign_worker, name='assign_worker'),
     path('remove-assignment/<int:assignment_id>/', views.remove_assignment, name='remove_assignment'),
+    path('reports/', views.history_report, name='report'),
+    path('generate-roster/', views.generate_roster, name='generate_roster'),
+    path('api/assignments/bulk/', views.bulk_assignments, name='bulk_assignments'),
+    path('api/queues/<str:task_type>/', views.task_queue, name='task_queue'),
+    path('debug/profile/', views.profile_stats, name='profile_stats'),
+    path('metrics/', views.metrics_export, name='metrics'),
 ]
 
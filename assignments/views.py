@@ -1,169 +1,374 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, OperationalError, transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from datetime import date
-from .models import Assignment, TaskQueue
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition, require_GET, require_http_methods, require_POST
+from datetime import date, timedelta
+from .models import Assignment, QueueConflict, TaskQueue
+from .schedule import DaySchedule, ScheduleGrid
+from . import events, fragments, metrics, profiling, queue_cache
+from .roster import RosterGenerator
+from .rollups import HistoryReport
+from .counters import apply_counter_deltas, managed_changes
+from .bulk import TASK_TYPES, apply_bulk_changes
+from workers.conditional import aconditional, atable_state, page_etag, table_state
 from workers.models import Worker
-from .counter_logic import check_multi_department_slot
+from .counter_logic import bonus_deltas, slot_rows
 import json
 
 
-def calendar_view(request):
-    """Main calendar view for creating and viewing assignments."""
-    
-    # Get selected date from query params or use today
-    selected_date_str = request.GET.get('date')
-    if selected_date_str:
+def _date_param(request, name, default):
+    """Get a date from a query param, falling back to default when missing or invalid."""
+    value = request.GET.get(name)
+    if value:
         try:
-            selected_date = date.fromisoformat(selected_date_str)
+            return date.fromisoformat(value)
         except ValueError:
-            selected_date = date.today()
-    else:
-        selected_date = date.today()
+            pass
+    return default
+
+
+def _selected_date(request):
+    """Get the date from the ?date= query param, falling back to today."""
+    return _date_param(request, 'date', date.today())
+
+
+def _calendar_etag(request):
+    """The day page shows the date's assignments and every worker (dropdown with counters)."""
+    selected_date = _selected_date(request)
+    return page_etag(
+        request,
+        selected_date,
+        date.today(),
+        table_state(Assignment.objects.filter(date=selected_date)),
+        table_state(Worker.objects.all()),
+    )
+
+
+@metrics.timed_view
+@condition(etag_func=_calendar_etag)
+def calendar_view(request):
+    """Main calendar view for creating and viewing assignments.
     
-    # Get all time slots
-    time_slots = [choice[0] for choice in Assignment.TIME_SLOT_CHOICES]
+    Answers 304 Not Modified (two aggregate queries) when neither the day's
+    assignments nor the workers changed since the client's copy.
+    """
+    
+    # Get selected date from query params or use today
+    selected_date = _selected_date(request)
     
     # Get all workers for selection
     all_workers = Worker.objects.all().order_by('title', 'name')
     
-    # Get queue suggestions for each task type
-    queue_suggestions = {}
-    for task_type, _ in Assignment.TASK_TYPE_CHOICES:
-        suggested_worker = TaskQueue.get_next_worker(task_type)
-        if suggested_worker:
-            queue_suggestions[task_type] = {
-                'id': suggested_worker.id,
-                'name': suggested_worker.name,
-                'title': suggested_worker.get_title_display(),
-            }
-        else:
-            queue_suggestions[task_type] = None
-    
-    # Get full queue for display
-    task_queues = {}
-    for task_type, _ in Assignment.TASK_TYPE_CHOICES:
-        task_queues[task_type] = TaskQueue.get_queue_for_task(task_type)
-    
-    # Build guard duty schedule
-    schedule_data = []
-    for time_slot in time_slots:
-        guard_workers = Assignment.objects.filter(
-            date=selected_date,
-            time_slot=time_slot,
-            task_type='guard_duty'
-        ).select_related('worker')
-        
-        required_workers = Assignment.get_required_workers_for_slot(time_slot)
-        
-        schedule_data.append({
-            'time_slot': time_slot,
-            'guard_workers': guard_workers,
-            'required_workers': required_workers,
-        })
-    
-    # Get full-day task assignments
-    kitchen_workers = Assignment.objects.filter(
-        date=selected_date,
-        task_type='kitchen',
-        time_slot__isnull=True
-    ).select_related('worker')
-    
-    patrol_a_workers = Assignment.objects.filter(
-        date=selected_date,
-        task_type='patrol_a',
-        time_slot__isnull=True
-    ).select_related('worker')
-    
-    patrol_b_workers = Assignment.objects.filter(
-        date=selected_date,
-        task_type='patrol_b',
-        time_slot__isnull=True
-    ).select_related('worker')
+    # The guard table and full-day cards are cached per date; assignments are
+    # only loaded when they have to be rendered again. Queues are not part of
+    # the page: the add worker dialog fetches the one it shows (task_queue)
+    key, day_fragments = fragments.lookup(selected_date)
+    if day_fragments is None:
+        day_fragments = fragments.render(DaySchedule.load_assignments(selected_date), key)
     
+    return _calendar_response(request, selected_date, day_fragments, all_workers)
+
+
+def _calendar_response(request, selected_date, day_fragments, all_workers):
     context = {
         'selected_date': selected_date,
-        'schedule_data': schedule_data,
-        'kitchen_workers': kitchen_workers,
-        'patrol_a_workers': patrol_a_workers,
-        'patrol_b_workers': patrol_b_workers,
+        'fragments': fragments.for_request(day_fragments, request),
         'all_workers': all_workers,
-        'queue_suggestions': queue_suggestions,
-        'queue_suggestions_json': json.dumps(queue_suggestions),
-        'task_queues': task_queues,
         'today': date.today(),
     }
     
-    return render(request, 'assignments/calendar.html', context)
+    response = render(request, 'assignments/calendar.html', context)
+    # Let browsers keep the page, but always revalidate it
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@metrics.timed_view
+async def calendar_view_async(request):
+    """Async version of calendar_view (Django's async ORM), for the ASGI entry point.
+    
+    Independent reads run concurrently: the two validator queries, then the
+    worker list and (when the day's fragments are not cached) the day's
+    assignments.
+    """
+    selected_date = _selected_date(request)
+    
+    async def build_response():
+        workers_query = Worker.objects.all().order_by('title', 'name')
+        key, day_fragments = await fragments.alookup(selected_date)
+        if day_fragments is None:
+            all_workers, day = await asyncio.gather(
+                _alist(workers_query), DaySchedule.aload_assignments(selected_date)
+            )
+            day_fragments = await sync_to_async(fragments.render)(day, key)
+        else:
+            all_workers = await _alist(workers_query)
+        # Template rendering may read the session (flash messages): keep it in the sync thread
+        return await sync_to_async(_calendar_response)(request, selected_date, day_fragments, all_workers)
+    
+    states = await asyncio.gather(
+        atable_state(Assignment.objects.filter(date=selected_date)),
+        atable_state(Worker.objects.all()),
+    )
+    return await aconditional(request, [selected_date, date.today(), *states], build_response)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def calendar_events(request):
+    """Server-sent events stream of a date's assignment and queue changes (?date=).
+    
+    Needs the ASGI entry point: under WSGI a stream would hold a worker
+    thread for as long as the page is open, so it answers 204, which tells
+    EventSource not to reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(events.stream(_selected_date(request)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@metrics.timed_view
+def calendar_week_view(request):
+    """Week overview (Sunday to Saturday): dates × slots grid from one range query."""
+    selected_date = _selected_date(request)
+    grid = ScheduleGrid.week(selected_date)
+    context = {
+        'period': 'week',
+        'selected_date': selected_date,
+        'grid': grid,
+        'previous_date': grid.start_date - timedelta(days=7),
+        'next_date': grid.start_date + timedelta(days=7),
+        'today': date.today(),
+    }
+    return render(request, 'assignments/calendar_range.html', context)
+
+
+@metrics.timed_view
+def calendar_month_view(request):
+    """Month overview: dates × slots grid from one range query."""
+    selected_date = _selected_date(request)
+    grid = ScheduleGrid.month(selected_date)
+    context = {
+        'period': 'month',
+        'selected_date': selected_date,
+        'grid': grid,
+        'previous_date': grid.start_date - timedelta(days=1),
+        'next_date': grid.end_date + timedelta(days=1),
+        'today': date.today(),
+    }
+    return render(request, 'assignments/calendar_range.html', context)
+
+
+def _queue_etag(request, task_type):
+    return queue_cache.etag(task_type)
+
+
+@metrics.timed_view
+@require_GET
+@condition(etag_func=_queue_etag)
+def task_queue(request, task_type):
+    """JSON API: one task type's queue in order, with its head as the suggestion.
+    
+    The ETag follows the queue version, so a client revalidating with
+    If-None-Match gets a 304 (one query) until the queue changes.
+    """
+    if task_type not in queue_cache.TASK_TYPES:
+        raise Http404(f'Unknown task type: {task_type}')
+    
+    entries = queue_cache.get_queue(task_type)
+    head = entries[0].worker if entries else None
+    response = JsonResponse({
+        'task_type': task_type,
+        'suggestion': {'id': head.id, 'name': head.name, 'title': head.get_title_display()} if head else None,
+        'queue': queue_cache.serialize(entries),
+    })
+    # Cacheable, but always revalidated
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@metrics.timed_view
+def history_report(request):
+    """History report of a date range (?start=&end=, default the last 30 days) from the daily summaries.
+    
+    Reads one DailySummary row per day instead of every assignment; answers
+    requests asking for JSON with the same data.
+    """
+    end_date = _date_param(request, 'end', date.today())
+    start_date = _date_param(request, 'start', end_date - timedelta(days=29))
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+    
+    report = HistoryReport(start_date, end_date)
+    if _wants_json(request):
+        return JsonResponse(report.as_dict())
+    return render(request, 'assignments/report.html', {'report': report})
+
+
+def _wants_json(request):
+    """True for fetch() calls from the calendar, which ask for JSON instead of a redirect."""
+    return 'application/json' in request.headers.get('Accept', '')
+
+
+def _slot_response(request, level, message, selected_date, task_type, time_slot, worker_ids):
+    """JSON reply to an assign/remove fetch: the re-rendered slot plus the refreshed queues.
+
+    Carries the slot's new HTML (a guard table row or a full-day task card),
+    the queue suggestions of every task type, the changed task type's queue
+    and the current counters of the workers whose counters may have changed,
+    so the page can update in place without reloading.
+    """
+    day = DaySchedule.load_queues(selected_date)
+    workers = Worker.objects.filter(id__in=worker_ids).order_by('id')
+    return JsonResponse({
+        'ok': True,
+        'level': level,
+        'message': message,
+        'date': selected_date.isoformat(),
+        'task_type': task_type,
+        'time_slot': time_slot,
+        'target': fragments.slot_element_id(task_type, time_slot),
+        'html': fragments.render_slot(request, selected_date, task_type, time_slot),
+        'queue_suggestions': day.queue_suggestions,
+        'queue': day.queue_as_list(task_type),
+        'workers': [
+            {
+                'id': worker.id,
+                'name': worker.name,
+                'title': worker.get_title_display(),
+                'hard_chores_counter': worker.hard_chores_counter,
+                'outer_partner_counter': worker.outer_partner_counter,
+            }
+            for worker in workers
+        ],
+    })
+
+
+def _error_response(request, message, redirect_to):
+    if _wants_json(request):
+        return JsonResponse({'ok': False, 'level': 'error', 'message': message}, status=400)
+    messages.error(request, message)
+    return redirect(redirect_to)
+
+
+# Shown when a change lost to concurrent changes (QueueConflict, or SQLite's lock) and was rolled back
+CONFLICT_MESSAGE = 'השינוי לא נשמר כי התור עודכן במקביל. נסו שוב.'
+
+
+def _is_conflict(error):
+    """Whether a failed change lost to concurrent changes, so retrying it may succeed."""
+    return isinstance(error, QueueConflict) or (isinstance(error, OperationalError) and 'locked' in str(error))
 
 
+@metrics.timed_view
 def assign_worker(request):
-    """Assign a worker to a task and update queue."""
+    """Assign a worker to a task and update queue.
+    
+    Form posts are redirected back to the calendar; fetch() calls asking for
+    JSON get the re-rendered slot and queues instead (see _slot_response).
+    """
     if request.method == 'POST':
         selected_date_str = request.POST.get('date')
         task_type = request.POST.get('task_type')
         time_slot = request.POST.get('time_slot', None) or None
         worker_id = request.POST.get('worker_id')
         is_commander = request.POST.get('is_commander') == 'on'
+        calendar_url = f"{reverse('assignments:calendar')}?date={selected_date_str}"
         
         try:
             selected_date = date.fromisoformat(selected_date_str)
+            if task_type not in TASK_TYPES:
+                raise ValueError(f'Unknown task type: {task_type}')
             worker = Worker.objects.get(id=worker_id)
             
-            # Create the assignment
-            Assignment.objects.create(
-                date=selected_date,
-                time_slot=time_slot,
-                task_type=task_type,
-                worker=worker,
-                is_commander=is_commander
-            )
-            
-            # Check if this is a night shift (01:00-03:00 or 03:00-05:00)
-            night_shift_slots = ['01:00-03:00', '03:00-05:00']
-            is_night_shift = task_type == 'guard_duty' and time_slot in night_shift_slots
-            
-            if is_night_shift:
-                worker.hard_chores_counter += 1
-                worker.save()
-            
-            # Check for multi-department bonus (guard duty only)
-            if task_type == 'guard_duty' and time_slot:
-                has_diff_depts, worker_ids = check_multi_department_slot(selected_date, time_slot)
+            # The assignment, its counters and the queue rotation commit together or not at all
+            with transaction.atomic():
+                # Create the assignment (its counter changes are applied below)
+                with managed_changes():
+                    assignment = Assignment.objects.create(
+                        date=selected_date,
+                        time_slot=time_slot,
+                        task_type=task_type,
+                        worker=worker,
+                        is_commander=is_commander
+                    )
+                
+                # Check if this is a night shift (01:00-03:00 or 03:00-05:00)
+                is_night_shift = Assignment.is_night_shift(task_type, time_slot)
+                hard_chores_deltas = {worker.id: 1} if is_night_shift else {}
+                outer_partner_deltas = {}
+                
+                # Multi-department bonus (guard duty only): credit the workers who hold it
+                # now but did not before, as the bulk API, roster and ledger do
+                if task_type == 'guard_duty' and time_slot:
+                    after_rows = slot_rows(selected_date, time_slot)
+                    before_rows = [row for row in after_rows if row[0] != worker.id]
+                    outer_partner_deltas = bonus_deltas(before_rows, after_rows)
+                has_diff_depts = bool(outer_partner_deltas)
+                
+                # All counter changes in one UPDATE
+                apply_counter_deltas(
+                    reason='assign',
+                    assignment_id=assignment.id,
+                    hard_chores_counter=hard_chores_deltas,
+                    outer_partner_counter=outer_partner_deltas,
+                )
                 
-                if has_diff_depts:
-                    # Increment outer_partner_counter for all workers with departments in this slot
-                    for wid in worker_ids:
-                        w = Worker.objects.get(id=wid)
-                        w.outer_partner_counter += 1
-                        w.save()
-                    
-                    if is_night_shift:
-                        messages.success(request, f'{worker.name} שובץ למשמרת לילה עם שותפים ממחלקות שונות! מונים עודכנו.')
-                    else:
-                        messages.success(request, f'{worker.name} שובץ עם שותפים ממחלקות שונות! מונה שותף חיצוני עלה.')
+                if has_diff_depts and is_night_shift:
+                    message = f'{worker.name} שובץ למשמרת לילה עם שותפים ממחלקות שונות! מונים עודכנו.'
+                elif has_diff_depts:
+                    message = f'{worker.name} שובץ עם שותפים ממחלקות שונות! מונה שותף חיצוני עלה.'
                 elif is_night_shift:
-                    messages.success(request, f'{worker.name} שובץ למשמרת לילה! מונה משימות קשות עלה.')
+                    message = f'{worker.name} שובץ למשמרת לילה! מונה משימות קשות עלה.'
                 else:
-                    messages.success(request, f'{worker.name} שובץ בהצלחה!')
-            elif is_night_shift:
-                messages.success(request, f'{worker.name} שובץ למשמרת לילה! מונה משימות קשות עלה.')
-            else:
-                messages.success(request, f'{worker.name} שובץ בהצלחה!')
-            
-            # Move worker to end of queue for this task type
-            TaskQueue.move_to_end(worker, task_type)
+                    message = f'{worker.name} שובץ בהצלחה!'
+                
+                # Move worker to end of queue for this task type
+                TaskQueue.move_to_end(worker, task_type)
+            metrics.assignments_changed(metrics.ASSIGNMENTS_CREATED, [assignment], source='single')
             
         except (ValueError, Worker.DoesNotExist) as e:
-            messages.error(request, f'Error: {str(e)}')
+            return _error_response(request, f'Error: {str(e)}', calendar_url)
+        except (QueueConflict, OperationalError) as e:
+            if not _is_conflict(e):
+                raise
+            return _error_response(request, CONFLICT_MESSAGE, calendar_url)
         
-        return redirect(f"{reverse('assignments:calendar')}?date={selected_date_str}")
+        if _wants_json(request):
+            return _slot_response(
+                request, 'success', message, selected_date, task_type, time_slot,
+                {worker.id, *outer_partner_deltas},
+            )
+        messages.success(request, message)
+        return redirect(calendar_url)
     
     return redirect('assignments:calendar')
 
 
+@metrics.timed_view
 def remove_assignment(request, assignment_id):
-    """Remove an assignment and move worker back to front of queue."""
+    """Remove an assignment and move worker back to front of queue.
+    
+    Answers fetch() calls asking for JSON like assign_worker does.
+    """
     if request.method == 'POST':
         try:
             assignment = get_object_or_404(Assignment, id=assignment_id)
@@ -172,57 +377,168 @@ def remove_assignment(request, assignment_id):
             task_type = assignment.task_type
             time_slot = assignment.time_slot
             
-            # Check if this was a night shift
-            night_shift_slots = ['01:00-03:00', '03:00-05:00']
-            is_night_shift = task_type == 'guard_duty' and time_slot in night_shift_slots
-            
-            # For guard duty, check multi-department status BEFORE deletion
-            had_different_depts_before = False
-            workers_with_dept_before = []
-            
-            if task_type == 'guard_duty' and time_slot:
-                had_different_depts_before, workers_with_dept_before = check_multi_department_slot(
-                    assignment.date, time_slot
-                )
-            
-            # Delete the assignment
-            assignment.delete()
-            
-            # Check multi-department status AFTER deletion
-            if task_type == 'guard_duty' and time_slot:
-                has_different_depts_after, workers_with_dept_after = check_multi_department_slot(
-                    assignment.date, time_slot
-                )
+            # The removal, its counters and the queue rotation commit together or not at all
+            with transaction.atomic():
+                # Check if this was a night shift
+                is_night_shift = Assignment.is_night_shift(task_type, time_slot)
                 
-                # If we had bonus before but not after, decrement remaining workers
-                if had_different_depts_before and not has_different_depts_after:
-                    for wid in workers_with_dept_after:
-                        w = Worker.objects.get(id=wid)
-                        w.outer_partner_counter = max(0, w.outer_partner_counter - 1)
-                        w.save()
+                # Delete the assignment (its counter changes are applied below)
+                with managed_changes():
+                    assignment.delete()
                 
-                # Decrement the removed worker if they had the bonus
-                if worker and worker.id in workers_with_dept_before and had_different_depts_before:
-                    worker.outer_partner_counter = max(0, worker.outer_partner_counter - 1)
-                    worker.save()
-            
-            # Move worker back to front of queue for this task
-            if worker:
-                TaskQueue.move_to_front(worker, task_type)
+                hard_chores_deltas = {}
+                outer_partner_deltas = {}
+                
+                # Multi-department bonus: take it from the workers who held it before
+                # the removal but not after (the removed worker, or the whole slot)
+                if task_type == 'guard_duty' and time_slot:
+                    after_rows = slot_rows(assignment.date, time_slot)
+                    before_rows = after_rows + ([(worker.id, worker.department)] if worker else [])
+                    outer_partner_deltas = bonus_deltas(before_rows, after_rows)
                 
                 # Decrement hard chores counter if it was night shift
+                if worker and is_night_shift:
+                    hard_chores_deltas[worker.id] = -1
+                
+                # All counter changes in one UPDATE (floored at zero)
+                apply_counter_deltas(
+                    reason='remove',
+                    assignment_id=assignment_id,
+                    hard_chores_counter=hard_chores_deltas,
+                    outer_partner_counter=outer_partner_deltas,
+                )
+
+                # Move worker back to front of queue for this task
+                if worker:
+                    TaskQueue.move_to_front(worker, task_type)
+            metrics.assignments_changed(metrics.ASSIGNMENTS_REMOVED, [assignment], source='single')
+
+            if worker:
                 if is_night_shift:
-                    worker.hard_chores_counter = max(0, worker.hard_chores_counter - 1)
-                    worker.save()
-                    messages.success(request, f'{worker.name} הוסר ממשמרת לילה! מונים עודכנו.')
+                    message = f'{worker.name} הוסר ממשמרת לילה! מונים עודכנו.'
                 else:
-                    messages.success(request, f'{worker.name} הוסר והועבר לראש תור {task_type}!')
+                    message = f'{worker.name} הוסר והועבר לראש תור {task_type}!'
             else:
-                messages.success(request, 'השיבוץ הוסר!')
+                message = 'השיבוץ הוסר!'
             
+            if _wants_json(request):
+                return _slot_response(
+                    request, 'success', message, assignment.date, task_type, time_slot,
+                    {*hard_chores_deltas, *outer_partner_deltas},
+                )
+            messages.success(request, message)
             return redirect(f"{reverse('assignments:calendar')}?date={date_param}")
-            
-        except Exception as e:
+
+        except Http404 as e:
+            return _error_response(request, f'Error: {str(e)}', 'assignments:calendar')
+        except (QueueConflict, OperationalError) as e:
+            if not _is_conflict(e):
+                raise
+            return _error_response(request, CONFLICT_MESSAGE, 'assignments:calendar')
+    
+    return redirect('assignments:calendar')
+
+
+@metrics.timed_view
+def generate_roster(request):
+    """Automatically fill every empty slot and task of a date from the queues.
+    
+    A roster that lost to a concurrent change (a queue moved, or a seat
+    taken, since it was planned) is rolled back and reported like a
+    conflicting assign.
+    """
+    if request.method == 'POST':
+        selected_date_str = request.POST.get('date')
+        
+        try:
+            selected_date = date.fromisoformat(selected_date_str)
+        except (TypeError, ValueError) as e:
             messages.error(request, f'Error: {str(e)}')
+            return redirect('assignments:calendar')
+        
+        try:
+            plan = RosterGenerator().generate(selected_date)
+        except (QueueConflict, OperationalError, IntegrityError) as e:
+            if not isinstance(e, IntegrityError) and not _is_conflict(e):
+                raise
+            return _error_response(
+                request, CONFLICT_MESSAGE, f"{reverse('assignments:calendar')}?date={selected_date_str}"
+            )
+        
+        if plan.unfilled:
+            messages.warning(request, f'נוצרו {len(plan)} שיבוצים. {len(plan.unfilled)} מקומות לא אוישו - אין לוחמים פנויים.')
+        else:
+            messages.success(request, f'סידור אוטומטי נוצר! {len(plan)} שיבוצים חדשים.')
+        
+        return redirect(f"{reverse('assignments:calendar')}?date={selected_date_str}")
     
     return redirect('assignments:calendar')
+
+
+def _has_bearer_token(request, token):
+    """Whether the request sends `Authorization: Bearer <token>` (compared in constant time)."""
+    return constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+@metrics.timed_view
+@csrf_exempt
+@require_POST
+def bulk_assignments(request):
+    """JSON API: apply many assignment creates and removes in one transaction.
+    
+    Body: {"create": [{"date", "task_type", "time_slot", "worker_id", "is_commander"}, ...],
+           "remove": [assignment_id, ...]}
+    Returns the resulting snapshot of every affected date.
+    
+    Scripts authenticate with settings.BULK_API_TOKEN as a bearer token and
+    skip the CSRF check; any other request (a logged-in browser) must send
+    the csrftoken cookie's value in X-CSRFToken, like the forms do.
+    """
+    token = getattr(settings, 'BULK_API_TOKEN', None)
+    if token and _has_bearer_token(request, token):
+        return _apply_bulk(request)
+    return csrf_protect(_apply_bulk)(request)
+
+
+def _apply_bulk(request):
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'errors': ['Invalid JSON body']}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'errors': ['Expected a JSON object']}, status=400)
+    
+    try:
+        dates = apply_bulk_changes(payload.get('create', []), payload.get('remove', []))
+    except ValidationError as e:
+        return JsonResponse({'errors': e.messages}, status=400)
+    
+    days = DaySchedule.load_many(dates)
+    return JsonResponse({'dates': {d.isoformat(): day.as_dict() for d, day in days.items()}})
+
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def profile_stats(request):
+    """JSON: this process's per-view query profiling aggregates (staff only). POST clears them."""
+    if request.method == 'POST':
+        profiling.registry.reset()
+    return JsonResponse({
+        'enabled': getattr(settings, 'QUERY_PROFILING', False),
+        'views': profiling.registry.snapshot(),
+    })
+
+
+@require_GET
+def metrics_export(request):
+    """Prometheus text format metrics of this process.
+    
+    With settings.METRICS_TOKEN set, scrapers must send it as a bearer token.
+    Without one it is only served while DEBUG is on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token and not settings.DEBUG:
+        return HttpResponse('Set METRICS_TOKEN to serve metrics', status=403, content_type='text/plain')
+    if token and not _has_bearer_token(request, token):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
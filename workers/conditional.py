@@ -0,0 +1,56 @@
+import hashlib
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def table_state(queryset):
+    """Cheap validator of a queryset's rows: row count and latest updated_at, in one aggregate query.
+
+    Saves bump updated_at (auto_now, and the bulk counter updates set it
+    explicitly); deletions change the count.
+    """
+    return _format_state(queryset.order_by().aggregate(count=Count('pk'), latest=Max('updated_at')))
+
+
+async def atable_state(queryset):
+    """Async version of table_state."""
+    return _format_state(await queryset.order_by().aaggregate(count=Count('pk'), latest=Max('updated_at')))
+
+
+def _format_state(state):
+    latest = state['latest'].timestamp() if state['latest'] else 0
+    return f"{state['count']}-{latest}"
+
+
+def page_etag(request, *parts):
+    """ETag of an HTML page built from validator parts, for Django's condition decorator.
+
+    Returns None (no conditional response) while the request has flash
+    messages waiting: a 304 would keep the old page and never show them.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+async def aconditional(request, parts, build_response):
+    """Async views' version of condition(etag_func=...), which is sync only before Django 5.0.
+
+    `parts` are the validator parts for page_etag; `build_response` is a
+    coroutine function making the full response, awaited only when the
+    client's copy is out of date.
+    """
+    # Reading the flash messages may load the session from the database
+    etag = await sync_to_async(page_etag)(request, *parts)
+    if etag:
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+    response = await build_response()
+    if etag and request.method in ('GET', 'HEAD'):
+        response.headers.setdefault('ETag', etag)
+    return response
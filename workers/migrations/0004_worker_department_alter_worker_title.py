@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0003_remove_worker_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worker',
+            name='department',
+            field=models.CharField(blank=True, choices=[('1', '1'), ('2', '2'), ('3', '3'), ('4', '4'), ('other', 'אחר')], max_length=20, null=True, verbose_name='מחלקה'),
+        ),
+        migrations.AlterField(
+            model_name='worker',
+            name='title',
+            field=models.CharField(choices=[('commander', 'מפקד'), ('soldier', 'חייל')], max_length=50),
+        ),
+    ]
@@ -1,4 +1,31 @@
+from datetime import date, timedelta
 from django.db import models
+from django.db.models import Count, Max, Q
+
+
+class WorkerQuerySet(models.QuerySet):
+    """Worker queries, with per-worker assignment statistics on demand."""
+    
+    # Days (up to today) counted by recent_assignments and night_shifts
+    RECENT_DAYS = 30
+    
+    def with_assignment_stats(self, today=None):
+        """Annotate recent_assignments, night_shifts (both over the last RECENT_DAYS days) and last_assignment.
+        
+        Computed in the same query as the workers, with one LEFT JOIN on the
+        assignments grouped per worker, so a page of workers never queries
+        per row. Archived days (assignments.archive) are not counted;
+        last_assignment ignores assignments after today.
+        """
+        from assignments.models import Assignment
+        today = today or date.today()
+        recent = Q(assignment__date__range=(today - timedelta(days=self.RECENT_DAYS - 1), today))
+        night_shift = Q(assignment__task_type='guard_duty', assignment__time_slot__in=Assignment.NIGHT_SHIFT_SLOTS)
+        return self.annotate(
+            recent_assignments=Count('assignment', filter=recent),
+            night_shifts=Count('assignment', filter=recent & night_shift),
+            last_assignment=Max('assignment__date', filter=Q(assignment__date__lte=today)),
+        )
 
 
 class Worker(models.Model):
@@ -25,6 +52,8 @@ class Worker(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = WorkerQuerySet.as_manager()
+    
     class Meta:
         ordering = ['name']
     
@@ -1,5 +1,7 @@
+from datetime import date, timedelta
 from django.test import TestCase, Client
 from django.urls import reverse
+from assignments.models import Assignment
 from .models import Worker
 
 
@@ -51,6 +53,41 @@ class WorkerViewsTest(TestCase):
         self.assertContains(response, "Test Worker")
         self.assertContains(response, "חייל")  # Soldier in Hebrew
     
+    def test_worker_list_not_modified(self):
+        """Test revalidating an unchanged worker list gets a 304 from three small queries."""
+        etag = self.client.get(reverse('workers:list'))['ETag']
+        
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('workers:list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.worker.outer_partner_counter = 2
+        self.worker.save()
+        response = self.client.get(reverse('workers:list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        
+        # The assignment columns changed
+        Assignment.objects.create(date=date.today(), task_type='kitchen', worker=self.worker)
+        etag = response['ETag']
+        response = self.client.get(reverse('workers:list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        
+        Worker.objects.filter(pk=self.worker.pk).delete()
+        response = self.client.get(reverse('workers:list'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+    
+    def test_worker_list_sees_old_assignment_changes(self):
+        """Test removing an assignment older than the recent days (the worker's last one) changes the ETag."""
+        assignment = Assignment.objects.create(
+            date=date.today() - timedelta(days=60), task_type='kitchen', worker=self.worker
+        )
+        etag = self.client.get(reverse('workers:list'))['ETag']
+        
+        self.client.post(reverse('assignments:remove_assignment', args=[assignment.id]))
+        response = self.client.get(reverse('workers:list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(Worker.objects.with_assignment_stats().get(pk=self.worker.pk).last_assignment)
+    
     def test_worker_create_view_get(self):
         """Test worker create form loads."""
         response = self.client.get(reverse('workers:add'))
@@ -81,3 +118,68 @@ class WorkerViewsTest(TestCase):
         response = self.client.post(reverse('workers:delete', args=[self.worker.pk]))
         self.assertEqual(response.status_code, 302)  # Redirect after success
         self.assertFalse(Worker.objects.filter(pk=self.worker.pk).exists())
+
+
+class WorkerListStatsTest(TestCase):
+    """Test cases for the paginated, sortable worker list and its assignment statistics."""
+    
+    def setUp(self):
+        """Set up workers with assignments inside, at the edge of and outside the last 30 days."""
+        self.client = Client()
+        self.today = date.today()
+        self.busy = Worker.objects.create(name="Busy", title="soldier", hard_chores_counter=1)
+        self.idle = Worker.objects.create(name="Idle", title="soldier", hard_chores_counter=7)
+        for offset in (0, 29):
+            Assignment.objects.create(
+                date=self.today - timedelta(days=offset), time_slot='01:00-03:00', task_type='guard_duty', worker=self.busy
+            )
+        Assignment.objects.create(date=self.today - timedelta(days=5), task_type='kitchen', worker=self.busy)
+        Assignment.objects.create(date=self.today - timedelta(days=30), task_type='kitchen', worker=self.busy)
+        Assignment.objects.create(date=self.today + timedelta(days=1), task_type='kitchen', worker=self.busy)
+    
+    def test_stats_are_annotated(self):
+        """Test the last 30 days (today included, future excluded) are counted per worker."""
+        workers = Worker.objects.with_assignment_stats().in_bulk()
+        
+        self.assertEqual(workers[self.busy.id].recent_assignments, 3)
+        self.assertEqual(workers[self.busy.id].night_shifts, 2)
+        self.assertEqual(workers[self.busy.id].last_assignment, self.today)
+        self.assertEqual(workers[self.idle.id].recent_assignments, 0)
+        self.assertIsNone(workers[self.idle.id].last_assignment)
+    
+    def test_page_query_count_is_constant(self):
+        """Test a page costs the same queries whatever the number of workers and assignments."""
+        for i in range(60):
+            worker = Worker.objects.create(name=f"Extra {i:02d}", title="soldier")
+            Assignment.objects.create(date=self.today, task_type='patrol_a', worker=worker)
+        
+        # ETag validators (3), paginator count and the annotated page
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('workers:list'))
+        
+        self.assertEqual(len(response.context['workers']), 50)
+        self.assertEqual(response.context['paginator'].count, 62)
+        self.assertContains(response, 'page=2')
+        response = self.client.get(reverse('workers:list'), {'page': 2})
+        self.assertEqual(len(response.context['workers']), 12)
+    
+    def test_sorting(self):
+        """Test sorting by counters and statistics, both directions, and falling back to name."""
+        def names(sort):
+            response = self.client.get(reverse('workers:list'), {'sort': sort})
+            return [worker.name for worker in response.context['workers']]
+        
+        self.assertEqual(names('-night_shifts'), ["Busy", "Idle"])
+        self.assertEqual(names('night_shifts'), ["Idle", "Busy"])
+        self.assertEqual(names('-hard_chores'), ["Idle", "Busy"])
+        # Workers never assigned sort last either way
+        self.assertEqual(names('last_assignment'), ["Busy", "Idle"])
+        self.assertEqual(names('-last_assignment'), ["Busy", "Idle"])
+        self.assertEqual(names('updated_at'), ["Busy", "Idle"])
+    
+    async def test_async_list(self):
+        """Test the async worker list sorts and paginates like the sync one."""
+        response = await self.async_client.get(reverse('workers:list_async'), {'sort': '-hard_chores'})
+        
+        self.assertEqual([worker.name for worker in response.context['workers']], ["Idle", "Busy"])
+        self.assertContains(response, 'שיבוץ אחרון')
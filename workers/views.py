@@ -1,19 +1,131 @@
+from datetime import date, timedelta
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import F, Max
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from .models import Worker
+from assignments.models import Assignment, DayVersion
+from .conditional import aconditional, atable_state, page_etag, table_state
+from .models import Worker, WorkerQuerySet
 from .forms import WorkerForm
 
 
+# ?sort= column -> ordering field; a leading '-' sorts descending
+SORT_FIELDS = {
+    'name': 'name',
+    'hard_chores': 'hard_chores_counter',
+    'outer_partner': 'outer_partner_counter',
+    'recent': 'recent_assignments',
+    'night_shifts': 'night_shifts',
+    'last_assignment': 'last_assignment',
+}
+
+
+def _sort_order(sort):
+    """(sort, order_by arguments) for a ?sort= value; unknown values sort by name."""
+    field = SORT_FIELDS.get(sort.removeprefix('-'))
+    if field is None:
+        return 'name', ['name', 'id']
+    if sort.startswith('-'):
+        return sort, [F(field).desc(nulls_last=True), 'name', 'id']
+    return sort, [F(field).asc(nulls_last=True), 'name', 'id']
+
+
+def _recent_assignments(today):
+    """The assignments the recent and night shift columns count (date index range)."""
+    return Assignment.objects.filter(
+        date__range=(today - timedelta(days=WorkerQuerySet.RECENT_DAYS - 1), today)
+    )
+
+
+def _last_change(state):
+    return state['latest'].timestamp() if state['latest'] else 0
+
+
+def _worker_list_etag(request, *args, **kwargs):
+    """Validators of the workers and of the assignment columns, without scanning every assignment.
+
+    The recent days' rows are checked through the date index; any other
+    assignment write (which may change a worker's last assignment) is
+    caught by the latest DayVersion change, which every assignment write,
+    archive run and restore bumps (assignments.fragments.invalidate).
+    """
+    today = date.today()
+    return page_etag(
+        request,
+        today,
+        table_state(Worker.objects.all()),
+        table_state(_recent_assignments(today)),
+        _last_change(DayVersion.objects.aggregate(latest=Max('changed_at'))),
+    )
+
+
+@method_decorator(condition(etag_func=_worker_list_etag), name='get')
 class WorkerListView(ListView):
-    """View to display all workers."""
+    """View to display the workers, a page at a time, with their assignment statistics.
+    
+    Sortable by name, counters and statistics (?sort=, see SORT_FIELDS); the
+    page's statistics come from the same query as its workers, plus one
+    count for the paginator. Answers 304 Not Modified (three small queries,
+    see _worker_list_etag) when no worker or shown assignment changed since
+    the client's copy.
+    """
     model = Worker
     template_name = 'workers/list.html'
     context_object_name = 'workers'
+    paginate_by = 50
     
     def get_queryset(self):
-        return Worker.objects.all()
+        self.sort, order_by = _sort_order(self.request.GET.get('sort', ''))
+        return Worker.objects.with_assignment_stats().order_by(*order_by)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sort'] = self.sort
+        return context
+    
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # Let browsers keep the page, but always revalidate it
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+async def worker_list_async(request):
+    """Async version of WorkerListView (Django's async ORM), for the ASGI entry point."""
+    async def build_response():
+        sort, order_by = _sort_order(request.GET.get('sort', ''))
+        paginator = Paginator(
+            Worker.objects.with_assignment_stats().order_by(*order_by), WorkerListView.paginate_by
+        )
+        # Paginator counts synchronously; the page's rows come from the async ORM
+        page = await sync_to_async(paginator.get_page)(request.GET.get('page'))
+        page.object_list = [worker async for worker in page.object_list]
+        context = {
+            'workers': page.object_list,
+            'page_obj': page,
+            'paginator': paginator,
+            'is_paginated': page.has_other_pages(),
+            'sort': sort,
+        }
+        # Template rendering may read the session (flash messages): keep it in the sync thread
+        response = await sync_to_async(render)(request, 'workers/list.html', context)
+        patch_cache_control(response, no_cache=True)
+        return response
+    
+    today = date.today()
+    parts = [
+        today,
+        await atable_state(Worker.objects.all()),
+        await atable_state(_recent_assignments(today)),
+        _last_change(await DayVersion.objects.aaggregate(latest=Max('changed_at'))),
+    ]
+    return await aconditional(request, parts, build_response)
 
 
 class WorkerCreateView(CreateView):
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'assignments.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +81,47 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Busy timeout: seconds a writer waits for another writer's lock before "database is locked"
+        'OPTIONS': {'timeout': 20},
+    }
+}
+
+# Applied to every new SQLite connection (assignments.signals): with the WAL journal readers
+# never block the writer and the writer never blocks readers
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+}
+
+
+# Per-view query count, DB time, repeated queries and wall time, kept in memory
+# (assignments.profiling); see /debug/profile/ and the profile_views command
+QUERY_PROFILING = False
+# Requests per view the latency and query figures are computed over
+QUERY_PROFILING_WINDOW = 500
+# A statement run this many times in one request is reported as an N+1 query
+QUERY_PROFILING_REPEATS = 5
+
+# Days of assignments kept in the Assignment table; older days are moved to ArchivedDay
+# rows by the archive_assignments command (assignments.archive)
+ASSIGNMENT_ARCHIVE_AFTER_DAYS = 365
+
+# Bearer token scripts send to POST /api/assignments/bulk/ without a CSRF token; None leaves
+# the API to browser sessions (X-CSRFToken header)
+BULK_API_TOKEN = None
+
+# Bearer token Prometheus must send to scrape /metrics/ (assignments.metrics). With None the
+# endpoint is open while DEBUG is on and refused (403) otherwise
+METRICS_TOKEN = None
+
+# Cache: queue state (keyed by the queue versions in the database) and rendered calendar days
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shavzak',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
     }
 }
 